@@ -1,39 +1,216 @@
+import asyncio
+import hashlib
 import os
-import google.generativeai as genai
+import threading
+import time
+from contextlib import contextmanager
+from agents import prompts
+from agents.model_backends import make_backend
 from memory.user_profile import UserProfile  # for type hints only
+from memory.content_cache import make_key
+from memory.lesson import Lesson, parse_step
+from tools.rate_limiter import backoff_delay, is_retryable, shared_breaker, shared_bucket
+from tools import metrics
+from tools.single_flight import SingleFlight
+from tools.tracing import span
 
-DEFAULT_MODEL = "gemini-flash-latest"  # override via GEMINI_MODEL if needed
+# Static lesson used when the model returns nothing usable
+FALLBACK_LESSON = (
+    "Step 1: A fraction is a way to show a part of a whole.\n"
+    "Step 2: The bottom number (denominator) tells how many equal parts the whole is split into.\n"
+    "Step 3: The top number (numerator) tells how many of those parts you have.\n"
+    "Step 4: Example: If a pizza is cut into 4 equal slices and you eat 1 slice, "
+    "that is 1/4 of the pizza."
+)
+
+# Static hint used when the model is unavailable
+FALLBACK_HINT = (
+    "Try reading this step again slowly, one sentence at a time. "
+    "It can help to draw a quick picture of what it describes."
+)
+
+_STATIC_CONTENT = {FALLBACK_LESSON, FALLBACK_HINT}
+
+MODEL_CALLS = metrics.counter(
+    "kindred_model_calls_total", "Model requests sent, by mode and outcome", ("mode", "outcome")
+)
+MODEL_LATENCY = metrics.histogram(
+    "kindred_model_call_seconds", "Model request latency (whole stream for mode=stream)", ("mode",)
+)
+MODEL_TOKENS = metrics.counter(
+    "kindred_model_tokens_total", "Estimated model tokens sent and received", ("direction",)
+)
+FALLBACKS = metrics.counter(
+    "kindred_fallback_content_total", "Static fallback content served instead of model output", ("kind", "reason")
+)
+CONTENT_REQUESTS = metrics.counter(
+    "kindred_content_requests_total", "Lesson and hint requests, by where they were served from", ("kind", "source")
+)
+
+
+@contextmanager
+def _model_call(mode: str):
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        MODEL_CALLS.inc(mode=mode, outcome=outcome)
+        MODEL_LATENCY.observe(time.perf_counter() - start, mode=mode)
+
+
+class ModelUnavailableError(RuntimeError):
+    """The model could not be reached (retries exhausted or circuit open)."""
 
 
 class ContentAgent:
-    def __init__(self):
-        api_key = os.getenv("GEMINI_API_KEY")
-        if not api_key:
-            raise RuntimeError(
-                "GEMINI_API_KEY is not set. "
-                "Set it in your environment or .env file."
-            )
+    def __init__(self, cache=None, backend=None, hint_index=None):
+        """
+        cache: optional ContentCache; lessons and hints are looked up there
+        before calling the model.
+        hint_index: optional HintIndex; after an exact cache miss, a hint
+        generated for a near-duplicate step is reused.
+        backend: model backend (see agents/model_backends.py); defaults to
+        the one selected by KINDRED_BACKEND, normally Gemini.
 
-        genai.configure(api_key=api_key)
-        model_name = os.getenv("GEMINI_MODEL", DEFAULT_MODEL)
-        self.model_name = model_name
-        self.model = genai.GenerativeModel(model_name)
+        Call limits come from the environment:
+        KINDRED_MODEL_RPS / KINDRED_MODEL_BURST (token bucket shared by every
+        ContentAgent in the process), KINDRED_MODEL_RETRIES,
+        KINDRED_MODEL_TIMEOUT (seconds per request), and
+        KINDRED_BREAKER_THRESHOLD / KINDRED_BREAKER_COOLDOWN.
+        """
+        self.backend = backend or make_backend()
+        self.model_name = self.backend.model_name
+        self.cache = cache
+        self.hint_index = hint_index
+        # Estimated tokens of the requests actually sent to the model
+        self.usage = prompts.TokenUsage()
+        # Concurrent identical prompts share one in-flight model request
+        self.single_flight = SingleFlight()
 
-    # ---------- internal helper to safely call Gemini ----------
+        quota_name = f"{self.backend.name}:{self.model_name}"
+        self.limiter = shared_bucket(
+            quota_name,
+            rate=float(os.getenv("KINDRED_MODEL_RPS", "5")),
+            capacity=float(os.getenv("KINDRED_MODEL_BURST", "10")),
+        )
+        self.breaker = shared_breaker(
+            quota_name,
+            failure_threshold=int(os.getenv("KINDRED_BREAKER_THRESHOLD", "5")),
+            cooldown=float(os.getenv("KINDRED_BREAKER_COOLDOWN", "30")),
+        )
+        self.max_retries = int(os.getenv("KINDRED_MODEL_RETRIES", "3"))
+        self.call_timeout = float(os.getenv("KINDRED_MODEL_TIMEOUT", "30"))
+
+    # ---------- internal helper to safely call the model ----------
+
+    def _flight_key(self, prompt: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\0{prompt}".encode("utf-8")).hexdigest()
 
     def _call_model(self, prompt: str) -> str:
-        try:
-            response = self.model.generate_content(prompt)
-        except Exception as e:
-            # Hard failure – network/API/etc.
-            raise RuntimeError(
-                f"Error calling Gemini model '{self.model_name}': {e}"
-            )
+        return self.single_flight.do(
+            self._flight_key(prompt), lambda: self._request_model(prompt)
+        )
+
+    async def _call_model_async(self, prompt: str) -> str:
+        return await self.single_flight.do_async(
+            self._flight_key(prompt), lambda: self._request_model_async(prompt)
+        )
+
+    def _unavailable(self, reason) -> ModelUnavailableError:
+        return ModelUnavailableError(
+            f"Error calling {self.backend.name} model '{self.model_name}': {reason}"
+        )
+
+    def _send(self, prompt: str, stream: bool = False, retries: int | None = None):
+        """
+        Send one request through the rate limiter and circuit breaker,
+        retrying retryable errors with jittered exponential backoff.
+        """
+        retries = self.max_retries if retries is None else retries
+        for attempt in range(retries + 1):
+            # Wait for quota first: a half-open trial granted by allow() must
+            # end in record_success/record_failure/release, never in a wait
+            if not self.limiter.acquire(timeout=self.call_timeout):
+                raise self._unavailable("rate limit wait exceeded the call deadline")
+            if not self.breaker.allow():
+                raise self._unavailable("circuit breaker is open")
+            try:
+                response = self.backend.generate(prompt, stream=stream, timeout=self.call_timeout)
+            except Exception as e:
+                # Hard failure – network/API/etc.
+                self.breaker.record_failure()
+                if attempt == retries or not is_retryable(e):
+                    raise self._unavailable(e) from e
+                time.sleep(backoff_delay(attempt, base_delay=0.5, max_delay=8.0))
+                continue
+            except BaseException:
+                self.breaker.release()
+                raise
+            self.breaker.record_success()
+            return response
+
+    async def _send_async(self, prompt: str):
+        for attempt in range(self.max_retries + 1):
+            # Quota before allow(), as in _send
+            deadline = time.monotonic() + self.call_timeout
+            while (wait := self.limiter.try_acquire()) > 0:
+                if time.monotonic() + wait > deadline:
+                    raise self._unavailable("rate limit wait exceeded the call deadline")
+                await asyncio.sleep(wait)
+            if not self.breaker.allow():
+                raise self._unavailable("circuit breaker is open")
+            try:
+                response = await asyncio.wait_for(
+                    self.backend.generate_async(prompt, timeout=self.call_timeout),
+                    timeout=self.call_timeout,
+                )
+            except Exception as e:
+                self.breaker.record_failure()
+                if attempt == self.max_retries or not is_retryable(e):
+                    raise self._unavailable(e) from e
+                await asyncio.sleep(backoff_delay(attempt, base_delay=0.5, max_delay=8.0))
+                continue
+            except BaseException:
+                # Cancelled (e.g. the session was closed) mid-request
+                self.breaker.release()
+                raise
+            self.breaker.record_success()
+            return response
+
+    def _record_usage(self, s, prompt: str, response_tokens: int) -> None:
+        prompt_tokens = prompts.count_tokens(prompt)
+        self.usage.record(prompt_tokens, response_tokens)
+        MODEL_TOKENS.inc(prompt_tokens, direction="prompt")
+        MODEL_TOKENS.inc(response_tokens, direction="response")
+        s.set(prompt_tokens=prompt_tokens, response_tokens=response_tokens)
+
+    def _request_model(self, prompt: str) -> str:
+        with _model_call("sync"), span("model.call", cat="model", prompt_chars=len(prompt)) as s:
+            response = self._send(prompt)
+            text, branch = self._extract_text(response)
+            s.set(response_chars=len(text), branch=branch)
+            self._record_usage(s, prompt, prompts.count_tokens(text))
+        return text
 
+    async def _request_model_async(self, prompt: str) -> str:
+        with _model_call("async"), span("model.call_async", cat="model", prompt_chars=len(prompt)) as s:
+            response = await self._send_async(prompt)
+            text, branch = self._extract_text(response)
+            s.set(response_chars=len(text), branch=branch)
+            self._record_usage(s, prompt, prompts.count_tokens(text))
+        return text
+
+    def _extract_text(self, response):
+        """
+        Returns (text, branch) where branch names the parsing path that
+        produced the text: "text", "candidates" or "fallback".
+        """
         # 1) Try the quick accessor
         try:
             if hasattr(response, "text") and response.text:
-                return response.text.strip()
+                return response.text.strip(), "text"
         except ValueError:
             # This is the exact error you saw – no valid Part for .text
             pass
@@ -46,19 +223,153 @@ class ContentAgent:
                 parts = getattr(content, "parts", []) if content else []
                 texts = [getattr(p, "text", "") for p in parts if getattr(p, "text", "")]
                 if texts:
-                    return "\n".join(texts).strip()
+                    return "\n".join(texts).strip(), "candidates"
         except Exception:
             # If this fails, we'll just fall back
             pass
 
         # 3) Absolute fallback: return a simple, static explanation so we don't crash
-        return (
-            "Step 1: A fraction is a way to show a part of a whole.\n"
-            "Step 2: The bottom number (denominator) tells how many equal parts the whole is split into.\n"
-            "Step 3: The top number (numerator) tells how many of those parts you have.\n"
-            "Step 4: Example: If a pizza is cut into 4 equal slices and you eat 1 slice, "
-            "that is 1/4 of the pizza."
-        )
+        FALLBACKS.inc(kind="lesson", reason="unparsed_response")
+        return FALLBACK_LESSON, "fallback"
+
+    def _cache_lookup(self, kind: str, subject: str, profile: "UserProfile"):
+        """
+        Return (key, cached_text); key is None when caching is disabled.
+        """
+        if self.cache is None:
+            return None, None
+        key = make_key(kind, self.model_name, subject, profile)
+        with span("cache.lookup", cat="cache", kind=kind) as s:
+            cached = self.cache.get(key)
+            s.set(hit=cached is not None)
+        return key, cached
+
+    def _cache_store(self, key, text: str) -> None:
+        # Static fallback content is never cached
+        if key is not None and text and text not in _STATIC_CONTENT:
+            self.cache.put(key, text)
+
+    def _similar_hint(self, step_text: str, profile: "UserProfile", topic: str | None):
+        """
+        Hint previously generated for a near-duplicate step of the same topic, or None.
+        """
+        if self.hint_index is None:
+            return None
+        with span("hint_index.search", cat="cache") as s:
+            match = self.hint_index.search(step_text, profile, topic)
+            s.set(hit=match is not None)
+        return match[0] if match is not None else None
+
+    def _index_hint(self, step_text: str, profile: "UserProfile", topic: str | None, hint: str) -> None:
+        if self.hint_index is not None and hint and hint not in _STATIC_CONTENT:
+            self.hint_index.add(step_text, hint, profile, topic)
+
+    def _cached_call(
+        self, kind: str, subject: str, profile: "UserProfile", prompt: str, topic: str | None = None
+    ) -> str:
+        """
+        Serve from the content cache when possible; otherwise call the model
+        and remember the answer. If the model is unavailable, degrade to
+        static content instead of ending the session.
+        """
+        key, cached = self._cache_lookup(kind, subject, profile)
+        if cached is not None:
+            CONTENT_REQUESTS.inc(kind=kind, source="cache")
+            return cached
+        if kind == "hint":
+            similar = self._similar_hint(subject, profile, topic)
+            if similar is not None:
+                CONTENT_REQUESTS.inc(kind=kind, source="similar")
+                self._cache_store(key, similar)
+                return similar
+        try:
+            text = self._call_model(prompt)
+        except ModelUnavailableError:
+            CONTENT_REQUESTS.inc(kind=kind, source="fallback")
+            FALLBACKS.inc(kind=kind, reason="model_unavailable")
+            return FALLBACK_LESSON if kind == "lesson" else FALLBACK_HINT
+        CONTENT_REQUESTS.inc(kind=kind, source="model")
+        self._cache_store(key, text)
+        if kind == "hint":
+            self._index_hint(subject, profile, topic, text)
+        return text
+
+    async def _cached_call_async(
+        self, kind: str, subject: str, profile: "UserProfile", prompt: str, topic: str | None = None
+    ) -> str:
+        key, cached = self._cache_lookup(kind, subject, profile)
+        if cached is not None:
+            CONTENT_REQUESTS.inc(kind=kind, source="cache")
+            return cached
+        if kind == "hint":
+            similar = self._similar_hint(subject, profile, topic)
+            if similar is not None:
+                CONTENT_REQUESTS.inc(kind=kind, source="similar")
+                self._cache_store(key, similar)
+                return similar
+        try:
+            text = await self._call_model_async(prompt)
+        except ModelUnavailableError:
+            CONTENT_REQUESTS.inc(kind=kind, source="fallback")
+            FALLBACKS.inc(kind=kind, reason="model_unavailable")
+            return FALLBACK_LESSON if kind == "lesson" else FALLBACK_HINT
+        CONTENT_REQUESTS.inc(kind=kind, source="model")
+        self._cache_store(key, text)
+        if kind == "hint":
+            self._index_hint(subject, profile, topic, text)
+        return text
+
+    def _stream_model(self, prompt: str):
+        """
+        Yield text chunks from a streamed model response. Failures before
+        the first chunk are retried like _send; once text has been yielded
+        an error ends the stream.
+        """
+        with _model_call("stream"), span("model.stream", cat="model", prompt_chars=len(prompt)) as s:
+            chunks = 0
+            chars = 0
+            tokens = 0
+            try:
+                for attempt in range(self.max_retries + 1):
+                    try:
+                        response = self._send(prompt, stream=True, retries=0)
+                    except ModelUnavailableError as e:
+                        # No cause: breaker open or quota wait exceeded, not worth retrying
+                        cause = e.__cause__
+                        if cause is None or attempt == self.max_retries or not is_retryable(cause):
+                            raise
+                        time.sleep(backoff_delay(attempt, base_delay=0.5, max_delay=8.0))
+                        continue
+                    try:
+                        for chunk in response:
+                            try:
+                                text = chunk.text
+                            except ValueError:
+                                # Chunk without a text Part (e.g. safety metadata only)
+                                continue
+                            if text:
+                                chunks += 1
+                                chars += len(text)
+                                tokens += prompts.count_tokens(text)
+                                yield text
+                        break
+                    except Exception as e:
+                        self.breaker.record_failure()
+                        if chars or attempt == self.max_retries or not is_retryable(e):
+                            raise self._unavailable(e) from e
+                        time.sleep(backoff_delay(attempt, base_delay=0.5, max_delay=8.0))
+            finally:
+                # An empty or failed stream is replaced by FALLBACK_LESSON in LessonStream
+                s.set(chunks=chunks, response_chars=chars, branch="stream" if chars else "fallback")
+                self._record_usage(s, prompt, tokens)
+
+    # ---------- prompts ----------
+
+    def _lesson_prompt(self, topic: str, profile: "UserProfile") -> str:
+        return prompts.LESSON.render(topic=topic, **prompts.student_context(profile))
+
+    def _hint_prompt(self, step_text: str, profile: "UserProfile") -> str:
+        return prompts.HINT.render(step_text=step_text, **prompts.student_context(profile))
 
     # ---------- public methods ----------
 
@@ -67,66 +378,125 @@ class ContentAgent:
         Generate a mini-lesson that is aware of the student's learning differences
         and modality preferences.
         """
-        # NOTE: Use softer language to avoid tripping safety filters
-        challenges = ", ".join(profile.learning_challenges) or "no specific learning differences noted"
-        pref = profile.preferences
-        pref_desc = (
-            f"visual={pref.get('visual', 0):.2f}, "
-            f"audio={pref.get('audio', 0):.2f}, "
-            f"text={pref.get('text', 0):.2f}"
-        )
+        prompt = self._lesson_prompt(topic, profile)
+        return self._cached_call("lesson", topic, profile, prompt)
 
-        prompt = f"""
-        You are an adaptive tutor helping a student with some learning differences.
-
-        Student context:
-        - Reported learning differences: {challenges}
-        - Modality preferences (higher = stronger preference): {pref_desc}
+    def stream_lesson(self, topic: str, profile: "UserProfile") -> "LessonStream":
+        """
+        Same lesson as generate_lesson, but returned as a LessonStream that
+        yields each Step as soon as its line is complete.
+        """
+        key, cached = self._cache_lookup("lesson", topic, profile)
+        if cached is not None:
+            CONTENT_REQUESTS.inc(kind="lesson", source="cache")
+            return LessonStream([cached])
+        CONTENT_REQUESTS.inc(kind="lesson", source="stream")
 
-        Design a short, gentle mini-lesson on: "{topic}"
+        prompt = self._lesson_prompt(topic, profile)
+        flight_key = self._flight_key(prompt)
 
-        Requirements:
-        - Use very clear, concrete language.
-        - Avoid long paragraphs; prefer short lines.
-        - Break the explanation into 3–7 small steps.
-        - Make each step self-contained.
-        - If the student struggles with reading, avoid dense blocks of text and use clear structure.
-        - If the student struggles with focus, keep steps short, with occasional encouragement.
-        - Use visual imagery where helpful (for example, pizza slices for fractions).
+        # Sessions asking for the same lesson while it streams attach to one stream
+        return self.single_flight.share(
+            flight_key,
+            lambda: LessonStream(
+                self._stream_model(prompt),
+                on_complete=lambda text: self._cache_store(key, text),
+                on_close=lambda: self.single_flight.release(flight_key),
+            ),
+        )
 
-        Output format:
-        - One step per line.
-        - Start each line with 'Step X:' where X is the step number.
+    def generate_hint(self, step_text: str, profile: "UserProfile", topic: str | None = None) -> str:
         """
+        Generate a short hint or simpler alternative explanation for a given
+        step. topic: the lesson's topic; hints are only reused from
+        near-duplicate steps of the same topic.
+        """
+        prompt = self._hint_prompt(step_text, profile)
+        return self._cached_call("hint", step_text, profile, prompt, topic)
 
-        return self._call_model(prompt)
+    async def generate_lesson_async(self, topic: str, profile: "UserProfile") -> str:
+        """
+        Non-blocking generate_lesson for the asyncio session engine.
+        """
+        prompt = self._lesson_prompt(topic, profile)
+        return await self._cached_call_async("lesson", topic, profile, prompt)
 
-    def generate_hint(self, step_text: str, profile: "UserProfile") -> str:
+    async def generate_hint_async(self, step_text: str, profile: "UserProfile", topic: str | None = None) -> str:
         """
-        Generate a short hint or simpler alternative explanation for a given step.
+        Non-blocking generate_hint for the asyncio session engine.
         """
-        challenges = ", ".join(profile.learning_challenges) or "no specific learning differences noted"
-        pref = profile.preferences
-        pref_desc = (
-            f"visual={pref.get('visual', 0):.2f}, "
-            f"audio={pref.get('audio', 0):.2f}, "
-            f"text={pref.get('text', 0):.2f}"
-        )
+        prompt = self._hint_prompt(step_text, profile)
+        return await self._cached_call_async("hint", step_text, profile, prompt, topic)
 
-        prompt = f"""
-        You are helping a student who found this explanation step confusing:
 
-        "{step_text}"
+class LessonStream:
+    """
+    Iterates over lesson steps while the model is still producing them.
 
-        Student context:
-        - Reported learning differences: {challenges}
-        - Modality preferences: {pref_desc}
+    A background thread reads the streamed response and parses each
+    complete line into a Step (memory.lesson.parse_step), so later steps
+    keep arriving while the student works through earlier ones. `steps`
+    holds everything received so far and `complete` flips once the
+    response has ended. Several sessions may iterate the same stream; each
+    iterator starts from the first step.
+    """
 
-        Task:
-        - Provide a VERY SHORT hint or alternative explanation (1–3 short sentences).
-        - Use extremely simple language.
-        - You may use a concrete example or visual description.
-        - Do NOT restate the whole lesson, just a nudge to help them understand this step.
-        """
+    def __init__(self, chunks, on_complete=None, on_close=None):
+        self.steps = []
+        self.complete = False
+        self.error = None
+        self._changed = threading.Condition()
+        self._on_complete = on_complete
+        self._on_close = on_close
+        self._thread = threading.Thread(target=self._produce, args=(chunks,), daemon=True)
+        self._thread.start()
+
+    def _emit(self, line):
+        # Only this thread appends, so the id cannot race
+        step = parse_step(line, len(self.steps) + 1)
+        if step is not None:
+            with self._changed:
+                self.steps.append(step)
+                self._changed.notify_all()
+
+    def _produce(self, chunks):
+        buffer = ""
+        try:
+            for chunk in chunks:
+                buffer += chunk
+                *finished, buffer = buffer.split("\n")
+                for line in finished:
+                    self._emit(line)
+            self._emit(buffer)
+        except Exception as e:
+            # Steps that already arrived are kept; with none we fall back below
+            self.error = e
+
+        # Nothing usable came back (empty response or model unavailable):
+        # same static lesson as _call_model
+        if not self.steps:
+            FALLBACKS.inc(kind="lesson", reason="empty_stream" if self.error is None else "model_unavailable")
+            for line in FALLBACK_LESSON.split("\n"):
+                self._emit(line)
+
+        with self._changed:
+            self.complete = True
+            self._changed.notify_all()
+        if self._on_close is not None:
+            self._on_close()
+
+        if self.error is None and self._on_complete is not None:
+            # Cached in canonical 'Step X:' form
+            self._on_complete(Lesson(steps=self.steps).to_text())
 
-        return self._call_model(prompt)
+    def __iter__(self):
+        index = 0
+        while True:
+            with self._changed:
+                while index >= len(self.steps) and not self.complete:
+                    self._changed.wait()
+                if index >= len(self.steps):
+                    break
+                step = self.steps[index]
+            index += 1
+            yield step
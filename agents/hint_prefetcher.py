@@ -0,0 +1,81 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading
+
+
+class HintPrefetcher:
+    """
+    Speculatively generates hints for lesson steps in the background, so a
+    confused student gets a hint without waiting for a model round-trip.
+
+    Only `lookahead` steps past the current one are prefetched, and at most
+    `max_workers` hint requests run at the same time. Prefetches for steps
+    the student understood are cancelled (if not started) or discarded.
+    """
+
+    def __init__(self, content_agent, max_workers: int = 2, lookahead: int = 1):
+        self.content_agent = content_agent
+        self.lookahead = lookahead
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="hint-prefetch"
+        )
+        self._futures = {}  # step_id -> Future
+        self._lock = threading.Lock()
+
+        # Counters for judging whether prefetching pays off
+        self.served = 0      # hint came from a prefetch
+        self.live_calls = 0  # had to call the model on demand
+        self.discarded = 0   # prefetch dropped because the step was understood
+
+    def prefetch(self, step_id: int, step_text: str, profile, topic: str | None = None) -> None:
+        """
+        Start generating a hint for step_id unless one is already underway.
+        """
+        with self._lock:
+            if step_id in self._futures:
+                return
+            self._futures[step_id] = self._executor.submit(
+                self.content_agent.generate_hint, step_text, profile, topic
+            )
+
+    def get(self, step_id: int, step_text: str, profile, topic: str | None = None) -> str:
+        """
+        Return the prefetched hint for step_id if it is ready or already in
+        flight; otherwise fall back to a live generate_hint call.
+        """
+        with self._lock:
+            future = self._futures.pop(step_id, None)
+
+        # Queued but not started yet: a live call is no slower
+        if future is not None and future.cancel():
+            future = None
+
+        if future is not None:
+            try:
+                hint = future.result()
+                self.served += 1
+                return hint
+            except Exception:
+                pass
+
+        self.live_calls += 1
+        return self.content_agent.generate_hint(step_text, profile, topic)
+
+    def discard(self, step_id: int) -> None:
+        """
+        Drop the prefetch for a step that no longer needs a hint.
+        """
+        with self._lock:
+            future = self._futures.pop(step_id, None)
+        if future is not None:
+            future.cancel()
+            self.discarded += 1
+
+    def discard_all(self) -> None:
+        with self._lock:
+            step_ids = list(self._futures)
+        for step_id in step_ids:
+            self.discard(step_id)
+
+    def close(self) -> None:
+        self.discard_all()
+        self._executor.shutdown(wait=False, cancel_futures=True)
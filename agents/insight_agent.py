@@ -1,5 +1,21 @@
+import html
+import json
+
+from memory.lesson import snippet
+
+
 class InsightAgent:
     def generate_report(self, profile, session_summary):
+        """
+        Plain-text report, as printed at the end of a session.
+        """
+        return self.render_text(self.build_report(profile, session_summary))
+
+    def build_report(self, profile, session_summary) -> dict:
+        """
+        Report content as a dict; the render_* methods turn it into text,
+        JSON or HTML.
+        """
         total = len(session_summary)
         correct = sum(1 for log in session_summary if log["feedback"] == "correct")
         accuracy = (correct / total) * 100 if total > 0 else 0.0
@@ -8,78 +24,143 @@ class InsightAgent:
         hint_rate = (hint_count / total) * 100 if total > 0 else 0.0
 
         incorrect_steps = [log for log in session_summary if log["feedback"] != "correct"]
-        hardest_snippet = incorrect_steps[0]["content"][:200] if incorrect_steps else None
+        hardest_snippet = snippet(incorrect_steps[0]["content"], 200) if incorrect_steps else None
 
-        lines = []
-        lines.append(f"Report for {profile.name} (ID: {profile.student_id})")
-        lines.append("-" * 60)
-        lines.append("Session Overview")
-        lines.append(f"- Learning challenges: {', '.join(profile.learning_challenges) or 'None reported'}")
-        lines.append(f"- Modality preferences: {profile.preferences}")
-        lines.append(f"- Steps marked understood: {correct}/{total} ({accuracy:.1f}%)")
-        lines.append(f"- Steps where a hint was used: {hint_count}/{total} ({hint_rate:.1f}%)")
-        lines.append("")
+        overview = {
+            "learning_challenges": list(profile.learning_challenges),
+            "preferences": dict(profile.preferences),
+            "correct": correct,
+            "total": total,
+            "accuracy": accuracy,
+            "hint_count": hint_count,
+            "hint_rate": hint_rate,
+        }
 
         # Strengths
-        lines.append("Strengths")
+        strengths = []
         if accuracy >= 80:
-            lines.append(
-                f"- {profile.name} understood most of the steps. The current explanation style seems effective."
+            strengths.append(
+                f"{profile.name} understood most of the steps. The current explanation style seems effective."
             )
         else:
-            lines.append(
-                f"- {profile.name} stayed engaged even when some steps were difficult. This persistence is a strength."
+            strengths.append(
+                f"{profile.name} stayed engaged even when some steps were difficult. This persistence is a strength."
             )
 
         if profile.preferences.get("visual", 0) >= 0.5:
-            lines.append("- Visual explanations (diagrams, imagery) are likely especially helpful.")
+            strengths.append("Visual explanations (diagrams, imagery) are likely especially helpful.")
         if profile.preferences.get("audio", 0) >= 0.5:
-            lines.append("- Hearing explanations aloud or via read-aloud tools may further support understanding.")
-
-        lines.append("")
+            strengths.append("Hearing explanations aloud or via read-aloud tools may further support understanding.")
 
         # Challenges
-        lines.append("Challenges Observed")
+        challenges = []
         if hardest_snippet:
-            lines.append(
-                "- At least one step was marked as difficult. "
+            challenges.append(
+                "At least one step was marked as difficult. "
                 "Here is an example of a challenging step:\n"
                 f'  "{hardest_snippet}..."'
             )
         else:
-            lines.append("- No specific steps were marked as difficult in this session.")
-        lines.append("")
+            challenges.append("No specific steps were marked as difficult in this session.")
 
         # Suggestions
-        lines.append("Suggestions for Parents / Teachers")
+        suggestions = []
         challenges_lower = [c.lower() for c in profile.learning_challenges]
         if "dyslexia" in challenges_lower:
-            lines.append(
-                "- Continue using short, well-spaced text with clear structure. "
+            suggestions.append(
+                "Continue using short, well-spaced text with clear structure. "
                 "Pair reading with visuals such as fraction circles or number lines."
             )
         if "adhd" in challenges_lower:
-            lines.append(
-                "- Short learning blocks with frequent micro-breaks are likely helpful. "
+            suggestions.append(
+                "Short learning blocks with frequent micro-breaks are likely helpful. "
                 "Consider 10–15 minute focused sessions with movement breaks in between."
             )
         if "autism" in challenges_lower:
-            lines.append(
-                "- Keep explanations precise and consistent. Avoid ambiguous phrasing and sudden changes in routine."
+            suggestions.append(
+                "Keep explanations precise and consistent. Avoid ambiguous phrasing and sudden changes in routine."
             )
         if not challenges_lower:
-            lines.append(
-                "- Reinforce the key ideas from this session with a quick review later in the day."
+            suggestions.append(
+                "Reinforce the key ideas from this session with a quick review later in the day."
             )
 
-        lines.append(
-            "- Ask the learner to explain the concept back in their own words; this often reveals their depth of understanding."
+        suggestions.append(
+            "Ask the learner to explain the concept back in their own words; this often reveals their depth of understanding."
         )
-        lines.append("")
 
-        lines.append("Session Step Log")
-        for log in session_summary:
-            hint_tag = " (hint used)" if log.get("hint_used") else ""
-            lines.append(f"- Step {log['step_id']}: {log['feedback']}{hint_tag}")
+        return {
+            "student_id": profile.student_id,
+            "name": profile.name,
+            "overview": overview,
+            "strengths": strengths,
+            "challenges": challenges,
+            "suggestions": suggestions,
+            "steps": [
+                {"step_id": log["step_id"], "feedback": log["feedback"], "hint_used": bool(log.get("hint_used"))}
+                for log in session_summary
+            ],
+        }
+
+    # ---------- renderers ----------
+
+    def _overview_lines(self, report: dict) -> list[str]:
+        o = report["overview"]
+        return [
+            f"Learning challenges: {', '.join(o['learning_challenges']) or 'None reported'}",
+            f"Modality preferences: {o['preferences']}",
+            f"Steps marked understood: {o['correct']}/{o['total']} ({o['accuracy']:.1f}%)",
+            f"Steps where a hint was used: {o['hint_count']}/{o['total']} ({o['hint_rate']:.1f}%)",
+        ]
+
+    def _sections(self, report: dict):
+        return [
+            ("Session Overview", self._overview_lines(report)),
+            ("Strengths", report["strengths"]),
+            ("Challenges Observed", report["challenges"]),
+            ("Suggestions for Parents / Teachers", report["suggestions"]),
+            (
+                "Session Step Log",
+                [
+                    f"Step {step['step_id']}: {step['feedback']}{' (hint used)' if step['hint_used'] else ''}"
+                    for step in report["steps"]
+                ],
+            ),
+        ]
+
+    def render_text(self, report: dict) -> str:
+        lines = []
+        lines.append(f"Report for {report['name']} (ID: {report['student_id']})")
+        lines.append("-" * 60)
+        for title, items in self._sections(report):
+            lines.append(title)
+            lines.extend(f"- {item}" for item in items)
+            lines.append("")
+        return "\n".join(lines[:-1])
+
+    def render_json(self, report: dict) -> str:
+        return json.dumps(report, indent=2, ensure_ascii=False)
+
+    def render_html(self, report: dict) -> str:
+        title = html.escape(f"Report for {report['name']} (ID: {report['student_id']})")
+        parts = [
+            "<!DOCTYPE html>",
+            '<html><head><meta charset="utf-8">',
+            f"<title>{title}</title></head><body>",
+            f"<h1>{title}</h1>",
+        ]
+        for heading, items in self._sections(report):
+            parts.append(f"<h2>{html.escape(heading)}</h2>")
+            parts.append("<ul>")
+            parts.extend(
+                f"<li>{html.escape(item).replace(chr(10), '<br>')}</li>" for item in items
+            )
+            parts.append("</ul>")
+        parts.append("</body></html>")
+        return "\n".join(parts)
 
-        return "\n".join(lines)
+    def render(self, report: dict, fmt: str) -> str:
+        renderers = {"text": self.render_text, "json": self.render_json, "html": self.render_html}
+        if fmt not in renderers:
+            raise ValueError(f"Unknown report format '{fmt}'. Choose from: {', '.join(renderers)}")
+        return renderers[fmt](report)
@@ -0,0 +1,238 @@
+"""
+Model backends used by ContentAgent.
+
+A backend exposes:
+- model_name
+- generate(prompt, stream=False, timeout=None) -> response (or iterable of chunks when streaming)
+- generate_async(prompt, timeout=None) -> response (awaitable)
+- warm() -> load the client now instead of on the first request
+
+timeout is a per-request deadline in seconds.
+
+Responses only need a `.text` attribute and, optionally, `.candidates`
+in the Gemini shape; ContentAgent._call_model handles the parsing.
+
+Select a backend with KINDRED_BACKEND (or main.py --backend):
+- "gemini" (default): Google Gemini via google.generativeai
+- "local": deterministic offline stub for load testing
+
+The Gemini SDK (and its protobuf/grpc stack) is only imported when the
+first request is made, so CLI paths that never call the model start
+fast. Long-running servers call warm() at start-up instead, so the
+import never happens inside a live request.
+"""
+
+import hashlib
+import os
+import random
+import re
+import threading
+import time
+
+DEFAULT_MODEL = "gemini-flash-latest"  # override via GEMINI_MODEL if needed
+BACKENDS = ("gemini", "local")
+
+
+class GeminiBackend:
+    name = "gemini"
+
+    def __init__(self, model_name: str | None = None):
+        self.api_key = os.getenv("GEMINI_API_KEY")
+        if not self.api_key:
+            raise RuntimeError(
+                "GEMINI_API_KEY is not set. "
+                "Set it in your environment or .env file."
+            )
+
+        self.model_name = model_name or os.getenv("GEMINI_MODEL", DEFAULT_MODEL)
+        self._model = None
+        self._model_lock = threading.Lock()
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    import google.generativeai as genai
+
+                    genai.configure(api_key=self.api_key)
+                    self._model = genai.GenerativeModel(self.model_name)
+        return self._model
+
+    def warm(self) -> None:
+        self.model
+
+    def generate(self, prompt: str, stream: bool = False, timeout: float | None = None):
+        request_options = {"timeout": timeout} if timeout else None
+        return self.model.generate_content(prompt, stream=stream, request_options=request_options)
+
+    async def generate_async(self, prompt: str, timeout: float | None = None):
+        request_options = {"timeout": timeout} if timeout else None
+        return await self.model.generate_content_async(prompt, request_options=request_options)
+
+
+# ---------- local deterministic backend ----------
+
+class LocalBackendError(Exception):
+    """Injected failure raised by LocalBackend."""
+
+
+class LocalResponse:
+    __slots__ = ("text", "candidates")
+
+    def __init__(self, text: str):
+        self.text = text
+        self.candidates = []
+
+
+_LESSON_LINES = [
+    "{topic} is about noticing one small idea at a time.",
+    "Picture {topic} as a pizza cut into equal slices.",
+    "Each slice is one part; together the slices make the whole.",
+    "Try counting the parts out loud, one by one.",
+    "Here is a tiny example you can draw on paper.",
+    "Compare two pictures side by side and spot what changed.",
+    "Great work! You now know the key idea behind {topic}.",
+]
+
+_HINT_LINES = [
+    "Try drawing it: one big circle, cut into equal pieces.",
+    "Think of sharing a snack fairly with friends.",
+    "Read just the first few words again, slowly.",
+    "Point to each part with your finger as you count.",
+]
+
+
+class LocalBackend:
+    """
+    Offline stand-in for Gemini with seeded, deterministic output.
+
+    latency_ms / jitter_ms / distribution model response time:
+    - "fixed": always latency_ms
+    - "uniform": latency_ms ± jitter_ms
+    - "lognormal": median latency_ms, with jitter_ms as the spread
+    error_rate is the probability that a call raises LocalBackendError.
+    """
+
+    name = "local"
+
+    def __init__(
+        self,
+        seed: int = 0,
+        latency_ms: float = 50.0,
+        jitter_ms: float = 0.0,
+        distribution: str = "fixed",
+        error_rate: float = 0.0,
+        model_name: str = "local-stub",
+    ):
+        if distribution not in ("fixed", "uniform", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {distribution}")
+        self.seed = seed
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.distribution = distribution
+        self.error_rate = error_rate
+        self.model_name = model_name
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "LocalBackend":
+        return cls(
+            seed=int(os.getenv("KINDRED_LOCAL_SEED", "0")),
+            latency_ms=float(os.getenv("KINDRED_LOCAL_LATENCY_MS", "50")),
+            jitter_ms=float(os.getenv("KINDRED_LOCAL_JITTER_MS", "0")),
+            distribution=os.getenv("KINDRED_LOCAL_DISTRIBUTION", "fixed"),
+            error_rate=float(os.getenv("KINDRED_LOCAL_ERROR_RATE", "0")),
+        )
+
+    def warm(self) -> None:
+        pass
+
+    # ---------- simulated timing and failures ----------
+
+    def _draw(self):
+        """
+        Return (latency_seconds, should_fail) from the seeded RNG.
+        """
+        with self._rng_lock:
+            if self.distribution == "uniform":
+                ms = self._rng.uniform(self.latency_ms - self.jitter_ms, self.latency_ms + self.jitter_ms)
+            elif self.distribution == "lognormal" and self.latency_ms > 0:
+                sigma = self.jitter_ms / self.latency_ms
+                ms = self._rng.lognormvariate(0.0, sigma) * self.latency_ms
+            else:
+                ms = self.latency_ms
+            fail = self._rng.random() < self.error_rate
+        return max(0.0, ms) / 1000.0, fail
+
+    def _fail(self):
+        raise LocalBackendError("503 Service unavailable (injected by local backend)")
+
+    # ---------- seeded output ----------
+
+    def _text(self, prompt: str) -> str:
+        digest = hashlib.sha256(f"{self.seed}:{prompt}".encode("utf-8")).digest()
+
+        if "Step X:" in prompt:
+            match = re.search(r'mini-lesson on: "(.*?)"', prompt)
+            topic = match.group(1) if match else "this topic"
+            count = 3 + digest[0] % 5  # 3–7 steps, like the real prompt asks for
+            start = digest[1] % len(_LESSON_LINES)
+            lines = [
+                f"Step {n + 1}: " + _LESSON_LINES[(start + n) % len(_LESSON_LINES)].format(topic=topic)
+                for n in range(count)
+            ]
+            return "\n".join(lines)
+
+        return _HINT_LINES[digest[0] % len(_HINT_LINES)]
+
+    # ---------- backend interface ----------
+
+    def generate(self, prompt: str, stream: bool = False, timeout: float | None = None):
+        latency, fail = self._draw()
+        text = self._text(prompt)
+
+        if timeout is not None and latency > timeout:
+            time.sleep(timeout)
+            raise TimeoutError(f"Local backend did not answer within {timeout:.1f}s")
+
+        if not stream:
+            time.sleep(latency)
+            if fail:
+                self._fail()
+            return LocalResponse(text)
+
+        def chunks():
+            lines = text.split("\n")
+            for n, line in enumerate(lines):
+                time.sleep(latency / len(lines))
+                if fail:
+                    self._fail()
+                yield LocalResponse(line + ("\n" if n < len(lines) - 1 else ""))
+
+        return chunks()
+
+    async def generate_async(self, prompt: str, timeout: float | None = None):
+        import asyncio  # only the async engine needs it; keeps plain start-up light
+
+        latency, fail = self._draw()
+        if timeout is not None and latency > timeout:
+            await asyncio.sleep(timeout)
+            raise TimeoutError(f"Local backend did not answer within {timeout:.1f}s")
+        await asyncio.sleep(latency)
+        if fail:
+            self._fail()
+        return LocalResponse(self._text(prompt))
+
+
+def make_backend(name: str | None = None):
+    """
+    Build the backend named by `name`, or by KINDRED_BACKEND (default "gemini").
+    """
+    name = (name or os.getenv("KINDRED_BACKEND", "gemini")).lower()
+    if name == "gemini":
+        return GeminiBackend()
+    if name == "local":
+        return LocalBackend.from_env()
+    raise ValueError(f"Unknown model backend '{name}'. Choose from: {', '.join(BACKENDS)}")
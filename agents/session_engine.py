@@ -0,0 +1,244 @@
+import asyncio
+import json
+import time
+
+from agents.tutor_agent import (
+    ACTIVE_SESSIONS,
+    BREAKS,
+    HINTS_SHOWN,
+    SESSION_SECONDS,
+    SESSIONS,
+    STEPS,
+    interpret_feedback,
+)
+from memory.lesson import Lesson
+from memory.session_memory import SessionMemory
+from memory.user_profile import UserProfile
+from tools.break_scheduler import should_take_break
+from tools.asset_store import AssetPipeline, AssetStore
+from tools.preference_learner import PreferenceLearner, exposed_modalities
+
+
+# ---------- I/O channels ----------
+
+class QueueChannel:
+    """
+    In-process channel backed by asyncio queues.
+
+    Everything the tutor says is put on `outbox` as ("say", text) or
+    ("ask", prompt) tuples, followed by ("end", None) when the session is
+    over. Answers to "ask" messages are read from `inbox`.
+    """
+
+    def __init__(self):
+        self.inbox = asyncio.Queue()
+        self.outbox = asyncio.Queue()
+
+    async def say(self, text: str) -> None:
+        await self.outbox.put(("say", text))
+
+    async def ask(self, prompt: str) -> str:
+        await self.outbox.put(("ask", prompt))
+        return await self.inbox.get()
+
+    async def close(self) -> None:
+        await self.outbox.put(("end", None))
+
+
+class StreamChannel:
+    """
+    Line-based channel over asyncio streams; a local stand-in for a
+    websocket. Prompts that expect an answer are prefixed with "? ".
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    async def say(self, text: str) -> None:
+        self.writer.write((text + "\n").encode("utf-8"))
+        await self.writer.drain()
+
+    async def ask(self, prompt: str) -> str:
+        await self.say(f"? {prompt}")
+        line = await self.reader.readline()
+        if not line:
+            raise EOFError("Student disconnected")
+        return line.decode("utf-8").rstrip("\r\n")
+
+    async def close(self) -> None:
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+# ---------- engine ----------
+
+class AsyncSessionEngine:
+    """
+    Runs the TutorAgent step/feedback/hint/break loop as coroutines, so one
+    process can host many students at once. Model calls are non-blocking
+    and at most `max_model_concurrency` of them are in flight at a time.
+    Visual and audio assets come from `asset_pipeline` (a default
+    AssetStore if not given), rendered off the event loop.
+    """
+
+    def __init__(
+        self, content_agent, max_model_concurrency: int = 16, preference_learner=None, asset_pipeline=None
+    ):
+        self.content_agent = content_agent
+        self.preference_learner = preference_learner or PreferenceLearner()
+        self.asset_pipeline = asset_pipeline or AssetPipeline(AssetStore())
+        self._model_slots = asyncio.Semaphore(max_model_concurrency)
+        self.active_sessions = 0
+
+    async def _generate_lesson(self, topic, profile):
+        async with self._model_slots:
+            return await self.content_agent.generate_lesson_async(topic, profile)
+
+    async def _generate_hint(self, step, profile, topic):
+        async with self._model_slots:
+            return await self.content_agent.generate_hint_async(step, profile, topic)
+
+    async def _show_assets(self, channel, topic, lesson, i, step_text, exposed):
+        """
+        TutorAgent._show_assets for the engine: queue renders for the rest
+        of the lesson and say whichever of this step's assets are ready.
+        """
+        kinds = [kind for kind in ("visual", "audio") if kind in exposed]
+        for upcoming in lesson.steps[i:]:
+            for kind in kinds:
+                self.asset_pipeline.request(kind, topic, upcoming.text)
+        for kind in kinds:
+            # May wait briefly on a render in flight, so keep it off the loop
+            asset = await asyncio.to_thread(self.asset_pipeline.ready, kind, topic, step_text, 0.05)
+            if asset is None:
+                continue
+            text = bytes(asset).decode("utf-8")
+            await channel.say(f"Visual support: {text}" if kind == "visual" else text)
+
+    async def run_session(self, profile, topic: str, channel, session_memory=None):
+        """
+        Same flow as TutorAgent.run_session, talking through `channel`
+        instead of the console. Returns the session summary.
+        """
+        session_memory = session_memory or SessionMemory()
+        session_memory.topic = topic
+        self.active_sessions += 1
+        ACTIVE_SESSIONS.inc(engine="async")
+        started = time.perf_counter()
+        outcome = "failed"
+        try:
+            await channel.say(f"\nHello {profile.name}! Today we'll learn about: {topic}\n")
+
+            lesson = Lesson.parse(await self._generate_lesson(topic, profile), topic)
+
+            incorrect_streak = 0
+            last_break_step = None
+            has_adhd = any(ch.lower() == "adhd" for ch in profile.learning_challenges)
+
+            for i, step in enumerate(lesson):
+                await channel.say(f"Step {step.step_id}: {step.text}")
+                exposed = exposed_modalities(profile)
+                await self._show_assets(channel, topic, lesson, i, step.text, exposed)
+
+                raw = await channel.ask(
+                    "Did you understand this step? "
+                    "(Enter = yes, or type no/incorrect if not): "
+                )
+                interpreted = interpret_feedback(raw, default_positive=True)
+
+                hint_used = False
+
+                if interpreted == "correct":
+                    feedback = "correct"
+                    incorrect_streak = 0
+                    await channel.say("Awesome! 👍 Let's keep going.\n")
+                else:
+                    await channel.say("Thanks for letting me know. That's totally okay! 💡")
+                    want_hint_raw = await channel.ask(
+                        "Would you like a short hint or simpler explanation? "
+                        "(Enter = yes, type no if you want to skip): "
+                    )
+                    want_hint = interpret_feedback(want_hint_raw, default_positive=True)
+
+                    if want_hint == "correct":
+                        hint_used = True
+                        HINTS_SHOWN.inc(engine="async")
+                        hint = await self._generate_hint(step.text, profile, topic)
+                        await channel.say(f"\nHere’s a hint:\n {hint} \n")
+
+                        raw2 = await channel.ask(
+                            "Does this hint help you understand the step now? "
+                            "(Enter = yes, type no if still confused): "
+                        )
+                        if interpret_feedback(raw2, default_positive=True) == "correct":
+                            feedback = "correct"
+                            incorrect_streak = 0
+                            await channel.say("Great, happy that helped! 🌟\n")
+                        else:
+                            feedback = "incorrect"
+                            incorrect_streak += 1
+                            await channel.say("No problem, we can revisit this in a future session. 🧩\n")
+                    else:
+                        feedback = "incorrect"
+                        incorrect_streak += 1
+                        await channel.say("Okay, we’ll move on for now and can come back later. 🧩\n")
+
+                session_memory.log_interaction(
+                    step_id=step.step_id,
+                    content=step.text,
+                    digest=step.content_hash,
+                    feedback=feedback,
+                    raw_feedback=raw or "<enter>",
+                    hint_used=hint_used,
+                )
+                STEPS.inc(engine="async", feedback=feedback)
+                self.preference_learner.observe_step(profile, exposed, feedback, hint_used)
+
+                if should_take_break(
+                    has_adhd=has_adhd,
+                    step_index=i,
+                    incorrect_streak=incorrect_streak,
+                    last_break_step=last_break_step,
+                ):
+                    BREAKS.inc(engine="async")
+                    await channel.say("Quick focus break! 🧘‍♂️")
+                    await channel.say("Stand up, stretch, look away from the screen for a few seconds.")
+                    await channel.ask("Press Enter when you're ready to continue...\n")
+                    last_break_step = i
+
+            outcome = "completed"
+            return session_memory.get_summary()
+        finally:
+            self.active_sessions -= 1
+            ACTIVE_SESSIONS.dec(engine="async")
+            SESSION_SECONDS.observe(time.perf_counter() - started, engine="async")
+            SESSIONS.inc(engine="async", outcome=outcome)
+
+    # ---------- local socket front end ----------
+
+    async def _handle_connection(self, reader, writer):
+        """
+        Protocol: the first line is a JSON object with "topic" plus the
+        UserProfile fields; the session then runs line by line, and the
+        summary is sent as a final JSON line.
+        """
+        channel = StreamChannel(reader, writer)
+        try:
+            hello = json.loads((await reader.readline()).decode("utf-8"))
+            topic = hello.pop("topic", "Introduction to Fractions")
+            profile = UserProfile(**hello)
+            summary = await self.run_session(profile, topic, channel)
+            await channel.say(json.dumps({"summary": summary}))
+        except (EOFError, ConnectionError, ValueError, TypeError):
+            pass
+        finally:
+            await channel.close()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8765) -> None:
+        """
+        Accept students over a local TCP socket until cancelled.
+        """
+        server = await asyncio.start_server(self._handle_connection, host, port)
+        async with server:
+            await server.serve_forever()
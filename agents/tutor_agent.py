@@ -1,133 +1,337 @@
 from tools.break_scheduler import should_take_break
+from tools.preference_learner import PreferenceLearner, exposed_modalities, step_reward
 from tools.visual_aid_tool import generate_visual_aid_description
 from tools.tts_stub import tts_stub
+from tools import metrics
+from tools.tracing import span
+
+SESSIONS = metrics.counter("kindred_sessions_total", "Tutoring sessions, by engine and outcome", ("engine", "outcome"))
+ACTIVE_SESSIONS = metrics.gauge("kindred_active_sessions", "Tutoring sessions in progress", ("engine",))
+SESSION_SECONDS = metrics.histogram(
+    "kindred_session_seconds",
+    "Wall-clock session duration, student think time included",
+    ("engine",),
+    buckets=(30, 60, 120, 300, 600, 900, 1200, 1800, 2700, 3600),
+)
+STEPS = metrics.counter("kindred_steps_total", "Lesson steps completed, by final feedback", ("engine", "feedback"))
+HINTS_SHOWN = metrics.counter("kindred_hints_shown_total", "Hints shown to students", ("engine",))
+BREAKS = metrics.counter("kindred_breaks_total", "Focus breaks suggested", ("engine",))
+
+
+def interpret_feedback(raw: str, default_positive: bool = False) -> str:
+    """
+    Map free-form input to 'correct' or 'incorrect'.
+    default_positive: if True, empty input is treated as positive.
+    """
+    if raw is None:
+        raw = ""
+    normalized = raw.lower().strip()
+
+    if normalized == "" and default_positive:
+        return "correct"
+
+    positive_responses = {
+        "correct", "c", "yes", "y", "understood", "ok", "okay", "true", "got it"
+    }
+    negative_responses = {
+        "incorrect", "i", "no", "n", "confused", "idk", "don't know", "false"
+    }
+
+    if normalized in positive_responses:
+        return "correct"
+    elif normalized in negative_responses:
+        return "incorrect"
+    else:
+        # Unknown → treat as incorrect
+        return "incorrect"
 
 
 class TutorAgent:
-    def __init__(self, content_agent, session_memory, profile):
+    def __init__(
+        self,
+        content_agent,
+        session_memory,
+        profile,
+        hint_prefetcher=None,
+        input_fn=input,
+        output_fn=print,
+        preference_learner=None,
+        checkpoint=None,
+        asset_pipeline=None,
+    ):
+        """
+        hint_prefetcher: optional HintPrefetcher that prepares hints for
+        upcoming steps in the background.
+        preference_learner: updates the profile's modality preferences
+        after every step (a default PreferenceLearner if not given).
+        input_fn / output_fn: how the session talks to the student
+        (console by default).
+        checkpoint: optional SessionCheckpoint written after every step and
+        cleared when the session finishes.
+        asset_pipeline: optional AssetPipeline; visual/audio assets for
+        upcoming steps are rendered in the background and the loop only
+        shows ones that are ready (no inline rendering).
+        """
         self.content_agent = content_agent
         self.session_memory = session_memory
         self.profile = profile
+        self.hint_prefetcher = hint_prefetcher
+        self.input_fn = input_fn
+        self.output_fn = output_fn
+        self.preference_learner = preference_learner or PreferenceLearner()
+        # (exposed modalities, reward) per step, for replaying onto a stored profile
+        self.preference_events = []
+        self.checkpoint = checkpoint
+        self.asset_pipeline = asset_pipeline
 
     def _interpret_feedback(self, raw: str, default_positive: bool = False) -> str:
+        return interpret_feedback(raw, default_positive=default_positive)
+
+    def _ask(self, prompt: str) -> str:
+        # Time spent here is student think time, not system latency
+        with span("student.input", cat="student"):
+            return self.input_fn(prompt)
+
+    def _save_checkpoint(self, topic, steps, next_step, incorrect_streak, last_break_step):
+        self.checkpoint.save(
+            {
+                "topic": topic,
+                "steps": [step.text for step in steps.steps],
+                "steps_complete": steps.complete,
+                "next_step": next_step,
+                "incorrect_streak": incorrect_streak,
+                "last_break_step": last_break_step,
+                "logs": self.session_memory.get_summary(),
+                "profile": self.profile.to_dict(),
+                "preference_events": self.preference_events,
+            }
+        )
+
+    def _show_assets(self, topic, steps, i, step_text, exposed):
         """
-        Map free-form input to 'correct' or 'incorrect'.
-        default_positive: if True, empty input is treated as positive.
+        Queue renders for the steps received so far and show whichever of
+        this step's assets are ready; a missing asset is skipped.
         """
-        if raw is None:
-            raw = ""
-        normalized = raw.lower().strip()
-
-        if normalized == "" and default_positive:
-            return "correct"
-
-        positive_responses = {
-            "correct", "c", "yes", "y", "understood", "ok", "okay", "true", "got it"
-        }
-        negative_responses = {
-            "incorrect", "i", "no", "n", "confused", "idk", "don't know", "false"
-        }
-
-        if normalized in positive_responses:
-            return "correct"
-        elif normalized in negative_responses:
-            return "incorrect"
-        else:
-            # Unknown → treat as incorrect
-            return "incorrect"
+        kinds = [kind for kind in ("visual", "audio") if kind in exposed]
+        for upcoming in steps.steps[i:]:
+            for kind in kinds:
+                self.asset_pipeline.request(kind, topic, upcoming.text)
+        for kind in kinds:
+            # Only waits on a render already in flight, never starts one
+            asset = self.asset_pipeline.ready(kind, topic, step_text, wait=0.05)
+            if asset is None:
+                continue
+            text = bytes(asset).decode("utf-8")
+            self.output_fn(f"Visual support: {text}" if kind == "visual" else text)
+
+    @staticmethod
+    def _same_prefix(steps, saved_texts) -> bool:
+        """
+        Whether the stream begins with the saved steps (compared by content hash).
+        """
+        from memory.session_memory import content_hash
 
-    def run_session(self, topic: str):
-        print(f"\nHello {self.profile.name}! Today we'll learn about: {topic}\n")
+        received = []
+        for step in steps:
+            received.append(step.content_hash)
+            if len(received) == len(saved_texts):
+                break
+        return received == [content_hash(text) for text in saved_texts]
 
-        # Agent calls ContentAgent (which itself uses Gemini) — LLM tool
-        lesson = self.content_agent.generate_lesson(topic, self.profile)
-        steps = [s for s in lesson.split("\n") if s.strip()]
+    def _restore(self, state):
+        """
+        Reload profile, logged steps and preference events from a checkpoint.
+        """
+        self.profile.preferences = dict(state["profile"]["preferences"])
+        self.profile.preference_stats = {m: list(v) for m, v in state["profile"]["preference_stats"].items()}
+        self.preference_events = [(tuple(exposed), reward) for exposed, reward in state["preference_events"]]
+        # Already in the session log from before the interruption
+        self.session_memory.restore(state["logs"])
 
+    def run_session(self, topic: str, resume_state=None):
+        """
+        resume_state: a checkpoint dict (SessionCheckpoint.load()); the
+        session continues after its last completed step, reusing the saved
+        lesson instead of generating a new one.
+        """
+        ACTIVE_SESSIONS.inc(engine="console")
+        outcome = "failed"
+        try:
+            with SESSION_SECONDS.time(engine="console"):
+                summary = self._run_session(topic, resume_state)
+            outcome = "completed"
+            return summary
+        finally:
+            ACTIVE_SESSIONS.dec(engine="console")
+            SESSIONS.inc(engine="console", outcome=outcome)
+
+    def _run_session(self, topic: str, resume_state):
+        start = 0
         incorrect_streak = 0
         last_break_step = None
+        steps = None
+
+        if resume_state is not None and not resume_state["steps_complete"]:
+            # The lesson was still streaming at the last checkpoint: ask for it
+            # again, but only continue if it starts with the steps already seen
+            topic = resume_state["topic"]
+            steps = self.content_agent.stream_lesson(topic, self.profile)
+            if not self._same_prefix(steps, resume_state["steps"]):
+                self.output_fn("Your last lesson could not be recreated, so we'll start it again from the beginning.")
+                resume_state = None
+
+        if resume_state is not None:
+            topic = resume_state["topic"]
+            self.session_memory.topic = topic
+            self._restore(resume_state)
+            start = resume_state["next_step"]
+            incorrect_streak = resume_state["incorrect_streak"]
+            last_break_step = resume_state["last_break_step"]
+            self.output_fn(f"\nWelcome back {self.profile.name}! Let's continue with: {topic}\n")
+        else:
+            self.output_fn(f"\nHello {self.profile.name}! Today we'll learn about: {topic}\n")
+            self.session_memory.topic = topic
+
+        # steps is already set when a re-streamed lesson matched the checkpoint
+        if steps is None and resume_state is not None:
+            from agents.content_agent import LessonStream
+            from memory.lesson import Lesson
+
+            lesson = Lesson.from_dict(resume_state)
+            steps = LessonStream([lesson.to_text()])
+        elif steps is None:
+            # Agent calls ContentAgent (which itself uses Gemini) — LLM tool.
+            # Steps are consumed lazily so step 1 shows while the rest is generated.
+            steps = self.content_agent.stream_lesson(topic, self.profile)
+
         has_adhd = any(ch.lower() == "adhd" for ch in self.profile.learning_challenges)
 
+        lesson_saved = resume_state is not None and resume_state["steps_complete"]
         for i, step in enumerate(steps):
-            print(f"Step {i+1}: {step}")
-
-            # TOOL: visual aid suggestion for strong visual preference
-            if self.profile.preferences.get("visual", 0) >= 0.5:
-                visual_hint = generate_visual_aid_description(topic, step)
-                print("Visual support:", visual_hint)
-
-            # TOOL: TTS stub for strong audio preference
-            if self.profile.preferences.get("audio", 0) >= 0.5:
-                audio_marker = tts_stub(step)
-                print(audio_marker)
-
-            # First pass: understanding check (Enter = yes by default)
-            raw = input(
-                "Did you understand this step? "
-                "(Enter = yes, or type no/incorrect if not): "
-            )
-            interpreted = self._interpret_feedback(raw, default_positive=True)
-
-            hint_used = False
-
-            if interpreted == "correct":
-                feedback = "correct"
-                incorrect_streak = 0
-                print("Awesome! 👍 Let's keep going.\n")
-            else:
-                # Offer a hint
-                print("Thanks for letting me know. That's totally okay! 💡")
-                want_hint_raw = input(
-                    "Would you like a short hint or simpler explanation? "
-                    "(Enter = yes, type no if you want to skip): "
+            if i < start:
+                continue
+            # Checkpoint the whole lesson as soon as it has arrived, so a
+            # resume never needs the model (or a matching re-stream) again
+            if self.checkpoint is not None and steps.complete and not lesson_saved:
+                self._save_checkpoint(topic, steps, i, incorrect_streak, last_break_step)
+                lesson_saved = True
+            with span("session.step", cat="session", step_id=i + 1):
+                self.output_fn(f"Step {step.step_id}: {step.text}")
+
+                # Speculatively prepare hints for this step and the next few received ones
+                if self.hint_prefetcher is not None:
+                    for upcoming in steps.steps[i : i + 1 + self.hint_prefetcher.lookahead]:
+                        self.hint_prefetcher.prefetch(upcoming.step_id, upcoming.text, self.profile, topic)
+
+                exposed = exposed_modalities(self.profile)
+
+                if self.asset_pipeline is not None:
+                    # TOOL: pre-rendered visual / audio assets from the asset store
+                    self._show_assets(topic, steps, i, step.text, exposed)
+                else:
+                    # TOOL: visual aid suggestion for strong visual preference
+                    if "visual" in exposed:
+                        visual_hint = generate_visual_aid_description(topic, step.text)
+                        self.output_fn(f"Visual support: {visual_hint}")
+
+                    # TOOL: TTS stub for strong audio preference
+                    if "audio" in exposed:
+                        audio_marker = tts_stub(step.text)
+                        self.output_fn(audio_marker)
+
+                # First pass: understanding check (Enter = yes by default)
+                raw = self._ask(
+                    "Did you understand this step? "
+                    "(Enter = yes, or type no/incorrect if not): "
                 )
-                want_hint = self._interpret_feedback(want_hint_raw, default_positive=True)
-
-                if want_hint == "correct":  # i.e., yes
-                    hint_used = True
-                    # TOOL: hint generator inside ContentAgent
-                    hint = self.content_agent.generate_hint(step, self.profile)
-                    print("\nHere’s a hint:\n", hint, "\n")
-
-                    # Second check after hint (Enter = yes)
-                    raw2 = input(
-                        "Does this hint help you understand the step now? "
-                        "(Enter = yes, type no if still confused): "
+                interpreted = self._interpret_feedback(raw, default_positive=True)
+
+                hint_used = False
+
+                if interpreted == "correct":
+                    feedback = "correct"
+                    incorrect_streak = 0
+                    if self.hint_prefetcher is not None:
+                        self.hint_prefetcher.discard(i + 1)
+                    self.output_fn("Awesome! 👍 Let's keep going.\n")
+                else:
+                    # Offer a hint
+                    self.output_fn("Thanks for letting me know. That's totally okay! 💡")
+                    want_hint_raw = self._ask(
+                        "Would you like a short hint or simpler explanation? "
+                        "(Enter = yes, type no if you want to skip): "
                     )
-                    interpreted2 = self._interpret_feedback(raw2, default_positive=True)
+                    want_hint = self._interpret_feedback(want_hint_raw, default_positive=True)
+
+                    if want_hint == "correct":  # i.e., yes
+                        hint_used = True
+                        HINTS_SHOWN.inc(engine="console")
+                        # TOOL: hint generator inside ContentAgent (prefetched when possible)
+                        with span("session.hint", cat="session", step_id=i + 1):
+                            if self.hint_prefetcher is not None:
+                                hint = self.hint_prefetcher.get(i + 1, step.text, self.profile, topic)
+                            else:
+                                hint = self.content_agent.generate_hint(step.text, self.profile, topic)
+                        self.output_fn(f"\nHere’s a hint:\n {hint} \n")
 
-                    if interpreted2 == "correct":
-                        feedback = "correct"
-                        incorrect_streak = 0
-                        print("Great, happy that helped! 🌟\n")
+                        # Second check after hint (Enter = yes)
+                        raw2 = self._ask(
+                            "Does this hint help you understand the step now? "
+                            "(Enter = yes, type no if still confused): "
+                        )
+                        interpreted2 = self._interpret_feedback(raw2, default_positive=True)
+
+                        if interpreted2 == "correct":
+                            feedback = "correct"
+                            incorrect_streak = 0
+                            self.output_fn("Great, happy that helped! 🌟\n")
+                        else:
+                            feedback = "incorrect"
+                            incorrect_streak += 1
+                            self.output_fn("No problem, we can revisit this in a future session. 🧩\n")
                     else:
+                        # Student declined a hint
+                        if self.hint_prefetcher is not None:
+                            self.hint_prefetcher.discard(i + 1)
                         feedback = "incorrect"
                         incorrect_streak += 1
-                        print("No problem, we can revisit this in a future session. 🧩\n")
-                else:
-                    # Student declined a hint
-                    feedback = "incorrect"
-                    incorrect_streak += 1
-                    print("Okay, we’ll move on for now and can come back later. 🧩\n")
-
-            # Log interaction with raw + hint flag
-            self.session_memory.log_interaction(
-                step_id=i + 1,
-                content=step,
-                feedback=feedback,
-                raw_feedback=raw or "<enter>",
-                hint_used=hint_used,
-            )
-
-            # TOOL: break scheduler decides if we should propose a micro-break
-            if should_take_break(
-                has_adhd=has_adhd,
-                step_index=i,
-                incorrect_streak=incorrect_streak,
-                last_break_step=last_break_step,
-            ):
-                print("Quick focus break! 🧘‍♂️")
-                print("Stand up, stretch, look away from the screen for a few seconds.")
-                input("Press Enter when you're ready to continue...\n")
-                last_break_step = i
+                        self.output_fn("Okay, we’ll move on for now and can come back later. 🧩\n")
+
+                # Log interaction with raw + hint flag
+                self.session_memory.log_interaction(
+                    step_id=i + 1,
+                    content=step.text,
+                    digest=step.content_hash,
+                    feedback=feedback,
+                    raw_feedback=raw or "<enter>",
+                    hint_used=hint_used,
+                )
+                STEPS.inc(engine="console", feedback=feedback)
+
+                # TOOL: preference learner adapts modalities for the next step
+                reward = step_reward(feedback, hint_used)
+                self.preference_learner.observe(self.profile, exposed, reward)
+                self.preference_events.append((exposed, reward))
+
+                # TOOL: break scheduler decides if we should propose a micro-break
+                if should_take_break(
+                    has_adhd=has_adhd,
+                    step_index=i,
+                    incorrect_streak=incorrect_streak,
+                    last_break_step=last_break_step,
+                ):
+                    BREAKS.inc(engine="console")
+                    self.output_fn("Quick focus break! 🧘‍♂️")
+                    self.output_fn("Stand up, stretch, look away from the screen for a few seconds.")
+                    self._ask("Press Enter when you're ready to continue...\n")
+                    last_break_step = i
+
+                if self.checkpoint is not None:
+                    self._save_checkpoint(topic, steps, i + 1, incorrect_streak, last_break_step)
+
+        if self.hint_prefetcher is not None:
+            self.hint_prefetcher.discard_all()
+        if self.checkpoint is not None:
+            self.checkpoint.clear()
 
         return self.session_memory.get_summary()
@@ -0,0 +1,170 @@
+"""
+Benchmark: HintIndex search on clustered same-domain step text
+
+Real lesson steps within a subject share most of their vocabulary, so
+their signatures crowd into a few LSH buckets. This fills the index with
+templated steps from a handful of subjects, then times searches for
+near-duplicates of stored steps (should hit) and for fresh steps from
+the same subjects (mostly miss). Recall is measured against a
+brute-force scan with the same threshold and word check.
+
+Usage:
+    python -m benchmarks.bench_hint_index --entries 100000 --queries 2000
+"""
+
+import argparse
+import json
+import random
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from memory.hint_index import HintIndex, content_words, embed, group_key
+
+SUBJECTS = {
+    "fractions": (
+        "Multiply the numerator {a} by {b} to get an equivalent fraction of {a}/{c}.",
+        "Find a common denominator for {a}/{b} and {c}/{d} before adding them.",
+        "Simplify {a}/{c} by dividing the top and bottom by {b}.",
+        "Compare {a}/{b} with {c}/{d} by drawing both as parts of a pizza.",
+    ),
+    "photosynthesis": (
+        "Leaves use sunlight to turn {a} units of water and carbon dioxide into sugar.",
+        "The chlorophyll in a leaf absorbs red and blue light, reflecting green, step {a}.",
+        "Plants release oxygen as a by-product; a tree can make {a} litres a day.",
+        "Glucose made in the leaf travels to the roots through the phloem in {a} hours.",
+    ),
+    "volcanoes": (
+        "Magma rises through cracks in the crust about {a} kilometres below the surface.",
+        "When pressure builds to {a} times normal, the volcano erupts and lava flows out.",
+        "Ash from an eruption can travel {a} kilometres and cool the climate for {b} years.",
+        "Shield volcanoes have gentle slopes because their lava is runny, like volcano {a}.",
+    ),
+    "seasons": (
+        "The Earth is tilted by about {a} degrees, so sunlight hits each half differently.",
+        "In June the northern half leans toward the Sun and gets {a} hours of daylight.",
+        "Seasons are not caused by distance: the Earth is closest to the Sun in month {a}.",
+        "At the equator the day length barely changes, staying near {a} hours all year.",
+    ),
+}
+PROFILES = [
+    SimpleNamespace(learning_challenges=challenges)
+    for challenges in ([], ["dyslexia"], ["adhd"], ["adhd", "dyslexia"])
+]
+
+
+def make_step(rng: random.Random, subject: str) -> str:
+    template = rng.choice(SUBJECTS[subject])
+    a, b, c, d = (rng.randint(2, 999) for _ in range(4))
+    return template.format(a=a, b=b, c=c, d=d)
+
+
+def perturb(rng: random.Random, text: str) -> str:
+    """
+    A near-duplicate: the same step re-worded the way a model might.
+    """
+    words = text.split()
+    edit = rng.randrange(3)
+    if edit == 0:
+        words.insert(0, rng.choice(("Now,", "Next,", "First,")))
+    elif edit == 1:
+        words[-1] = words[-1].rstrip(".") + "!"
+    else:
+        words = [w.lower() for w in words]
+    return " ".join(words)
+
+
+def brute_force(index: HintIndex, words: list, text: str, group: int) -> bool:
+    """
+    Whether any stored step of the group is a near-duplicate of `text`.
+    """
+    rows = np.flatnonzero(index._groups[: index.size] == group)
+    scores = index._vectors[rows] @ embed(text, index.dims)
+    query = content_words(text)
+    return any(words[rows[n]] == query for n in np.flatnonzero(scores >= index.threshold))
+
+
+def _timed(index, queries):
+    latencies, found = [], []
+    for text, profile, topic in queries:
+        started = time.perf_counter()
+        match = index.search(text, profile, topic)
+        latencies.append((time.perf_counter() - started) * 1000)
+        found.append(match is not None)
+    latencies.sort()
+
+    def pick(pct):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * pct / 100))]
+
+    return {"p50": pick(50), "p99": pick(99), "max": latencies[-1]}, found
+
+
+def run_benchmark(args) -> dict:
+    rng = random.Random(args.seed)
+    subjects = sorted(SUBJECTS)
+    index = HintIndex(capacity=args.entries)
+
+    stored = []
+    started = time.perf_counter()
+    for n in range(args.entries):
+        subject = subjects[n % len(subjects)]
+        text = make_step(rng, subject)
+        profile = PROFILES[n // len(subjects) % len(PROFILES)]
+        index.add(text, f"hint {n}", profile, subject)
+        stored.append((text, profile, subject))
+    add_seconds = time.perf_counter() - started
+
+    duplicates = [(perturb(rng, text), profile, subject) for text, profile, subject in rng.sample(stored, args.queries)]
+    fresh = []
+    for _ in range(args.queries):
+        subject = rng.choice(subjects)
+        fresh.append((make_step(rng, subject), rng.choice(PROFILES), subject))
+
+    duplicate_ms, duplicate_found = _timed(index, duplicates)
+    fresh_ms, fresh_found = _timed(index, fresh)
+
+    # Recall: of the queries brute force says should hit, how many did
+    words = [content_words(text) for text in index._steps[: index.size]]
+    expected = hit = 0
+    for (text, profile, subject), found in zip(duplicates + fresh, duplicate_found + fresh_found):
+        group = index._group(group_key(profile, subject), create=False)
+        if brute_force(index, words, text, group):
+            expected += 1
+            hit += found
+
+    return {
+        "config": vars(args),
+        "results": {
+            "add_us": add_seconds / args.entries * 1e6,
+            "duplicate_search_ms": duplicate_ms,
+            "fresh_search_ms": fresh_ms,
+            "recall": hit / expected if expected else 1.0,
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HintIndex search on clustered step text")
+    parser.add_argument("--entries", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=str, help="Optional result JSON path")
+    args = parser.parse_args()
+
+    result = run_benchmark(args)
+    r = result["results"]
+    dup, fresh = r["duplicate_search_ms"], r["fresh_search_ms"]
+    print(f"Add:             {r['add_us']:.1f} us/entry")
+    print(f"Near-duplicate:  p50 {dup['p50']:.3f} ms, p99 {dup['p99']:.3f} ms, max {dup['max']:.3f} ms")
+    print(f"Fresh step:      p50 {fresh['p50']:.3f} ms, p99 {fresh['p99']:.3f} ms, max {fresh['max']:.3f} ms")
+    print(f"Recall:          {r['recall']:.3f} (vs brute force)")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"\nSaved {args.output}")
+
+
+if __name__ == "__main__":
+    main()
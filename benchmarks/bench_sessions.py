@@ -0,0 +1,282 @@
+"""
+Benchmark: tutoring sessions with simulated learners
+
+Drives TutorAgent.run_session end to end with scripted or stochastic
+learners against the latency-modelled LocalBackend, so results depend on
+orchestration cost rather than on Gemini. Reports sessions/sec, per-step
+latency percentiles, model calls per session and peak memory, and saves
+them as JSON for comparing commits.
+
+Usage:
+    python -m benchmarks.bench_sessions --sessions 200 --latency-ms 20
+    python -m benchmarks.bench_sessions --learner adhd --confusion-rate 0.5 --prefetch-hints
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+from agents.content_agent import ContentAgent
+from agents.hint_prefetcher import HintPrefetcher
+from agents.model_backends import LocalBackend
+from agents.tutor_agent import TutorAgent
+from memory.content_cache import ContentCache
+from memory.session_memory import SessionMemory
+from memory.user_profile import UserProfile
+from tools import tracing
+from tools.rate_limiter import CircuitBreaker, TokenBucket
+
+LEARNER_PROFILES = {
+    "none": {
+        "preferences": {"visual": 0.3, "audio": 0.3, "text": 0.4},
+        "learning_challenges": [],
+    },
+    "dyslexia": {
+        "preferences": {"visual": 0.6, "audio": 0.3, "text": 0.1},
+        "learning_challenges": ["dyslexia"],
+    },
+    "adhd": {
+        "preferences": {"visual": 0.5, "audio": 0.4, "text": 0.1},
+        "learning_challenges": ["adhd"],
+    },
+    "adhd+dyslexia": {
+        "preferences": {"visual": 0.5, "audio": 0.4, "text": 0.1},
+        "learning_challenges": ["adhd", "dyslexia"],
+    },
+}
+
+
+class SimulatedLearner:
+    """
+    Stands in for input(): answers each tutor prompt at random with the
+    configured probabilities, or from a fixed script when one is given.
+    """
+
+    def __init__(
+        self,
+        rng: random.Random,
+        confusion_rate: float = 0.3,
+        hint_acceptance: float = 0.8,
+        hint_success: float = 0.7,
+        script=None,
+    ):
+        self.rng = rng
+        self.confusion_rate = confusion_rate
+        self.hint_acceptance = hint_acceptance
+        self.hint_success = hint_success
+        self.script = list(script) if script else None
+
+    def __call__(self, prompt: str) -> str:
+        if self.script is not None:
+            return self.script.pop(0) if self.script else ""
+
+        if prompt.startswith("Did you understand"):
+            return "no" if self.rng.random() < self.confusion_rate else ""
+        if prompt.startswith("Would you like a short hint"):
+            return "" if self.rng.random() < self.hint_acceptance else "no"
+        if prompt.startswith("Does this hint help"):
+            return "" if self.rng.random() < self.hint_success else "no"
+        return ""  # "Press Enter when you're ready..."
+
+
+class CountingBackend:
+    """
+    Wraps a backend and counts the requests that reach it.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.name = backend.name
+        self.model_name = backend.model_name
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _count(self):
+        with self._lock:
+            self.calls += 1
+
+    def generate(self, prompt, stream=False, timeout=None):
+        self._count()
+        return self.backend.generate(prompt, stream=stream, timeout=timeout)
+
+    async def generate_async(self, prompt, timeout=None):
+        self._count()
+        return await self.backend.generate_async(prompt, timeout=timeout)
+
+
+def _percentiles(values):
+    if not values:
+        return {"p50": 0.0, "p90": 0.0, "p99": 0.0, "max": 0.0}
+    values = sorted(values)
+
+    def pick(pct):
+        return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+    return {"p50": pick(50), "p90": pick(90), "p99": pick(99), "max": values[-1]}
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(args) -> dict:
+    backend = CountingBackend(
+        LocalBackend(
+            seed=args.seed,
+            latency_ms=args.latency_ms,
+            jitter_ms=args.jitter_ms,
+            distribution=args.distribution,
+            error_rate=args.error_rate,
+        )
+    )
+    cache = ContentCache() if args.cache else None
+    content_agent = ContentAgent(cache=cache, backend=backend)
+    # Own limiter and breaker instead of the process-wide defaults, so the
+    # benchmark measures orchestration unless a quota is asked for
+    rps = args.model_rps or float("inf")
+    content_agent.limiter = TokenBucket(rate=rps, capacity=args.model_burst or rps)
+    content_agent.breaker = CircuitBreaker(
+        failure_threshold=args.breaker_threshold or float("inf"),
+        cooldown=args.breaker_cooldown,
+    )
+    profile_spec = LEARNER_PROFILES[args.learner]
+    topics = [f"Benchmark topic {n}" for n in range(args.topics)]
+
+    def one_session(n):
+        rng = random.Random(args.seed * 100003 + n)
+        profile = UserProfile(
+            student_id=f"bench_{n:05d}",
+            name="Bench",
+            preferences=dict(profile_spec["preferences"]),
+            learning_challenges=list(profile_spec["learning_challenges"]),
+        )
+        prefetcher = HintPrefetcher(content_agent) if args.prefetch_hints else None
+        tutor = TutorAgent(
+            content_agent=content_agent,
+            session_memory=SessionMemory(),
+            profile=profile,
+            hint_prefetcher=prefetcher,
+            input_fn=SimulatedLearner(
+                rng,
+                confusion_rate=args.confusion_rate,
+                hint_acceptance=args.hint_acceptance,
+                hint_success=args.hint_success,
+                script=args.script.split(",") if args.script else None,
+            ),
+            output_fn=lambda *a, **k: None,
+        )
+        try:
+            summary = tutor.run_session(topics[n % len(topics)])
+        finally:
+            if prefetcher is not None:
+                prefetcher.close()
+        return summary
+
+    tracer = tracing.enable()
+    tracemalloc.start()
+    started = time.perf_counter()
+    failures = 0
+    summaries = []
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        for future in [pool.submit(one_session, n) for n in range(args.sessions)]:
+            try:
+                summaries.append(future.result())
+            except RuntimeError:
+                failures += 1
+
+    wall = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    tracing.disable()
+
+    step_ms = [e["dur"] / 1000.0 for e in tracer.events if e["name"] == "session.step"]
+    steps = sum(len(s) for s in summaries)
+    hints = sum(1 for s in summaries for log in s if log["hint_used"])
+
+    return {
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": vars(args),
+        "results": {
+            "sessions": len(summaries),
+            "failed_sessions": failures,
+            "wall_seconds": wall,
+            "sessions_per_sec": len(summaries) / wall if wall else 0.0,
+            "steps": steps,
+            "step_latency_ms": _percentiles(step_ms),
+            "model_calls": backend.calls,
+            "model_calls_per_session": backend.calls / args.sessions if args.sessions else 0.0,
+            "prompt_tokens_per_session": (
+                content_agent.usage.prompt_tokens / args.sessions if args.sessions else 0.0
+            ),
+            "hint_rate": hints / steps if steps else 0.0,
+            "peak_memory_kb": peak / 1024,
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark tutoring sessions with simulated learners")
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=1, help="Sessions run in parallel threads")
+    parser.add_argument("--topics", type=int, default=5, help="Distinct topics cycled through")
+    parser.add_argument("--learner", choices=sorted(LEARNER_PROFILES), default="dyslexia")
+    parser.add_argument("--confusion-rate", type=float, default=0.3)
+    parser.add_argument("--hint-acceptance", type=float, default=0.8)
+    parser.add_argument("--hint-success", type=float, default=0.7)
+    parser.add_argument(
+        "--script",
+        type=str,
+        help="Comma-separated answers replayed by every learner instead of random ones (e.g. 'no,,no')",
+    )
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--jitter-ms", type=float, default=5.0)
+    parser.add_argument("--distribution", choices=("fixed", "uniform", "lognormal"), default="lognormal")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--model-rps", type=float, default=0.0, help="Model request rate limit (0 = unlimited)")
+    parser.add_argument("--model-burst", type=float, default=0.0, help="Token bucket capacity (0 = same as --model-rps)")
+    parser.add_argument(
+        "--breaker-threshold", type=int, default=0, help="Failures that open the circuit breaker (0 = never opens)"
+    )
+    parser.add_argument("--breaker-cooldown", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cache", action="store_true", help="Put an in-memory ContentCache in front of the model")
+    parser.add_argument("--prefetch-hints", action="store_true")
+    parser.add_argument("--output", type=str, help="Result JSON path (default: benchmarks/results/<commit>-<time>.json)")
+    args = parser.parse_args()
+
+    result = run_benchmark(args)
+    r = result["results"]
+    lat = r["step_latency_ms"]
+    print(f"Sessions:        {r['sessions']} ({r['failed_sessions']} failed) in {r['wall_seconds']:.2f}s")
+    print(f"Throughput:      {r['sessions_per_sec']:.1f} sessions/sec")
+    print(f"Step latency:    p50 {lat['p50']:.1f} ms, p90 {lat['p90']:.1f} ms, p99 {lat['p99']:.1f} ms")
+    print(f"Model calls:     {r['model_calls_per_session']:.2f} per session")
+    print(f"Prompt tokens:   {r['prompt_tokens_per_session']:.0f} per session (estimated)")
+    print(f"Peak memory:     {r['peak_memory_kb']:.0f} KiB")
+
+    output = args.output or os.path.join(
+        "benchmarks", "results", f"{result['commit'] or 'nocommit'}-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    directory = os.path.dirname(output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"\nSaved {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,31 +1,33 @@
+import sys
+
+if "--profile-startup" in sys.argv:
+    # Installed before any other import so they are all measured
+    from tools import startup_profiler
+
+    startup_profiler.install()
+
 import argparse
-from agents.tutor_agent import TutorAgent
-from agents.content_agent import ContentAgent
-from agents.insight_agent import InsightAgent
-from memory.user_profile import UserProfile
-from memory.session_memory import SessionMemory
-from tools.analytics import compute_effective_score
 import json
 import os
-from dotenv import load_dotenv
+from agents.insight_agent import InsightAgent
+from agents.model_backends import BACKENDS
+from memory.user_profile import UserProfile
+from memory.profile_store import ProfileStore
+from tools import tracing
+from tools.preference_learner import PreferenceLearner
 
-load_dotenv()
 
+def load_profile(args, profile_store):
+    """
+    Profile from the store, then the --profile JSON, then the default.
+    """
+    profile = profile_store.get(args.student) if profile_store else None
 
-def main():
-    parser = argparse.ArgumentParser(description="Run EduBridge tutoring session")
-    parser.add_argument("--student", type=str, default="student_001", help="Student ID")
-    parser.add_argument("--name", type=str, default="Alex", help="Student Name")
-    parser.add_argument("--topic", type=str, default="Introduction to Fractions", help="Learning Topic")
-    parser.add_argument("--profile", type=str, help="Path to student profile JSON")
-    args = parser.parse_args()
-
-    # Load or create profile
-    if args.profile and os.path.exists(args.profile):
+    if profile is None and args.profile and os.path.exists(args.profile):
         with open(args.profile, "r") as f:
             data = json.load(f)
         profile = UserProfile(**data)
-    else:
+    if profile is None:
         profile = UserProfile(
             student_id=args.student,
             name=args.name,
@@ -33,41 +35,234 @@ def main():
             learning_challenges=["dyslexia"],
             notes="Prefers short explanations and visual aids",
         )
+    return profile
+
+
+def warm_start(profile, paths, events=None) -> int:
+    """
+    Replay historical session logs into a profile that has no learned
+    preference statistics yet, appending the applied steps to `events`.
+    """
+    from memory.session_memory import SessionMemory
+
+    summaries = []
+    for path in paths:
+        if path.endswith(".jsonl"):
+            summaries.append(SessionMemory.iter_log(path))
+        else:
+            with open(path, "r") as f:
+                summaries.append(json.load(f))
+    return PreferenceLearner().warm_start(profile, summaries, events)
+
+
+def print_saved_report(args, profile_store) -> None:
+    """
+    Rebuild the InsightAgent report from the last saved session JSON,
+    without loading the model client.
+    """
+    path = f"reports/{args.student}_report.json"
+    if not os.path.exists(path):
+        print(f"No saved session for {args.student} ({path} not found)")
+        return
+    with open(path, "r") as f:
+        session_summary = json.load(f)
+
+    saved_profile = f"reports/{args.student}_profile.json"
+    if args.profile is None and os.path.exists(saved_profile):
+        args.profile = saved_profile
+    profile = load_profile(args, profile_store)
+
+    print("\n===== SESSION REPORT =====\n")
+    print(InsightAgent().generate_report(profile, session_summary))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run EduBridge tutoring session")
+    parser.add_argument("--student", type=str, default="student_001", help="Student ID")
+    parser.add_argument("--name", type=str, default="Alex", help="Student Name")
+    parser.add_argument("--topic", type=str, default="Introduction to Fractions", help="Learning Topic")
+    parser.add_argument("--profile", type=str, help="Path to student profile JSON")
+    parser.add_argument(
+        "--profile-db",
+        type=str,
+        help="SQLite profile store to load and update the student profile in",
+    )
+    parser.add_argument(
+        "--cache-db",
+        type=str,
+        default="reports/content_cache.sqlite3",
+        help="SQLite file used to cache generated lessons and hints",
+    )
+    parser.add_argument("--no-cache", action="store_true", help="Always call the model")
+    parser.add_argument(
+        "--hint-index",
+        type=str,
+        default="reports/hint_index.npz",
+        help="Index of past hints reused for near-duplicate confusing steps",
+    )
+    parser.add_argument(
+        "--hint-similarity",
+        type=float,
+        default=0.85,
+        help="Cosine similarity above which a stored hint is reused",
+    )
+    parser.add_argument(
+        "--asset-store",
+        type=str,
+        default="assets/cache",
+        help="Directory of pre-rendered visual/audio step assets",
+    )
+    parser.add_argument(
+        "--asset-store-mb",
+        type=int,
+        default=256,
+        help="Size limit of the asset store; least recently used assets are evicted",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=BACKENDS,
+        help="Model backend (default: KINDRED_BACKEND or gemini; 'local' is an offline stub)",
+    )
+    parser.add_argument(
+        "--session-log",
+        type=str,
+        help="Append each step to this JSONL file as the session runs",
+    )
+    parser.add_argument(
+        "--trace",
+        type=str,
+        help="Write a Chrome trace JSON of the session to this path and print latency percentiles",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        help="Serve Prometheus metrics on http://127.0.0.1:PORT/metrics during the session",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        type=str,
+        help="Write Prometheus metrics to this file every 10 s and at the end of the session",
+    )
+    parser.add_argument(
+        "--prefetch-hints",
+        action="store_true",
+        help="Generate hints for upcoming steps in the background",
+    )
+    parser.add_argument(
+        "--warm-start",
+        type=str,
+        nargs="+",
+        metavar="LOG",
+        help="Session logs (JSONL or *_report.json) replayed to initialise a new profile's preferences",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue the student's interrupted session from its last completed step",
+    )
+    parser.add_argument(
+        "--report-only",
+        action="store_true",
+        help="Print the report for the student's last saved session and exit (no model calls)",
+    )
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="Print an import-time breakdown of start-up when the run finishes",
+    )
+    args = parser.parse_args()
+
+    profile_store = ProfileStore(args.profile_db) if args.profile_db else None
+
+    if args.report_only:
+        print_saved_report(args, profile_store)
+    else:
+        run_session(args, profile_store)
+
+    if profile_store is not None:
+        profile_store.close()
+    if args.profile_startup:
+        from tools import startup_profiler
+
+        print()
+        print(startup_profiler.format_summary())
+
 
-    session_memory = SessionMemory()
-    content_agent = ContentAgent()
+def run_session(args, profile_store) -> None:
+    # Session-only dependencies are imported here so --report-only stays fast
+    from dotenv import load_dotenv
+    from agents.tutor_agent import TutorAgent
+    from agents.content_agent import ContentAgent
+    from agents.hint_prefetcher import HintPrefetcher
+    from agents.model_backends import make_backend
+    from memory.session_memory import SessionMemory
+    from memory.content_cache import ContentCache
+    from memory.session_checkpoint import SessionCheckpoint
+    from tools import metrics
+    from tools.asset_store import AssetPipeline, AssetStore
+
+    load_dotenv()
+
+    if args.trace:
+        tracing.enable()
+    if args.metrics_port:
+        metrics.serve(port=args.metrics_port)
+    stop_dumping = metrics.start_dumping(args.metrics_file) if args.metrics_file else None
+
+    # Load or create profile
+    profile = load_profile(args, profile_store)
+
+    checkpoint = SessionCheckpoint.for_student(args.student)
+    resume_state = checkpoint.load() if args.resume else None
+    if args.resume and resume_state is None:
+        print(f"No interrupted session found for {args.student}; starting a new one.")
+    warm_events = []
+    if args.warm_start and not profile.preference_stats:
+        steps = warm_start(profile, args.warm_start, warm_events)
+        print(f"Warm-started preferences from {steps} logged steps: {profile.preferences}")
+
+    session_memory = SessionMemory(log_path=args.session_log)
+    cache = None if args.no_cache else ContentCache(args.cache_db)
+    hint_index = None
+    if not args.no_cache:
+        from memory.hint_index import HintIndex  # pulls in NumPy
+
+        hint_index = HintIndex.load(args.hint_index, threshold=args.hint_similarity)
+    content_agent = ContentAgent(cache=cache, backend=make_backend(args.backend), hint_index=hint_index)
+    hint_prefetcher = HintPrefetcher(content_agent) if args.prefetch_hints else None
+    asset_pipeline = AssetPipeline(AssetStore(args.asset_store, max_bytes=args.asset_store_mb * 1024 * 1024))
     tutor_agent = TutorAgent(
         content_agent=content_agent,
         session_memory=session_memory,
         profile=profile,
+        hint_prefetcher=hint_prefetcher,
+        checkpoint=checkpoint,
+        asset_pipeline=asset_pipeline,
     )
     insight_agent = InsightAgent()
 
     topic = args.topic
-    session_summary = tutor_agent.run_session(topic)
-
-    # TOOL: analytics computes effective score
-    effective_score = compute_effective_score(session_summary)
+    session_summary = tutor_agent.run_session(topic, resume_state=resume_state)
+    if hint_prefetcher is not None:
+        hint_prefetcher.close()
+    asset_pipeline.close()
+    session_memory.close()
 
-    # Use effective score + challenges to adjust preferences
-    feedback_delta = {"visual": 0.0, "audio": 0.0, "text": 0.0}
-    challenges_lower = [c.lower() for c in profile.learning_challenges]
-
-    if effective_score >= 0.8:
-        # Current style worked; reward dominant preference slightly
-        dominant = max(profile.preferences, key=profile.preferences.get)
-        feedback_delta[dominant] += 0.05
-    else:
-        # Struggled: for dyslexia/ADHD, more visual, less text
-        if "dyslexia" in challenges_lower or "adhd" in challenges_lower:
-            feedback_delta["visual"] += 0.05
-            feedback_delta["text"] -= 0.05
+    # Preferences were adapted step by step during the session
+    if profile_store is not None:
+        if profile_store.get(profile.student_id) is None:
+            profile_store.save(profile)
         else:
-            feedback_delta["audio"] += 0.03
-            feedback_delta["visual"] += 0.02
-            feedback_delta["text"] -= 0.05
+            # Re-apply the warm start and this session's steps to the stored
+            # copy atomically, so concurrent sessions for the same student
+            # don't clobber each other
+            def merge(stored):
+                learner = tutor_agent.preference_learner
+                if warm_events and not stored.preference_stats:
+                    learner.replay(stored, warm_events)
+                learner.replay(stored, tutor_agent.preference_events)
 
-    profile.update_preferences(feedback_delta)
+            profile = profile_store.update(profile.student_id, merge)
 
     # Generate and print report
     report = insight_agent.generate_report(profile, session_summary)
@@ -81,6 +276,44 @@ def main():
     with open(f"reports/{profile.student_id}_profile.json", "w") as f:
         json.dump(profile.to_dict(), f, indent=2)
 
+    tracer = tracing.get_tracer()
+    if tracer is not None:
+        tracer.export_chrome(args.trace)
+        print(f"\nTrace written to {args.trace}")
+        print(tracer.format_summary())
+
+    usage = content_agent.usage.stats()
+    if usage["calls"]:
+        print(
+            f"\nModel tokens (estimated): {usage['prompt_tokens']} prompt + "
+            f"{usage['response_tokens']} response over {usage['calls']} calls"
+        )
+
+    flights = content_agent.single_flight.stats()
+    if flights["collapsed"]:
+        print(
+            f"\nModel requests: {flights['executed']} sent, "
+            f"{flights['collapsed']} collapsed into in-flight duplicates"
+        )
+
+    if cache is not None:
+        stats = cache.stats()
+        print(
+            f"\nContent cache: {stats['hits']} hits, {stats['misses']} misses "
+            f"({stats['hit_rate'] * 100:.0f}% hit rate)"
+        )
+        cache.close()
+
+    if hint_index is not None:
+        if hint_index.hits:
+            print(f"Hint index: {hint_index.hits} hints reused from similar steps")
+        hint_index.save(args.hint_index)
+
+    if stop_dumping is not None:
+        stop_dumping.set()
+        metrics.dump(args.metrics_file)
+        print(f"Metrics written to {args.metrics_file}")
+
 
 if __name__ == "__main__":
     main()
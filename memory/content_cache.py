@@ -0,0 +1,223 @@
+"""
+Content cache for generated lessons and hints.
+
+Lessons and hints are keyed on the normalized inputs that shape the prompt
+(model name, topic or step text, learning challenges and bucketed modality
+preferences), so students with similar profiles share one generation.
+
+Two tiers:
+- an in-memory LRU for the hottest entries
+- an optional SQLite file for persistence across runs, with TTL and
+  size-based eviction (least recently accessed entries go first);
+  pinned entries (no TTL) are never evicted and do not count
+  toward the size limit
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+PREFERENCE_BUCKET = 0.1  # preferences are rounded to this step for keying
+DEFAULT_TTL = 7 * 24 * 3600  # one week
+
+
+def _normalize_text(text: str) -> str:
+    return " ".join(text.split()).casefold()
+
+
+def quantize_preferences(preferences: dict, bucket: float = PREFERENCE_BUCKET) -> dict:
+    """
+    Round modality weights to the nearest bucket so that small drifts in
+    preferences still map to the same cache entry.
+    """
+    return {
+        mode: round(round(float(value) / bucket) * bucket, 4)
+        for mode, value in sorted(preferences.items())
+    }
+
+
+def make_key(kind: str, model_name: str, subject: str, profile) -> str:
+    """
+    Build a content-addressed key for a lesson ("lesson", topic) or a
+    hint ("hint", step text) generated for the given profile.
+    """
+    challenges = sorted({c.strip().casefold() for c in profile.learning_challenges if c.strip()})
+    payload = json.dumps(
+        {
+            "kind": kind,
+            "model": model_name,
+            "subject": _normalize_text(subject),
+            "challenges": challenges,
+            "preferences": quantize_preferences(profile.preferences),
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ContentCache:
+    def __init__(
+        self,
+        path: str | None = None,
+        max_memory_entries: int = 256,
+        max_disk_entries: int = 10000,
+        ttl: float | None = DEFAULT_TTL,
+    ):
+        """
+        path: SQLite file for the disk tier (None = memory only)
+        max_disk_entries: size limit for entries with a TTL; pinned
+        entries are kept regardless
+        ttl: seconds before an entry expires (None = never)
+        """
+        self.path = path
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl = ttl
+
+        self.hits = 0
+        self.misses = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+
+        self._memory = OrderedDict()  # key -> (value, expires_at)
+        self._lock = threading.Lock()
+        self._db = None
+
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS content ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " expires_at REAL,"
+                " accessed_at REAL NOT NULL)"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS content_accessed ON content (accessed_at)"
+            )
+            self._db.commit()
+
+    # ---------- public methods ----------
+
+    def get(self, key: str) -> str | None:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    self.memory_hits += 1
+                    return value
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, expires_at FROM content WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    value, expires_at = row
+                    if expires_at is None or expires_at > now:
+                        self._db.execute(
+                            "UPDATE content SET accessed_at = ? WHERE key = ?", (now, key)
+                        )
+                        self._db.commit()
+                        self._remember(key, value, expires_at)
+                        self.hits += 1
+                        self.disk_hits += 1
+                        return value
+                    self._db.execute("DELETE FROM content WHERE key = ?", (key,))
+                    self._db.commit()
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, value: str, ttl: float | None = ...) -> None:
+        """
+        Store a value. ttl defaults to the cache-wide TTL; pass None to pin
+        the entry so it is never expired or evicted.
+        """
+        if ttl is ...:
+            ttl = self.ttl
+        now = time.time()
+        expires_at = now + ttl if ttl is not None else None
+
+        with self._lock:
+            self._remember(key, value, expires_at)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO content (key, value, expires_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (key, value, expires_at, now),
+                )
+                self._evict_disk(now)
+                self._db.commit()
+
+    def contains(self, key: str) -> bool:
+        """
+        Check for a live entry without touching hit/miss counters.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and (entry[1] is None or entry[1] > now):
+                return True
+            if self._db is None:
+                return False
+            row = self._db.execute(
+                "SELECT 1 FROM content WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+                (key, now),
+            ).fetchone()
+            return row is not None
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            "memory_entries": len(self._memory),
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    # ---------- internal helpers ----------
+
+    def _remember(self, key, value, expires_at):
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self, now):
+        self._db.execute(
+            "DELETE FROM content WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,)
+        )
+        # Pinned rows (pre-generated lessons) are exempt, so a process opened
+        # with a small limit cannot wipe out a store filled by pregenerate.py
+        (count,) = self._db.execute(
+            "SELECT COUNT(*) FROM content WHERE expires_at IS NOT NULL"
+        ).fetchone()
+        overflow = count - self.max_disk_entries
+        if overflow > 0:
+            self._db.execute(
+                "DELETE FROM content WHERE key IN ("
+                " SELECT key FROM content WHERE expires_at IS NOT NULL"
+                " ORDER BY accessed_at ASC LIMIT ?)",
+                (overflow,),
+            )
@@ -0,0 +1,309 @@
+"""
+Near-duplicate hint reuse.
+
+Step texts are embedded as hashed character n-gram vectors (no model
+needed) and kept, with the hint generated for them, in a fixed-size
+NumPy matrix. A new confusing step from the same topic, for the same
+set of learning challenges, gets a stored step's hint instead of a model
+call when the two are near-duplicates.
+
+N-gram cosine alone cannot tell a re-worded step from a different one:
+on hand-labelled pairs, re-wordings ("Now, add the numerators...") score
+from 0.87 while one-word changes ("Add" / "Subtract the numerators...")
+reach 0.90. So the threshold only shortlists candidates, and a candidate
+is reused only if it has the same content words as the query, ignoring
+case, punctuation, order, plural "s" and filler words.
+
+Brute-force cosine over 100k rows costs several milliseconds, so rows
+are also bucketed by random-hyperplane signatures: `bands` independent
+tables, each keyed on the (challenges, topic) group plus `band_bits`
+signature bits. A search only rescores the rows sharing at least one
+bucket with the query; near-duplicates almost always do. Steps from one
+subject share most of their n-grams and crowd into the same buckets, so
+each bucket keeps only its newest `max_bucket_rows` rows, which bounds a
+search to bands * max_bucket_rows candidates however clustered the
+stored text is (see benchmarks/bench_hint_index.py). Groups no larger
+than that bound are simply scanned in full.
+
+The index is a ring buffer: once `capacity` entries are stored the
+oldest are overwritten. It persists to a single .npz file.
+"""
+
+import json
+import os
+import re
+import threading
+import zlib
+
+import numpy as np
+
+DEFAULT_DIMS = 128
+DEFAULT_THRESHOLD = 0.85
+DEFAULT_BANDS = 32
+DEFAULT_BAND_BITS = 12
+DEFAULT_MAX_BUCKET_ROWS = 32
+MAX_VERIFIED = 8  # shortlisted candidates checked word by word, best first
+
+# Words a re-worded step may add or drop without changing what it says
+_FILLER = frozenset(
+    "a an the and or but so then now next first also just up it its this that these those "
+    "is are be of to in on at as".split()
+)
+
+
+def embed(text: str, dims: int = DEFAULT_DIMS) -> np.ndarray:
+    """
+    L2-normalized signed feature hashing of character 3-grams and words.
+    """
+    normalized = " ".join(text.lower().split())
+    vec = np.zeros(dims, dtype=np.float32)
+    padded = f" {normalized} "
+    grams = [padded[i : i + 3] for i in range(len(padded) - 2)]
+    grams.extend(normalized.split())
+    for gram in grams:
+        h = zlib.crc32(gram.encode("utf-8"))
+        vec[h % dims] += 1.0 if (h >> 31) & 1 else -1.0
+    norm = np.linalg.norm(vec)
+    if norm > 0:
+        vec /= norm
+    return vec
+
+
+def content_words(text: str) -> frozenset:
+    """
+    Lower-cased words of `text` without filler words, hyphens or plural "s".
+    """
+    words = re.findall(r"[a-z0-9]+", text.lower().replace("-", ""))
+    return frozenset(w[:-1] if len(w) > 3 and w.endswith("s") else w for w in words) - _FILLER
+
+
+def group_key(profile, topic: str | None) -> str:
+    """
+    Hints are only shared between steps with the same learning challenges
+    and lesson topic.
+    """
+    challenges = ",".join(sorted({c.strip().lower() for c in profile.learning_challenges if c.strip()}))
+    return f"{challenges}|{' '.join((topic or '').lower().split())}"
+
+
+class _Rows:
+    """
+    Row ids sharing one LSH bucket, oldest first, in an int32 array that
+    grows by doubling up to `limit`; past that the oldest id is dropped.
+    """
+
+    __slots__ = ("array", "count")
+
+    def __init__(self, rows=None):
+        self.array = np.empty(4, dtype=np.int32) if rows is None else np.array(rows, dtype=np.int32)
+        self.count = 0 if rows is None else len(rows)
+
+    def append(self, row: int, limit: int) -> None:
+        if self.count >= limit:
+            self.array[: limit - 1] = self.array[self.count - limit + 1 : self.count]
+            self.count = limit - 1
+        elif self.count == len(self.array):
+            grown = np.empty(min(limit, 2 * len(self.array)), dtype=np.int32)
+            grown[: self.count] = self.array[: self.count]
+            self.array = grown
+        self.array[self.count] = row
+        self.count += 1
+
+    def remove(self, row: int) -> None:
+        rows = self.array[: self.count]
+        keep = rows != row
+        if not keep.all():
+            kept = rows[keep]
+            self.array[: len(kept)] = kept
+            self.count = len(kept)
+
+    def view(self) -> np.ndarray:
+        return self.array[: self.count]
+
+
+class HintIndex:
+    def __init__(
+        self,
+        capacity: int = 100_000,
+        dims: int = DEFAULT_DIMS,
+        threshold: float = DEFAULT_THRESHOLD,
+        bands: int = DEFAULT_BANDS,
+        band_bits: int = DEFAULT_BAND_BITS,
+        max_bucket_rows: int = DEFAULT_MAX_BUCKET_ROWS,
+    ):
+        self.capacity = capacity
+        self.dims = dims
+        self.threshold = threshold
+        self.band_bits = band_bits
+        self.max_bucket_rows = max_bucket_rows
+
+        # Fixed seed so signatures stay valid across save/load
+        self._planes = (
+            np.random.default_rng(0).standard_normal((bands * band_bits, dims)).astype(np.float32)
+        )
+        self._bit_weights = 1 << np.arange(band_bits)
+        # One table per band: (group, band signature) -> _Rows
+        self._buckets = [{} for _ in range(bands)]
+
+        self._vectors = np.zeros((capacity, dims), dtype=np.float32)
+        self._groups = np.full(capacity, -1, dtype=np.int32)  # group code per row
+        self._signatures = np.zeros((capacity, bands), dtype=np.int32)
+        self._steps = [None] * capacity
+        self._hints = [None] * capacity
+        self._group_codes = {}  # group key -> code
+        self._group_sizes = {}  # code -> rows stored
+        self._next = 0
+        self.size = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def _group(self, key: str, create: bool) -> int | None:
+        code = self._group_codes.get(key)
+        if code is None and create:
+            code = self._group_codes[key] = len(self._group_codes)
+        return code
+
+    def _band_signatures(self, vectors: np.ndarray) -> np.ndarray:
+        """
+        (..., dims) vectors -> (..., bands) band signatures.
+        """
+        bits = (vectors @ self._planes.T > 0).reshape(*vectors.shape[:-1], len(self._buckets), self.band_bits)
+        return (bits @ self._bit_weights).astype(np.int32)
+
+    def _bucket_keys(self, group: int, signatures) -> list:
+        base = group << self.band_bits
+        return [base + int(s) for s in signatures]
+
+    def _unplace(self, row: int) -> None:
+        group = int(self._groups[row])
+        self._group_sizes[group] -= 1
+        keys = self._bucket_keys(group, self._signatures[row])
+        for table, key in zip(self._buckets, keys):
+            rows = table.get(key)
+            if rows is not None:
+                rows.remove(row)
+                if rows.count == 0:
+                    del table[key]
+
+    def _place(self, row: int, vector: np.ndarray, group: int) -> None:
+        signatures = self._band_signatures(vector)
+        self._vectors[row] = vector
+        self._groups[row] = group
+        self._group_sizes[group] = self._group_sizes.get(group, 0) + 1
+        self._signatures[row] = signatures
+        for table, key in zip(self._buckets, self._bucket_keys(group, signatures)):
+            rows = table.get(key)
+            if rows is None:
+                rows = table[key] = _Rows()
+            rows.append(row, self.max_bucket_rows)
+
+    def _rebuild_buckets(self, count: int, oldest: int) -> None:
+        self._signatures[:count] = self._band_signatures(self._vectors[:count])
+        codes, sizes = np.unique(self._groups[:count], return_counts=True)
+        self._group_sizes = dict(zip(codes.tolist(), sizes.tolist()))
+        # Oldest rows first, so the per-bucket cap keeps the newest, as add() does
+        order = np.roll(np.arange(count, dtype=np.int32), -oldest)
+        groups = self._groups[order].astype(np.int64) << self.band_bits
+        for band, table in enumerate(self._buckets):
+            keys = groups + self._signatures[order, band]
+            by_key = np.argsort(keys, kind="stable")
+            unique, starts = np.unique(keys[by_key], return_index=True)
+            table.clear()
+            for key, rows in zip(unique.tolist(), np.split(order[by_key], starts[1:])):
+                table[key] = _Rows(rows[-self.max_bucket_rows :])
+
+    def _candidates(self, group: int, signatures) -> np.ndarray:
+        if self._group_sizes.get(group, 0) <= len(self._buckets) * self.max_bucket_rows:
+            # No bigger than what the buckets may return: score it all
+            return np.flatnonzero(self._groups[: self.size] == group)
+        buckets = [table.get(key) for table, key in zip(self._buckets, self._bucket_keys(group, signatures))]
+        buckets = [b.view() for b in buckets if b is not None]
+        return np.concatenate(buckets) if buckets else ()
+
+    def add(self, step_text: str, hint: str, profile, topic: str | None = None) -> None:
+        vector = embed(step_text, self.dims)
+        with self._lock:
+            row = self._next
+            if row < self.size:
+                self._unplace(row)
+            self._place(row, vector, self._group(group_key(profile, topic), create=True))
+            self._steps[row] = step_text
+            self._hints[row] = hint
+            self._next = (row + 1) % self.capacity
+            self.size = min(self.size + 1, self.capacity)
+
+    def search(self, step_text: str, profile, topic: str | None = None):
+        """
+        Return (hint, similarity) for the closest stored near-duplicate step
+        with the same challenges and topic, or None if there is none.
+        """
+        vector = embed(step_text, self.dims)
+        signatures = self._band_signatures(vector)
+        with self._lock:
+            group = self._group(group_key(profile, topic), create=False)
+            rows = () if group is None else self._candidates(group, signatures)
+            if len(rows) == 0:
+                self.misses += 1
+                return None
+            scores = self._vectors[rows] @ vector
+            shortlist = np.flatnonzero(scores >= self.threshold)
+            if len(shortlist):
+                words = content_words(step_text)
+                for best in shortlist[np.argsort(-scores[shortlist])][:MAX_VERIFIED]:
+                    row = int(rows[best])
+                    if content_words(self._steps[row]) == words:
+                        self.hits += 1
+                        return self._hints[row], float(scores[best])
+            self.misses += 1
+            return None
+
+    # ---------- persistence ----------
+
+    def save(self, path: str) -> None:
+        """
+        Write the index as a single .npz, via a temp file and os.replace so
+        a crash mid-save never leaves a truncated or mismatched index.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            meta = json.dumps(
+                {
+                    "dims": self.dims,
+                    "next": self._next,
+                    "groups": self._group_codes,
+                    "steps": self._steps[: self.size],
+                    "hints": self._hints[: self.size],
+                }
+            )
+            tmp = f"{path}.tmp"
+            with open(tmp, "wb") as f:
+                np.savez(
+                    f,
+                    vectors=self._vectors[: self.size],
+                    groups=self._groups[: self.size],
+                    meta=np.frombuffer(meta.encode("utf-8"), dtype=np.uint8),
+                )
+            os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str, capacity: int = 100_000, threshold: float = DEFAULT_THRESHOLD) -> "HintIndex":
+        if not os.path.exists(path):
+            return cls(capacity=capacity, threshold=threshold)
+        with np.load(path) as arrays:
+            vectors, groups = arrays["vectors"], arrays["groups"]
+            meta = json.loads(arrays["meta"].tobytes().decode("utf-8"))
+        index = cls(capacity=capacity, dims=meta["dims"], threshold=threshold)
+        count = min(len(vectors), capacity)
+        index._vectors[:count] = vectors[:count]
+        index._groups[:count] = groups[:count]
+        index._steps[:count] = meta["steps"][:count]
+        index._hints[:count] = meta["hints"][:count]
+        index._group_codes = meta["groups"]
+        index.size = count
+        index._next = meta["next"] % capacity if count == capacity else count
+        index._rebuild_buckets(count, oldest=index._next if count == capacity else 0)
+        return index
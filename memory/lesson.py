@@ -0,0 +1,109 @@
+"""
+Structured lesson: an ordered list of Steps parsed once from model output.
+
+The lesson prompt asks for one 'Step X:' line per step, but models also
+emit markdown bold ("**Step 1:**"), numbered lists ("1.", "2)"), bullets,
+code fences and prefix-only lines. parse_step() normalizes all of these
+to the bare step text; step ids are assigned in arrival order rather
+than trusted from the model's numbering.
+
+Each Step carries the content hash SessionMemory logs it under, so
+consumers can refer to a step by hash instead of copying its text.
+Lesson.to_text() is the canonical 'Step X: text' form stored in the
+content cache; parsing it again gives back the same lesson.
+"""
+
+import re
+
+from memory.session_memory import content_hash
+
+_PREFIX_RE = re.compile(
+    r"""^\s*
+    (?:[-*•>]\s+)?                          # bullet / quote
+    (?:\*\*|__)?\s*                         # opening bold
+    (?:step\s*\d+\s*(?:[:)\-–—]|\.(?!\d))?   # 'Step 3:'
+    |\d+[.)](?=\s|$|\*\*|__))\s*            # '3.' / '3)', but not '0.5'
+    (?:\*\*|__)?\s*                         # closing bold
+    """,
+    re.IGNORECASE | re.VERBOSE,
+)
+_NOISE_RE = re.compile(r"^\s*(?:```.*|[-*_=]{3,}|#+)\s*$")
+
+
+class Step:
+    __slots__ = ("step_id", "text", "content_hash")
+
+    def __init__(self, step_id: int, text: str):
+        self.step_id = step_id
+        self.text = text
+        self.content_hash = content_hash(text)
+
+    def __repr__(self):
+        return f"Step({self.step_id}, {self.text!r})"
+
+
+class Lesson:
+    __slots__ = ("topic", "steps")
+
+    def __init__(self, topic: str | None = None, steps=None):
+        self.topic = topic
+        self.steps = list(steps or [])
+
+    def __iter__(self):
+        return iter(self.steps)
+
+    def __len__(self):
+        return len(self.steps)
+
+    def __getitem__(self, index):
+        return self.steps[index]
+
+    @classmethod
+    def parse(cls, text: str, topic: str | None = None) -> "Lesson":
+        lesson = cls(topic)
+        for line in text.split("\n"):
+            step = parse_step(line, len(lesson.steps) + 1)
+            if step is not None:
+                lesson.steps.append(step)
+        return lesson
+
+    def to_text(self) -> str:
+        return "\n".join(f"Step {s.step_id}: {s.text}" for s in self.steps)
+
+    def to_dict(self) -> dict:
+        return {"topic": self.topic, "steps": [s.text for s in self.steps]}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Lesson":
+        return cls(data.get("topic"), [Step(i + 1, text) for i, text in enumerate(data["steps"])])
+
+
+def parse_step(line: str, step_id: int) -> Step | None:
+    """
+    The Step for one line of model output, or None for lines that carry no
+    step text (blank, fences, rules, prefix-only, a leading preamble).
+    """
+    if _NOISE_RE.match(line):
+        return None
+    text, prefixed = _PREFIX_RE.subn("", line, count=1)
+    text = text.strip()
+    # Preamble such as "Here's your lesson:" before the first step
+    if step_id == 1 and not prefixed and text.endswith(":"):
+        return None
+    # Drop a dangling closing bold left by e.g. '**Step 1: Intro**'
+    if text.endswith(("**", "__")) and text.count(text[-2:]) % 2:
+        text = text[:-2].rstrip()
+    if not text:
+        return None
+    return Step(step_id, text)
+
+
+def snippet(text: str, limit: int = 200) -> str:
+    """
+    text cut to at most `limit` characters, at a word boundary when possible.
+    """
+    if len(text) <= limit:
+        return text
+    cut = text[:limit]
+    space = cut.rfind(" ")
+    return (cut[:space] if space > limit // 2 else cut).rstrip()
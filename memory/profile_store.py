@@ -0,0 +1,197 @@
+"""
+SQLite-backed store for student profiles.
+
+Replaces one reports/{student_id}_profile.json file per student with a
+single indexed database in WAL mode, so many sessions can read and update
+profiles concurrently. Profile updates run inside a write transaction,
+so two sessions for the same student never lose each other's changes.
+
+Migrate existing JSON profiles with:
+    python -m memory.profile_store migrate reports --db reports/profiles.sqlite3
+"""
+
+import argparse
+import glob
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from memory.user_profile import UserProfile
+
+PROFILE_SUFFIX = "_profile.json"
+
+
+class ProfileStore:
+    def __init__(self, path: str = "reports/profiles.sqlite3", cache_size: int = 1024):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.cache_size = cache_size
+        self._cache = {}  # student_id -> profile dict (read cache)
+        self._lock = threading.Lock()
+
+        # isolation_level=None: we issue BEGIN/COMMIT ourselves
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("PRAGMA busy_timeout=5000")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS profiles ("
+            " student_id TEXT PRIMARY KEY,"
+            " data TEXT NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+
+    # ---------- reads ----------
+
+    def get(self, student_id: str) -> UserProfile | None:
+        with self._lock:
+            data = self._cache.get(student_id)
+            if data is None:
+                row = self._db.execute(
+                    "SELECT data FROM profiles WHERE student_id = ?", (student_id,)
+                ).fetchone()
+                if row is None:
+                    return None
+                data = json.loads(row[0])
+                self._remember(student_id, data)
+        return UserProfile.from_dict(data)
+
+    def load_many(self, student_ids) -> dict:
+        """
+        Fetch several profiles with one query per 500 ids.
+        Returns {student_id: UserProfile} for the ids that exist.
+        """
+        student_ids = list(student_ids)
+        found = {}
+        with self._lock:
+            missing = []
+            for student_id in student_ids:
+                data = self._cache.get(student_id)
+                if data is None:
+                    missing.append(student_id)
+                else:
+                    found[student_id] = data
+
+            for start in range(0, len(missing), 500):
+                batch = missing[start : start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._db.execute(
+                    f"SELECT student_id, data FROM profiles WHERE student_id IN ({placeholders})",
+                    batch,
+                ).fetchall()
+                for student_id, raw in rows:
+                    data = json.loads(raw)
+                    self._remember(student_id, data)
+                    found[student_id] = data
+
+        return {sid: UserProfile.from_dict(data) for sid, data in found.items()}
+
+    def student_ids(self) -> list[str]:
+        with self._lock:
+            return [row[0] for row in self._db.execute("SELECT student_id FROM profiles ORDER BY student_id")]
+
+    # ---------- writes ----------
+
+    def save(self, profile: UserProfile) -> None:
+        self.save_many([profile])
+
+    def save_many(self, profiles) -> None:
+        """
+        Write many profiles in a single transaction.
+        """
+        now = time.time()
+        rows = [(p.student_id, json.dumps(p.to_dict()), now) for p in profiles]
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO profiles (student_id, data, updated_at) VALUES (?, ?, ?)",
+                    rows,
+                )
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+            for student_id, raw, _ in rows:
+                self._remember(student_id, json.loads(raw))
+
+    def update(self, student_id: str, fn) -> UserProfile:
+        """
+        Atomically apply fn(profile) to the stored profile (read-modify-write
+        inside one IMMEDIATE transaction) and return the updated profile.
+        """
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute(
+                    "SELECT data FROM profiles WHERE student_id = ?", (student_id,)
+                ).fetchone()
+                if row is None:
+                    raise KeyError(f"No profile stored for '{student_id}'")
+                profile = UserProfile.from_dict(json.loads(row[0]))
+                fn(profile)
+                data = profile.to_dict()
+                self._db.execute(
+                    "UPDATE profiles SET data = ?, updated_at = ? WHERE student_id = ?",
+                    (json.dumps(data), time.time(), student_id),
+                )
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+            self._remember(student_id, data)
+        return profile
+
+    def update_preferences(self, student_id: str, feedback: dict) -> UserProfile:
+        """
+        Atomically apply UserProfile.update_preferences to the stored profile.
+        """
+        return self.update(student_id, lambda profile: profile.update_preferences(feedback))
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    # ---------- internal helpers ----------
+
+    def _remember(self, student_id, data):
+        if len(self._cache) >= self.cache_size and student_id not in self._cache:
+            # Drop the oldest entry (dicts keep insertion order)
+            self._cache.pop(next(iter(self._cache)))
+        self._cache[student_id] = data
+
+
+def migrate_json_profiles(reports_dir: str, store: ProfileStore) -> int:
+    """
+    Import every {student_id}_profile.json under reports_dir.
+    Returns the number of profiles written.
+    """
+    profiles = []
+    for path in sorted(glob.glob(os.path.join(reports_dir, "*" + PROFILE_SUFFIX))):
+        with open(path, "r") as f:
+            profiles.append(UserProfile.from_dict(json.load(f)))
+    store.save_many(profiles)
+    return len(profiles)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Student profile store tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    migrate = sub.add_parser("migrate", help="Import *_profile.json files into the store")
+    migrate.add_argument("reports_dir", type=str, nargs="?", default="reports")
+    migrate.add_argument("--db", type=str, default="reports/profiles.sqlite3")
+    args = parser.parse_args()
+
+    store = ProfileStore(args.db)
+    count = migrate_json_profiles(args.reports_dir, store)
+    store.close()
+    print(f"Migrated {count} profile(s) into {args.db}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Checkpoint of an in-progress tutoring session.
+
+TutorAgent writes one after every completed step: the lesson lines,
+the steps logged so far, the break/streak counters and the profile as
+adapted mid-session. Writes are atomic (temp file + fsync + rename), so
+a crash leaves either the previous checkpoint or the new one, never a
+torn file. `main.py --resume` reads it back and continues from the next
+step without asking the model for the lesson again.
+"""
+
+import json
+import os
+import time
+
+CHECKPOINT_VERSION = 2
+CHECKPOINT_DIR = "reports/checkpoints"
+
+
+class SessionCheckpoint:
+    def __init__(self, path: str):
+        self.path = path
+
+    @classmethod
+    def for_student(cls, student_id: str, directory: str = CHECKPOINT_DIR) -> "SessionCheckpoint":
+        return cls(os.path.join(directory, f"{student_id}.json"))
+
+    def save(self, state: dict) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        state = dict(state, version=CHECKPOINT_VERSION, saved_at=time.time())
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+    def load(self) -> dict | None:
+        """
+        The last saved state, or None if there is none (or it is from an
+        incompatible version).
+        """
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if state.get("version") != CHECKPOINT_VERSION:
+            return None
+        return state
+
+    def clear(self) -> None:
+        """
+        Remove the checkpoint once the session has finished.
+        """
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
@@ -1,20 +1,207 @@
+import hashlib
+import json
+import os
+import sys
+
+
+def content_hash(text: str) -> str:
+    """
+    Short, stable id for a piece of step text.
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+class Interaction:
+    """
+    One logged step. Step text is stored once per session in
+    SessionMemory.texts and referenced here by its content hash. topic is
+    only set for restored steps whose topic may differ from the session's.
+    """
+
+    __slots__ = ("step_id", "content_hash", "feedback", "raw_feedback", "hint_used", "topic")
+
+    def __init__(self, step_id, content_hash, feedback, raw_feedback, hint_used, topic=None):
+        self.step_id = step_id
+        self.content_hash = content_hash
+        self.feedback = feedback
+        self.raw_feedback = raw_feedback
+        self.hint_used = hint_used
+        self.topic = topic
+
+
 class SessionMemory:
-    def __init__(self):
-        self.logs = []
+    def __init__(
+        self,
+        log_path: str | None = None,
+        fsync_every: int = 5,
+        append: bool = True,
+        topic: str | None = None,
+    ):
+        """
+        topic: lesson topic, recorded with each step for cohort analytics
+        log_path: optional JSONL file; every interaction is appended as it
+        happens so a crash does not lose the session
+        fsync_every: force the log to disk after this many interactions
+        append: keep existing log contents (the default); False starts the
+        file afresh
+        """
+        self.logs = []    # Interaction records
+        self.texts = {}   # content hash -> step text
+        self.topic = topic
+        self._topic_logged = False
+        self._logged_texts = set()  # hashes whose text this writer has logged
+        self.log_path = log_path
+        self.fsync_every = fsync_every
+        self._unsynced = 0
+        self._log = None
 
-    def log_interaction(self, step_id, content, feedback, raw_feedback, hint_used):
+        if log_path:
+            directory = os.path.dirname(log_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._log = open(log_path, "a" if append else "w", encoding="utf-8", buffering=1)
+            # Terminate a line torn by a crash so our first entry starts clean
+            if append and self._log.tell() > 0:
+                with open(log_path, "rb") as f:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        self._log.write("\n")
+
+    def log_interaction(self, step_id, content, feedback, raw_feedback, hint_used, digest=None):
         """
         feedback: "correct" / "incorrect"
         raw_feedback: what the user actually typed (or "<enter>" if empty)
         hint_used: bool – whether a hint was shown for this step
+        digest: the step's precomputed content hash (memory.lesson.Step), if known
         """
-        self.logs.append({
-            "step_id": step_id,
-            "content": content,
-            "feedback": feedback,
-            "raw_feedback": raw_feedback,
-            "hint_used": hint_used,
-        })
+        digest = digest or content_hash(content)
+        self.texts.setdefault(digest, content)
+
+        record = Interaction(
+            step_id=step_id,
+            content_hash=digest,
+            feedback=sys.intern(feedback),
+            raw_feedback=sys.intern(raw_feedback),
+            hint_used=bool(hint_used),
+        )
+        self.logs.append(record)
+
+        if self._log is not None:
+            if self.topic and not self._topic_logged:
+                self._write({"type": "topic", "topic": self.topic})
+                self._topic_logged = True
+            if digest not in self._logged_texts:
+                self._write({"type": "text", "hash": digest, "text": content})
+                self._logged_texts.add(digest)
+            self._write({
+                "type": "step",
+                "step_id": step_id,
+                "hash": digest,
+                "feedback": feedback,
+                "raw_feedback": raw_feedback,
+                "hint_used": record.hint_used,
+            })
+            self._unsynced += 1
+            if self._unsynced >= self.fsync_every:
+                self.sync()
+
+    def restore(self, entries) -> None:
+        """
+        Re-add step dicts (as from get_summary() or iter_log()) to memory
+        without writing them to the log, e.g. steps a checkpoint restores
+        that the log already holds.
+        """
+        for entry in entries:
+            digest = content_hash(entry["content"])
+            self.texts.setdefault(digest, entry["content"])
+            self.logs.append(
+                Interaction(
+                    step_id=entry["step_id"],
+                    content_hash=digest,
+                    feedback=sys.intern(entry["feedback"]),
+                    raw_feedback=sys.intern(entry["raw_feedback"]),
+                    hint_used=bool(entry["hint_used"]),
+                    topic=entry.get("topic"),
+                )
+            )
+
+    def iter_summary(self):
+        """
+        Yield the session log one step dict at a time.
+        """
+        for record in self.logs:
+            entry = {
+                "step_id": record.step_id,
+                "content": self.texts[record.content_hash],
+                "feedback": record.feedback,
+                "raw_feedback": record.raw_feedback,
+                "hint_used": record.hint_used,
+            }
+            topic = record.topic or self.topic
+            if topic:
+                entry["topic"] = topic
+            yield entry
 
     def get_summary(self):
-        return self.logs
+        return list(self.iter_summary())
+
+    # ---------- persistence ----------
+
+    def _write(self, entry):
+        self._log.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+    def sync(self):
+        if self._log is not None:
+            self._log.flush()
+            os.fsync(self._log.fileno())
+            self._unsynced = 0
+
+    def close(self):
+        if self._log is not None:
+            self.sync()
+            self._log.close()
+            self._log = None
+
+    @staticmethod
+    def iter_log(path: str):
+        """
+        Stream step dicts straight from a JSONL session log without
+        building a SessionMemory. Lines torn by a crash mid-write are
+        skipped; sessions appended after one are still read.
+        """
+        texts = {}
+        topic = None
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if entry["type"] == "topic":
+                    topic = entry["topic"]
+                elif entry["type"] == "text":
+                    texts[entry["hash"]] = entry["text"]
+                elif entry["type"] == "step":
+                    step = {
+                        "step_id": entry["step_id"],
+                        "content": texts[entry["hash"]],
+                        "feedback": entry["feedback"],
+                        "raw_feedback": entry["raw_feedback"],
+                        "hint_used": entry["hint_used"],
+                    }
+                    if topic:
+                        step["topic"] = topic
+                    yield step
+
+    @classmethod
+    def load(cls, path: str, fsync_every: int = 5) -> "SessionMemory":
+        """
+        Rebuild a SessionMemory from its log and keep appending to it. The
+        existing entries are read, never rewritten; each keeps its own
+        topic, and new steps are logged under the last one's.
+        """
+        entries = list(cls.iter_log(path))
+        topic = entries[-1].get("topic") if entries else None
+        memory = cls(log_path=path, fsync_every=fsync_every, topic=topic)
+        memory.restore(entries)
+        return memory
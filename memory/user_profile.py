@@ -1,10 +1,12 @@
 class UserProfile:
-    def __init__(self, student_id, name, preferences, learning_challenges=None, notes=""):
+    def __init__(self, student_id, name, preferences, learning_challenges=None, notes="", preference_stats=None):
         self.student_id = student_id
         self.name = name
         self.preferences = preferences
         self.learning_challenges = learning_challenges or []
         self.notes = notes
+        # modality -> [weight, reward], maintained by tools.preference_learner
+        self.preference_stats = preference_stats or {}
 
     def update_preferences(self, feedback):
         for mode, delta in feedback.items():
@@ -19,8 +21,20 @@ class UserProfile:
             "name": self.name,
             "preferences": self.preferences,
             "learning_challenges": self.learning_challenges,
-            "notes": self.notes
+            "notes": self.notes,
+            "preference_stats": self.preference_stats,
         }
 
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            student_id=data["student_id"],
+            name=data["name"],
+            preferences=dict(data["preferences"]),
+            learning_challenges=list(data.get("learning_challenges") or []),
+            notes=data.get("notes", ""),
+            preference_stats={m: list(v) for m, v in (data.get("preference_stats") or {}).items()},
+        )
+
     def __str__(self):
         return f"UserProfile({self.student_id}, Preferences={self.preferences})"
@@ -0,0 +1,118 @@
+import argparse
+import itertools
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from agents.content_agent import ContentAgent
+from memory.content_cache import ContentCache, make_key
+from memory.user_profile import UserProfile
+from tools.rate_limiter import TokenBucket
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def load_curriculum(path):
+    """
+    Curriculum file format (JSON):
+
+    {
+      "topics": ["Introduction to Fractions", "Why do seasons change?"],
+      "profiles": [
+        {"learning_challenges": ["dyslexia"],
+         "preferences": {"visual": 0.6, "audio": 0.3, "text": 0.1}},
+        {"learning_challenges": [],
+         "preferences": {"visual": 0.3, "audio": 0.3, "text": 0.4}}
+      ]
+    }
+    """
+    with open(path, "r") as f:
+        data = json.load(f)
+
+    profiles = [
+        UserProfile(
+            student_id=f"bucket_{n:03d}",
+            name=f"Bucket {n}",
+            preferences=dict(bucket["preferences"]),
+            learning_challenges=list(bucket.get("learning_challenges", [])),
+        )
+        for n, bucket in enumerate(data["profiles"])
+    ]
+    return data["topics"], profiles
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Pre-generate lessons for every topic × learner-profile bucket"
+    )
+    parser.add_argument("curriculum", type=str, help="Path to curriculum JSON")
+    parser.add_argument(
+        "--cache-db",
+        type=str,
+        default="reports/content_cache.sqlite3",
+        help="Lesson store shared with live sessions (main.py --cache-db)",
+    )
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent model requests")
+    parser.add_argument("--rate", type=float, default=1.0, help="Max model requests per second")
+    parser.add_argument("--retries", type=int, default=3, help="Model retries per lesson")
+    args = parser.parse_args()
+
+    topics, profiles = load_curriculum(args.curriculum)
+
+    # Pre-generated lessons are pinned (no TTL), which also exempts them from
+    # the size limit of every process sharing the store
+    cache = ContentCache(args.cache_db, ttl=None)
+    content_agent = ContentAgent(cache=cache)
+    # ContentAgent already rate-limits and retries each request; swap in this
+    # run's settings rather than stacking a second limiter and retry loop
+    content_agent.limiter = TokenBucket(rate=args.rate)
+    content_agent.max_retries = args.retries
+
+    # The store doubles as the checkpoint: anything already in it is skipped,
+    # so re-running after a crash resumes where the last run stopped.
+    pending = []
+    for topic, profile in itertools.product(topics, profiles):
+        key = make_key("lesson", content_agent.model_name, topic, profile)
+        if not cache.contains(key):
+            pending.append((topic, profile, key))
+
+    total = len(topics) * len(profiles)
+    skipped = total - len(pending)
+    print(f"{total} lessons in curriculum, {skipped} already stored, {len(pending)} to generate")
+
+    def generate(topic, profile, key):
+        started = time.monotonic()
+        content_agent.generate_lesson(topic, profile)
+        # generate_lesson falls back to a static lesson instead of raising;
+        # that is never cached, so report it as a failure to re-run later
+        if not cache.contains(key):
+            raise RuntimeError("model returned no usable lesson")
+        return time.monotonic() - started
+
+    done = 0
+    failed = []
+
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        futures = {
+            pool.submit(generate, topic, profile, key): (topic, profile)
+            for topic, profile, key in pending
+        }
+        for future in as_completed(futures):
+            topic, profile = futures[future]
+            done += 1
+            label = f"[{done}/{len(pending)}] {topic} × {profile.student_id}"
+            try:
+                elapsed = future.result()
+                print(f"{label}: ok ({elapsed:.1f}s)")
+            except Exception as e:
+                failed.append((topic, profile.student_id))
+                print(f"{label}: FAILED ({e})")
+
+    cache.close()
+    print(f"\nDone: {len(pending) - len(failed)} generated, {skipped} skipped, {len(failed)} failed")
+    if failed:
+        print("Re-run the same command to retry the failed lessons.")
+
+
+if __name__ == "__main__":
+    main()
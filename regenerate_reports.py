@@ -0,0 +1,165 @@
+"""
+Re-render InsightAgent reports from saved sessions.
+
+Reads every reports/<student>_report.json with its matching
+<student>_profile.json, renders the report in each requested format and
+writes it to reports/rendered/<student>.<ext>. Rendering is spread over
+a process pool.
+
+A manifest records a content hash of each student's inputs (session,
+profile, formats and the InsightAgent source), so unchanged students
+are skipped on the next run while a change to report wording re-renders
+everything.
+
+Usage:
+    python regenerate_reports.py --formats text,html --workers 8
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import agents.insight_agent
+import memory.lesson
+from agents.insight_agent import InsightAgent
+from memory.user_profile import UserProfile
+
+FORMATS = {"text": "txt", "json": "json", "html": "html"}
+REPORT_SUFFIX = "_report.json"
+
+
+def _read_bytes(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _renderer_hash() -> str:
+    """
+    Hash of the code that shapes a report: InsightAgent and the lesson
+    helpers it renders with (snippet).
+    """
+    digest = hashlib.sha256()
+    for module in (agents.insight_agent, memory.lesson):
+        digest.update(_read_bytes(module.__file__))
+    return digest.hexdigest()
+
+
+def find_sessions(reports_dir: str):
+    """
+    Yield (student_id, report_path, profile_path or None).
+    """
+    for report_path in sorted(glob.glob(os.path.join(reports_dir, f"*{REPORT_SUFFIX}"))):
+        student_id = os.path.basename(report_path)[: -len(REPORT_SUFFIX)]
+        profile_path = os.path.join(reports_dir, f"{student_id}_profile.json")
+        yield student_id, report_path, profile_path if os.path.exists(profile_path) else None
+
+
+def input_hash(report_path: str, profile_path: str | None, formats, renderer: str) -> str:
+    digest = hashlib.sha256(renderer.encode("utf-8"))
+    digest.update(",".join(formats).encode("utf-8"))
+    digest.update(_read_bytes(report_path))
+    if profile_path:
+        digest.update(_read_bytes(profile_path))
+    return digest.hexdigest()
+
+
+def render_batch(batch, formats, out_dir) -> int:
+    """
+    Worker: render a list of (student_id, report_path, profile_path).
+    """
+    agent = InsightAgent()
+    for student_id, report_path, profile_path in batch:
+        with open(report_path, "r") as f:
+            session_summary = json.load(f)
+        if profile_path:
+            with open(profile_path, "r") as f:
+                profile = UserProfile.from_dict(json.load(f))
+        else:
+            profile = UserProfile(student_id=student_id, name=student_id, preferences={})
+
+        report = agent.build_report(profile, session_summary)
+        for fmt in formats:
+            path = os.path.join(out_dir, f"{student_id}.{FORMATS[fmt]}")
+            tmp = f"{path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(agent.render(report, fmt))
+            os.replace(tmp, path)
+    return len(batch)
+
+
+def load_manifest(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def save_manifest(path: str, manifest: dict) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=0, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Regenerate session reports from saved JSON")
+    parser.add_argument("--reports-dir", type=str, default="reports")
+    parser.add_argument("--out", type=str, default="reports/rendered", help="Output directory")
+    parser.add_argument(
+        "--formats",
+        type=str,
+        default="text",
+        help=f"Comma-separated output formats ({', '.join(FORMATS)})",
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--batch-size", type=int, default=200, help="Reports per worker task")
+    parser.add_argument("--force", action="store_true", help="Re-render even if inputs are unchanged")
+    args = parser.parse_args()
+
+    formats = [f.strip() for f in args.formats.split(",") if f.strip()]
+    unknown = [f for f in formats if f not in FORMATS]
+    if unknown:
+        parser.error(f"Unknown format(s): {', '.join(unknown)}")
+
+    os.makedirs(args.out, exist_ok=True)
+    manifest_path = os.path.join(args.out, "manifest.json")
+    manifest = {} if args.force else load_manifest(manifest_path)
+    renderer = _renderer_hash()
+
+    started = time.perf_counter()
+    todo, hashes, total = [], {}, 0
+    for student_id, report_path, profile_path in find_sessions(args.reports_dir):
+        total += 1
+        digest = input_hash(report_path, profile_path, formats, renderer)
+        if manifest.get(student_id) == digest:
+            continue
+        todo.append((student_id, report_path, profile_path))
+        hashes[student_id] = digest
+
+    batches = [todo[i : i + args.batch_size] for i in range(0, len(todo), args.batch_size)]
+    done = 0
+    if len(batches) > 1 and args.workers > 1:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            for count in pool.map(render_batch, batches, [formats] * len(batches), [args.out] * len(batches)):
+                done += count
+    else:
+        for batch in batches:
+            done += render_batch(batch, formats, args.out)
+
+    for student_id, _, _ in todo:
+        manifest[student_id] = hashes[student_id]
+    save_manifest(manifest_path, manifest)
+
+    elapsed = time.perf_counter() - started
+    print(
+        f"Rendered {done} of {total} sessions ({total - done} unchanged) "
+        f"as {', '.join(formats)} into {args.out} in {elapsed:.2f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
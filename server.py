@@ -0,0 +1,504 @@
+"""
+Long-running multi-tenant server for Kindred sessions.
+
+Instead of one `python main.py` process per learner, a pool of worker
+processes is started once. Each worker builds its ContentAgent (model
+client, caches) at startup and runs many sessions concurrently on an
+AsyncSessionEngine. Sessions are routed to workers by student ID, so a
+student's profile is always loaded, updated and cached by the same
+worker.
+
+HTTP API (JSON in, JSON out):
+    POST /sessions                       {"student_id", "name"?, "topic"?}
+    POST /sessions/<session_id>/answer   {"answer": "..."}
+    GET  /students/<student_id>/report
+    GET  /health
+    GET  /metrics                        (Prometheus text, summed over workers)
+
+Start and answer both return what the tutor said since the last call
+("messages"), the question it is now waiting on ("prompt"), and
+"done": true with the "summary" once the session has finished. A session
+left waiting on an answer for --session-idle-timeout seconds is dropped.
+
+Usage:
+    python server.py --workers 4 --port 8080 --backend local
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import uuid
+import zlib
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from agents.content_agent import ContentAgent
+from agents.insight_agent import InsightAgent
+from agents.model_backends import BACKENDS, make_backend
+from agents.session_engine import AsyncSessionEngine, QueueChannel
+from memory.content_cache import ContentCache
+from memory.profile_store import ProfileStore
+from memory.session_memory import SessionMemory
+from memory.user_profile import UserProfile
+from tools import metrics
+from tools.asset_store import AssetPipeline, AssetStore
+
+REPORTS_DIR = "reports"
+
+
+# ---------- worker process ----------
+
+class _LiveSession:
+    def __init__(self, profile):
+        self.profile = profile
+        self.channel = QueueChannel()
+        self.lock = asyncio.Lock()
+        self.summary = None
+        self.task = None
+        self.last_active = time.monotonic()
+
+
+class SessionWorker:
+    """
+    Lives in one worker process: owns the ContentAgent, the engine, the
+    live sessions and the profiles of the students routed here.
+    """
+
+    def __init__(self, index: int, options: dict):
+        self.index = index
+        self.options = options
+        self.sessions = {}
+        self.profiles = {}
+        self.reports = {}
+        self.insight_agent = InsightAgent()
+
+    def run(self, requests, results) -> None:
+        asyncio.run(self._main(requests, results))
+
+    async def _main(self, requests, results) -> None:
+        options = self.options
+        try:
+            self.cache = None if options["no_cache"] else ContentCache(options["cache_db"])
+            self.profile_store = ProfileStore(options["profile_db"]) if options["profile_db"] else None
+            backend = make_backend(options["backend"])
+            # Import and configure the model client now: done lazily, it would
+            # block this worker's event loop (and every session on it) mid-request
+            backend.warm()
+            self.content_agent = ContentAgent(cache=self.cache, backend=backend)
+            self.asset_pipeline = AssetPipeline(
+                AssetStore(options["asset_store"], max_bytes=options["asset_store_mb"] * 1024 * 1024)
+            )
+            self.engine = AsyncSessionEngine(
+                self.content_agent, options["max_model_concurrency"], asset_pipeline=self.asset_pipeline
+            )
+        except Exception as e:
+            # Tell the parent instead of leaving it waiting for "ready"
+            results.put((None, {"failed": self.index, "error": f"{type(e).__name__}: {e}"}))
+            return
+        reaper = asyncio.create_task(self._reap_idle_sessions()) if options["session_idle_timeout"] else None
+        results.put((None, {"ready": self.index}))
+
+        loop = asyncio.get_running_loop()
+        while True:
+            message = await loop.run_in_executor(None, requests.get)
+            if message is None:
+                break
+            request_id, op, payload = message
+            asyncio.create_task(self._dispatch(request_id, op, payload, results))
+
+        if reaper is not None:
+            reaper.cancel()
+        self.asset_pipeline.close()
+        if self.cache is not None:
+            self.cache.close()
+        if self.profile_store is not None:
+            self.profile_store.close()
+
+    async def _dispatch(self, request_id, op, payload, results) -> None:
+        try:
+            if op == "start":
+                reply = await self.start(**payload)
+            elif op == "answer":
+                reply = await self.answer(**payload)
+            elif op == "report":
+                reply = await self.report(**payload)
+            elif op == "metrics":
+                reply = {"families": metrics.REGISTRY.collect()}
+            else:
+                reply = {"error": f"Unknown operation '{op}'", "status": 400}
+        except Exception as e:
+            reply = {"error": str(e), "status": 500}
+        results.put((request_id, reply))
+
+    # ---------- profiles ----------
+
+    def _load_profile(self, student_id: str, name: str | None) -> UserProfile:
+        profile = self.profiles.get(student_id)
+        if profile is None and self.profile_store is not None:
+            profile = self.profile_store.get(student_id)
+        path = os.path.join(REPORTS_DIR, f"{student_id}_profile.json")
+        if profile is None and os.path.exists(path):
+            with open(path, "r") as f:
+                profile = UserProfile.from_dict(json.load(f))
+        if profile is None:
+            profile = UserProfile(
+                student_id=student_id,
+                name=name or student_id,
+                preferences={"visual": 0.6, "audio": 0.3, "text": 0.1},
+                learning_challenges=["dyslexia"],
+                notes="Prefers short explanations and visual aids",
+            )
+        self.profiles[student_id] = profile
+        return profile
+
+    def _finish(self, profile: UserProfile, summary: list) -> UserProfile:
+        """
+        Save the report and the profile, whose preferences the engine has
+        already adapted step by step. Sticky routing makes this worker the
+        only writer for the student.
+        """
+        if self.profile_store is not None:
+            self.profile_store.save(profile)
+        self.profiles[profile.student_id] = profile
+
+        os.makedirs(REPORTS_DIR, exist_ok=True)
+        with open(os.path.join(REPORTS_DIR, f"{profile.student_id}_report.json"), "w") as f:
+            json.dump(summary, f, indent=2)
+        with open(os.path.join(REPORTS_DIR, f"{profile.student_id}_profile.json"), "w") as f:
+            json.dump(profile.to_dict(), f, indent=2)
+        return profile
+
+    # ---------- idle sessions ----------
+
+    def reap_idle(self, now: float | None = None) -> int:
+        """
+        Cancel and drop sessions that have waited on the learner for longer
+        than the idle timeout. Returns how many were dropped.
+        """
+        now = time.monotonic() if now is None else now
+        timeout = self.options["session_idle_timeout"]
+        idle = [
+            session_id
+            for session_id, live in self.sessions.items()
+            if not live.lock.locked() and now - live.last_active > timeout
+        ]
+        for session_id in idle:
+            live = self.sessions.pop(session_id)
+            if live.task is not None:
+                live.task.cancel()
+        return len(idle)
+
+    async def _reap_idle_sessions(self) -> None:
+        interval = min(60.0, self.options["session_idle_timeout"] / 4)
+        while True:
+            await asyncio.sleep(interval)
+            self.reap_idle()
+
+    # ---------- operations ----------
+
+    async def _run(self, live: _LiveSession, topic: str) -> None:
+        try:
+            live.summary = await self.engine.run_session(live.profile, topic, live.channel, SessionMemory())
+            live.profile = await asyncio.to_thread(self._finish, live.profile, live.summary)
+            self.reports[live.profile.student_id] = live.summary
+        except Exception as e:
+            await live.channel.say(f"Session ended early: {e}")
+        finally:
+            await live.channel.close()
+
+    async def _advance(self, session_id: str, live: _LiveSession) -> dict:
+        """
+        Collect tutor output until it asks a question or the session ends.
+        """
+        messages = []
+        while True:
+            kind, text = await live.channel.outbox.get()
+            if kind == "say":
+                messages.append(text)
+            elif kind == "ask":
+                # The idle clock runs from when the tutor starts waiting
+                live.last_active = time.monotonic()
+                return {"session_id": session_id, "messages": messages, "prompt": text, "done": False}
+            else:
+                self.sessions.pop(session_id, None)
+                return {
+                    "session_id": session_id,
+                    "messages": messages,
+                    "prompt": None,
+                    "done": True,
+                    "summary": live.summary,
+                }
+
+    async def start(self, student_id: str, name: str | None = None, topic: str | None = None) -> dict:
+        profile = self._load_profile(student_id, name)
+        session_id = f"{self.index}-{uuid.uuid4().hex[:12]}"
+        live = self.sessions[session_id] = _LiveSession(profile)
+        async with live.lock:
+            live.task = asyncio.create_task(self._run(live, topic or "Introduction to Fractions"))
+            return await self._advance(session_id, live)
+
+    async def answer(self, session_id: str, answer: str = "") -> dict:
+        live = self.sessions.get(session_id)
+        if live is None:
+            return {"error": f"No active session '{session_id}'", "status": 404}
+        async with live.lock:
+            await live.channel.inbox.put(answer)
+            return await self._advance(session_id, live)
+
+    async def report(self, student_id: str) -> dict:
+        summary = self.reports.get(student_id)
+        path = os.path.join(REPORTS_DIR, f"{student_id}_report.json")
+        if summary is None and os.path.exists(path):
+            with open(path, "r") as f:
+                summary = json.load(f)
+        if summary is None:
+            return {"error": f"No report for student '{student_id}'", "status": 404}
+        profile = self._load_profile(student_id, None)
+        return {
+            "student_id": student_id,
+            "summary": summary,
+            "report": self.insight_agent.generate_report(profile, summary),
+        }
+
+
+def _worker_main(index, options, requests, results) -> None:
+    SessionWorker(index, options).run(requests, results)
+
+
+# ---------- pool ----------
+
+class WorkerPool:
+    """
+    Starts the worker processes and forwards requests to them. Replies come
+    back on one shared queue and are matched to callers by request ID.
+    """
+
+    def __init__(self, workers: int, options: dict, startup_timeout: float = 120.0):
+        self.results = multiprocessing.Queue()
+        self.queues = [multiprocessing.Queue() for _ in range(workers)]
+        self.processes = [
+            multiprocessing.Process(
+                target=_worker_main, args=(n, options, self.queues[n], self.results), daemon=True
+            )
+            for n in range(workers)
+        ]
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+
+        for process in self.processes:
+            process.start()
+        try:
+            self._await_ready(startup_timeout)
+        except RuntimeError:
+            for process in self.processes:
+                process.terminate()
+            raise
+
+        self._dispatcher = threading.Thread(target=self._dispatch, daemon=True)
+        self._dispatcher.start()
+
+    def _await_ready(self, timeout: float) -> None:
+        """
+        Wait until every worker has its model client ready. Raises
+        RuntimeError with the worker's error if one fails or dies during
+        startup, or if they are not all ready within `timeout` seconds.
+        """
+        deadline = time.monotonic() + timeout
+        waiting = set(range(len(self.processes)))
+        while waiting:
+            try:
+                _, reply = self.results.get(timeout=min(1.0, max(0.0, deadline - time.monotonic())))
+            except queue.Empty:
+                dead = [n for n in waiting if not self.processes[n].is_alive()]
+                if dead:
+                    raise RuntimeError(f"Worker {dead[0]} exited during startup") from None
+                if time.monotonic() >= deadline:
+                    raise RuntimeError(f"Workers {sorted(waiting)} not ready after {timeout:.0f}s") from None
+                continue
+            if "failed" in reply:
+                raise RuntimeError(f"Worker {reply['failed']} failed to start: {reply['error']}")
+            waiting.discard(reply["ready"])
+
+    def _dispatch(self) -> None:
+        while True:
+            request_id, reply = self.results.get()
+            if request_id is None:
+                if reply is None:
+                    return
+                continue
+            with self._lock:
+                future = self._pending.pop(request_id, None)
+            if future is not None:
+                future.set_result(reply)
+
+    def worker_for(self, student_id: str) -> int:
+        """
+        Sticky routing: a student always lands on the same worker.
+        """
+        return zlib.crc32(student_id.encode("utf-8")) % len(self.processes)
+
+    def call(self, worker: int, op: str, payload: dict, timeout: float = 300.0) -> dict:
+        future = Future()
+        with self._lock:
+            request_id = next(self._ids)
+            self._pending[request_id] = future
+        self.queues[worker].put((request_id, op, payload))
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            # A late reply finds no pending future and is dropped
+            with self._lock:
+                self._pending.pop(request_id, None)
+            return {"error": f"Worker {worker} did not reply within {timeout:.0f}s", "status": 504}
+
+    def close(self) -> None:
+        for requests in self.queues:
+            requests.put(None)
+        for process in self.processes:
+            process.join(timeout=5)
+        self.results.put((None, None))
+        self._dispatcher.join(timeout=5)
+
+
+# ---------- HTTP front end ----------
+
+def make_handler(pool: WorkerPool):
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, body: dict) -> None:
+            status = body.pop("status", 200 if "error" not in body else 400)
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _reply_text(self, text: str, content_type: str) -> None:
+            data = text.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _body(self) -> dict:
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(body, dict):
+                raise ValueError("Request body must be a JSON object")
+            return body
+
+        def do_POST(self):
+            parts = self.path.strip("/").split("/")
+            try:
+                body = self._body()
+            except ValueError as e:
+                return self._reply({"error": f"Bad request: {e}"})
+
+            if parts == ["sessions"]:
+                student_id = body.get("student_id")
+                if not student_id:
+                    return self._reply({"error": "student_id is required"})
+                payload = {"student_id": student_id, "name": body.get("name"), "topic": body.get("topic")}
+                return self._reply(pool.call(pool.worker_for(student_id), "start", payload))
+
+            if len(parts) == 3 and parts[0] == "sessions" and parts[2] == "answer":
+                session_id = parts[1]
+                worker, _, _ = session_id.partition("-")
+                if not worker.isdigit() or int(worker) >= len(pool.processes):
+                    return self._reply({"error": f"No active session '{session_id}'", "status": 404})
+                payload = {"session_id": session_id, "answer": str(body.get("answer", ""))}
+                return self._reply(pool.call(int(worker), "answer", payload))
+
+            self._reply({"error": "Not found", "status": 404})
+
+        def do_GET(self):
+            parts = self.path.strip("/").split("/")
+            if parts == ["health"]:
+                return self._reply({"workers": len(pool.processes)})
+            if parts == ["metrics"]:
+                replies = [pool.call(w, "metrics", {}) for w in range(len(pool.processes))]
+                failed = next((r for r in replies if "error" in r), None)
+                if failed is not None:
+                    return self._reply(failed)
+                snapshots = [r["families"] for r in replies]
+                return self._reply_text(metrics.render(metrics.merge(snapshots)), metrics.CONTENT_TYPE)
+            if len(parts) == 3 and parts[0] == "students" and parts[2] == "report":
+                student_id = parts[1]
+                return self._reply(pool.call(pool.worker_for(student_id), "report", {"student_id": student_id}))
+            self._reply({"error": "Not found", "status": 404})
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve Kindred sessions from a pool of worker processes")
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--backend", choices=BACKENDS, help="Model backend (default: KINDRED_BACKEND or gemini)")
+    parser.add_argument("--profile-db", type=str, help="SQLite profile store shared by the workers")
+    parser.add_argument("--cache-db", type=str, default="reports/content_cache.sqlite3")
+    parser.add_argument("--no-cache", action="store_true", help="Always call the model")
+    parser.add_argument(
+        "--max-model-concurrency",
+        type=int,
+        default=16,
+        help="Model requests in flight at once, per worker",
+    )
+    parser.add_argument(
+        "--asset-store",
+        type=str,
+        default="assets/cache",
+        help="Directory of rendered visual/audio step assets, shared by the workers",
+    )
+    parser.add_argument("--asset-store-mb", type=int, default=256, help="Size limit of the asset store")
+    parser.add_argument(
+        "--session-idle-timeout",
+        type=float,
+        default=1800.0,
+        help="Seconds a session may wait for an answer before it is dropped (0 = never)",
+    )
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+    options = {
+        "backend": args.backend,
+        "profile_db": args.profile_db,
+        "cache_db": args.cache_db,
+        "no_cache": args.no_cache,
+        "max_model_concurrency": args.max_model_concurrency,
+        "session_idle_timeout": args.session_idle_timeout,
+        "asset_store": args.asset_store,
+        "asset_store_mb": args.asset_store_mb,
+    }
+    try:
+        pool = WorkerPool(args.workers, options)
+    except RuntimeError as e:
+        raise SystemExit(f"Could not start the server: {e}")
+    httpd = ThreadingHTTPServer((args.host, args.port), make_handler(pool))
+    print(f"Serving Kindred on http://{args.host}:{args.port} with {args.workers} workers")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        pool.close()
+
+
+if __name__ == "__main__":
+    main()
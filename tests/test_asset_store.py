@@ -0,0 +1,35 @@
+import os
+
+from tools.asset_store import AssetPipeline, AssetStore
+
+
+def test_open_maps_are_capped(tmp_path):
+    store = AssetStore(str(tmp_path), max_open_maps=3)
+    keys = [store.key("audio", f"step {n}") for n in range(10)]
+    for n, key in enumerate(keys):
+        store.put("audio", key, "txt", f"asset {n}".encode())
+
+    views = [bytes(store.get("audio", key, "txt")) for key in keys]
+
+    assert views == [f"asset {n}".encode() for n in range(10)]
+    assert len(store._maps) == 3
+
+
+def test_asset_removed_by_another_process_is_a_miss(tmp_path):
+    store = AssetStore(str(tmp_path))
+    key = store.key("audio", "step")
+    path = store.put("audio", key, "txt", b"asset")
+    os.remove(path)
+
+    assert store.get("audio", key, "txt") is None
+    assert store.stats()["assets"] == 0 and store.total_bytes == 0
+
+
+def test_pipeline_renders_in_background(tmp_path):
+    pipeline = AssetPipeline(AssetStore(str(tmp_path)))
+    pipeline.request("visual", "Fractions", "Halves.")
+    asset = pipeline.ready("visual", "Fractions", "Halves.", wait=5.0)
+    pipeline.close()
+
+    assert asset is not None and bytes(asset)
+    assert pipeline.rendered == 1
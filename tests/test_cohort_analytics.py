@@ -0,0 +1,44 @@
+import json
+import os
+
+from tools.cohort_analytics import CohortStore
+
+
+def write_report(reports, student_id, feedback):
+    logs = [
+        {"step_id": n + 1, "content": f"Step {n + 1}", "feedback": f, "topic": "Fractions"}
+        for n, f in enumerate(feedback)
+    ]
+    with open(reports / f"{student_id}_report.json", "w") as f:
+        json.dump(logs, f)
+
+
+def test_save_compacts_retired_rows_and_loads_from_the_given_path(tmp_path):
+    reports = tmp_path / "reports"
+    reports.mkdir()
+    write_report(reports, "ana", ["correct", "incorrect"])
+    write_report(reports, "ben", ["correct"])
+    path = str(tmp_path / "cohort")  # no .npz extension
+
+    store = CohortStore()
+    assert store.ingest(str(reports)) == 2
+    store.save(path)
+
+    # Ana's report is overwritten: her old rows are retired, then dropped at save
+    write_report(reports, "ana", ["correct", "correct", "correct"])
+    os.utime(reports / "ana_report.json", ns=(1, 1))
+    store = CohortStore.load(path)
+    assert store.ingest(str(reports)) == 1
+    assert len(store.columns["session"]) == 6
+    store.save(path)
+
+    assert sorted(os.listdir(tmp_path)) == ["cohort", "cohort.meta.json", "reports"]
+    loaded = CohortStore.load(path)
+    assert len(loaded.columns["session"]) == 4
+    assert loaded.active_files.tolist() == [True, True]
+    assert loaded.group_stats("student") == {
+        "ana": {"sessions": 1, "steps": 3, "accuracy": 1.0, "hint_rate": 0.0},
+        "ben": {"sessions": 1, "steps": 1, "accuracy": 1.0, "hint_rate": 0.0},
+    }
+    # Ingesting again reads nothing: file ids survived the renumbering
+    assert loaded.ingest(str(reports)) == 0
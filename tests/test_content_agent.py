@@ -0,0 +1,81 @@
+import time
+
+import pytest
+
+from agents.content_agent import FALLBACKS, ContentAgent, LessonStream, ModelUnavailableError
+from agents.model_backends import LocalBackend
+from tools.rate_limiter import CircuitBreaker, TokenBucket
+
+
+def make_agent(backend=None):
+    agent = ContentAgent(backend=backend or LocalBackend(latency_ms=0, distribution="fixed"))
+    # Private limiter/breaker so tests do not share the process-wide quota
+    agent.limiter = TokenBucket(rate=1000.0, capacity=1000.0)
+    agent.breaker = CircuitBreaker(failure_threshold=1, cooldown=0.0)
+    agent.max_retries = 0
+    return agent
+
+
+def test_limiter_timeout_does_not_hold_half_open_trial():
+    agent = make_agent()
+    agent.breaker.record_failure()
+    assert agent.breaker.state == "half-open"
+
+    # No quota left: the call gives up waiting for a token
+    agent.limiter = TokenBucket(rate=0.5, capacity=1.0)
+    agent.limiter.try_acquire()
+    agent.call_timeout = 0.01
+    with pytest.raises(ModelUnavailableError):
+        agent._send("prompt")
+
+    # The trial slot is still free, so a healthy backend closes the breaker
+    agent.limiter = TokenBucket(rate=1000.0, capacity=1000.0)
+    agent.call_timeout = 5.0
+    agent._send("prompt")
+    assert agent.breaker.state == "closed"
+
+
+class FlakyBackend:
+    """
+    LocalBackend that fails the first `failures` requests with a 429.
+    """
+
+    def __init__(self, failures: int):
+        self.backend = LocalBackend(latency_ms=0, distribution="fixed")
+        self.name = self.backend.name
+        self.model_name = self.backend.model_name
+        self.failures = failures
+        self.calls = 0
+
+    def generate(self, prompt, stream=False, timeout=None):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise RuntimeError("429 Resource has been exhausted")
+        return self.backend.generate(prompt, stream=stream, timeout=timeout)
+
+
+def test_stream_retries_failure_before_first_chunk(monkeypatch):
+    monkeypatch.setattr("agents.content_agent.backoff_delay", lambda *a, **k: 0.0)
+    backend = FlakyBackend(failures=1)
+    agent = make_agent(backend)
+    agent.breaker = CircuitBreaker(failure_threshold=5, cooldown=30.0)
+    agent.max_retries = 2
+
+    text = "".join(agent._stream_model("prompt"))
+
+    assert backend.calls == 2
+    assert text
+
+
+def test_lesson_stream_fallback_reason_reflects_a_failed_stream():
+    def failing():
+        raise ModelUnavailableError("backend down")
+        yield  # pragma: no cover
+
+    key = ("lesson", "model_unavailable")
+    before = FALLBACKS.values().get(key, 0)
+    stream = LessonStream(failing())
+    steps = list(stream)
+
+    assert steps and isinstance(stream.error, ModelUnavailableError)
+    assert FALLBACKS.values().get(key, 0) == before + 1
@@ -0,0 +1,18 @@
+from memory.content_cache import ContentCache
+
+
+def test_size_eviction_keeps_pinned_entries(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    pregenerated = ContentCache(path, ttl=None)
+    for n in range(5):
+        pregenerated.put(f"lesson{n}", "pinned")
+    pregenerated.close()
+
+    # A live process with a small limit fills the store with TTL'd entries
+    live = ContentCache(path, max_memory_entries=1, max_disk_entries=2)
+    for n in range(4):
+        live.put(f"hint{n}", "cached")
+
+    assert all(live.contains(f"lesson{n}") for n in range(5))
+    assert [live.contains(f"hint{n}") for n in range(4)] == [False, False, True, True]
+    live.close()
@@ -0,0 +1,105 @@
+from types import SimpleNamespace
+
+import pytest
+
+from memory.hint_index import HintIndex, embed
+
+DYSLEXIA = SimpleNamespace(learning_challenges=["dyslexia"])
+NONE = SimpleNamespace(learning_challenges=[])
+
+STEP = "Multiply the numerator 3 by 4 to get an equivalent fraction of 3/12."
+
+
+def test_near_duplicate_reuses_hint_for_same_challenges():
+    index = HintIndex(capacity=16)
+    index.add(STEP, "Think of pizza slices.", DYSLEXIA)
+
+    hint, score = index.search("Now, " + STEP.lower(), DYSLEXIA)
+    assert hint == "Think of pizza slices." and score >= index.threshold
+    assert index.search(STEP, NONE) is None
+    assert index.search("Magma rises through cracks in the crust.", DYSLEXIA) is None
+
+
+# Hand-labelled step pairs the threshold and word check were calibrated on
+REWORDED = [
+    ("Add the numerators and keep the denominator the same.", "Now, add the numerators and keep the denominator the same."),
+    ("Add the numerators and keep the denominator the same.", "add the numerators, and keep the denominator the same!"),
+    ("Find a common denominator before adding the fractions.", "Before adding the fractions, find a common denominator."),
+    ("Magma rises through cracks in the Earth's crust.", "Magma rises up through cracks in the Earth's crust."),
+    ("The Earth is tilted, so sunlight hits each half differently.", "The Earth is tilted so sunlight hits each half of it differently."),
+    ("Leaves use sunlight to turn water and carbon dioxide into sugar.", "Leaves use sunlight to turn carbon dioxide and water into sugar."),
+    ("Picture a pizza cut into 8 equal slices.", "Picture a pizza that is cut into 8 equal slices."),
+    ("Plants release oxygen as a by-product.", "Plants release oxygen as a byproduct."),
+    ("In June the northern half leans toward the Sun.", "In June, the northern half leans towards the Sun."),
+    ("Chlorophyll absorbs red and blue light and reflects green.", "Chlorophyll absorbs red and blue light, and it reflects green."),
+]
+DIFFERENT = [
+    ("Add the numerators and keep the denominator the same.", "Subtract the numerators and keep the denominator the same."),
+    ("Multiply the numerator and denominator by the same number.", "Divide the numerator and denominator by the same number."),
+    ("Picture Fractions as slices of a pizza.", "Picture Volcanoes as slices of a pizza."),
+    ("In June the northern half leans toward the Sun.", "In December the southern half leans toward the Sun."),
+    ("Compare 1/2 with 1/3 by drawing both as parts of a pizza.", "Compare 2/3 with 3/4 by drawing both as parts of a pizza."),
+    ("Find a common denominator before adding the fractions.", "Find a common denominator before comparing the fractions."),
+    ("Shield volcanoes have gentle slopes because their lava is runny.", "Composite volcanoes have steep slopes because their lava is thick."),
+]
+
+
+def test_threshold_shortlists_every_rewording():
+    index = HintIndex()
+    for stored, query in REWORDED:
+        assert float(embed(stored) @ embed(query)) >= index.threshold
+
+
+@pytest.mark.parametrize("stored, query", REWORDED)
+def test_reworded_step_reuses_hint(stored, query):
+    index = HintIndex(capacity=4)
+    index.add(stored, "stored hint", DYSLEXIA, "Fractions")
+    assert index.search(query, DYSLEXIA, "fractions")[0] == "stored hint"
+
+
+@pytest.mark.parametrize("stored, query", DIFFERENT)
+def test_different_step_does_not_reuse_hint(stored, query):
+    index = HintIndex(capacity=4)
+    index.add(stored, "stored hint", DYSLEXIA, "Fractions")
+    assert index.search(query, DYSLEXIA, "Fractions") is None
+
+
+def test_hints_are_scoped_to_the_topic():
+    index = HintIndex(capacity=4)
+    index.add(STEP, "fractions hint", DYSLEXIA, "Fractions")
+    assert index.search(STEP, DYSLEXIA, "Fractions")[0] == "fractions hint"
+    assert index.search(STEP, DYSLEXIA, "Ratios") is None
+    assert index.search(STEP, DYSLEXIA) is None
+
+
+def test_overwritten_rows_leave_their_buckets():
+    index = HintIndex(capacity=2)
+    index.add(STEP, "old", DYSLEXIA)
+    index.add("Leaves use sunlight to make sugar.", "leaves", DYSLEXIA)
+    index.add("Magma rises through cracks in the crust.", "magma", DYSLEXIA)
+
+    assert index.search(STEP, DYSLEXIA) is None
+    assert all(row in (0, 1) for table in index._buckets for rows in table.values() for row in rows.view())
+
+
+def test_bucket_cap_bounds_candidates():
+    index = HintIndex(capacity=1000, bands=4, max_bucket_rows=8)
+    for n in range(200):
+        index.add(f"Multiply the numerator {n} by 4 to get an equivalent fraction.", str(n), DYSLEXIA)
+
+    assert all(rows.count <= 8 for table in index._buckets for rows in table.values())
+    assert index.search("Multiply the numerator 199 by 4 to get an equivalent fraction.", DYSLEXIA)[0] == "199"
+
+
+def test_save_load_round_trip(tmp_path):
+    path = str(tmp_path / "hints.npz")
+    index = HintIndex(capacity=3)
+    for n, step in enumerate((STEP, "Leaves use sunlight to make sugar.", "Magma rises through cracks.", STEP)):
+        index.add(step, f"hint {n}", DYSLEXIA)
+    index.save(path)
+
+    loaded = HintIndex.load(path, capacity=3)
+    assert [p.name for p in tmp_path.iterdir()] == ["hints.npz"]
+    assert loaded.size == 3 and loaded._next == index._next
+    assert loaded.search(STEP, DYSLEXIA)[0] == "hint 3"
+    assert loaded.search("Leaves use sunlight to make sugar.", DYSLEXIA)[0] == "hint 1"
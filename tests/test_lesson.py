@@ -0,0 +1,45 @@
+import pytest
+
+from memory.lesson import Lesson, parse_step
+
+
+@pytest.mark.parametrize(
+    "line",
+    [
+        "Step 1: Fractions are parts of a whole.",
+        "**Step 1:** Fractions are parts of a whole.",
+        "- Step 1 - Fractions are parts of a whole.",
+        "1. Fractions are parts of a whole.",
+        "1) Fractions are parts of a whole.",
+        "**1.** Fractions are parts of a whole.",
+        "Fractions are parts of a whole.",
+    ],
+)
+def test_parse_step_strips_prefixes(line):
+    assert parse_step(line, 1).text == "Fractions are parts of a whole."
+
+
+@pytest.mark.parametrize(
+    "line",
+    [
+        "0.5 means half of something.",
+        "3.14 is close to pi.",
+        "2) 0.5 means half of something.",
+        "Step 2: 0.5 means half of something.",
+    ],
+)
+def test_parse_step_keeps_leading_decimals(line):
+    text = parse_step(line, 2).text
+    assert text.startswith(("0.5 ", "3.14 "))
+
+
+@pytest.mark.parametrize("line", ["", "```", "---", "Step 3:", "2."])
+def test_parse_step_skips_lines_without_text(line):
+    assert parse_step(line, 2) is None
+
+
+def test_lesson_round_trips_through_canonical_text():
+    lesson = Lesson.parse("Here's your lesson:\n**Step 1:** Halves.\n\n2. 0.25 is a quarter.\n```")
+    assert [s.text for s in lesson] == ["Halves.", "0.25 is a quarter."]
+    again = Lesson.parse(lesson.to_text())
+    assert [(s.step_id, s.content_hash) for s in again] == [(s.step_id, s.content_hash) for s in lesson]
@@ -0,0 +1,29 @@
+import copy
+
+from memory.user_profile import UserProfile
+from tools.preference_learner import PreferenceLearner
+
+LOGS = [
+    [
+        {"feedback": "no", "hint_used": True},
+        {"feedback": "", "hint_used": False},
+        {"feedback": "", "hint_used": False},
+    ],
+    [{"feedback": "no", "hint_used": False}, {"feedback": "", "hint_used": True}],
+]
+
+
+def make_profile():
+    return UserProfile("s1", "Sam", {"visual": 0.6, "audio": 0.3, "text": 0.1}, ["dyslexia"])
+
+
+def test_warm_start_events_replay_to_the_same_profile():
+    learner = PreferenceLearner()
+    profile, stored = make_profile(), make_profile()
+    events = []
+
+    assert learner.warm_start(profile, LOGS, events) == 5
+    learner.replay(stored, copy.deepcopy(events))
+
+    assert stored.preferences == profile.preferences
+    assert stored.preference_stats == profile.preference_stats
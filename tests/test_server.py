@@ -0,0 +1,57 @@
+import asyncio
+import itertools
+import queue
+import threading
+
+import pytest
+
+from memory.user_profile import UserProfile
+from server import SessionWorker, WorkerPool, _LiveSession
+
+
+def test_reap_idle_cancels_and_drops_abandoned_sessions():
+    async def scenario():
+        worker = SessionWorker(0, {"session_idle_timeout": 60.0})
+        profile = UserProfile("s1", "Sam", {"visual": 0.6, "audio": 0.3, "text": 0.1})
+        for session_id in ("idle", "busy", "fresh"):
+            live = worker.sessions[session_id] = _LiveSession(profile)
+            live.task = asyncio.create_task(asyncio.sleep(3600))
+        idle, busy = worker.sessions["idle"], worker.sessions["busy"]
+        idle.last_active = busy.last_active = worker.sessions["fresh"].last_active - 120
+        await busy.lock.acquire()  # an answer is being processed
+
+        assert worker.reap_idle() == 1
+        await asyncio.sleep(0)
+        assert sorted(worker.sessions) == ["busy", "fresh"]
+        assert idle.task.cancelled() and not busy.task.done()
+        for live in worker.sessions.values():
+            live.task.cancel()
+
+    asyncio.run(scenario())
+
+
+def test_call_timeout_returns_504_and_forgets_the_request():
+    pool = WorkerPool.__new__(WorkerPool)
+    pool.queues = [queue.Queue()]
+    pool._pending = {}
+    pool._lock = threading.Lock()
+    pool._ids = itertools.count()
+
+    reply = pool.call(0, "report", {"student_id": "s1"}, timeout=0.01)
+
+    assert reply["status"] == 504 and "error" in reply
+    assert pool._pending == {}
+
+
+def test_worker_startup_failure_fails_the_pool(monkeypatch):
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    options = {
+        "backend": "gemini",
+        "profile_db": None,
+        "cache_db": None,
+        "no_cache": True,
+        "max_model_concurrency": 1,
+        "session_idle_timeout": 0,
+    }
+    with pytest.raises(RuntimeError, match="GEMINI_API_KEY"):
+        WorkerPool(1, options, startup_timeout=30)
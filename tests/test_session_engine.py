@@ -0,0 +1,38 @@
+import asyncio
+
+from agents.session_engine import AsyncSessionEngine, QueueChannel
+from memory.user_profile import UserProfile
+from tests.test_content_agent import make_agent
+from tools.asset_store import AssetPipeline, AssetStore
+
+
+async def answer_everything(channel):
+    said = []
+    while True:
+        kind, text = await channel.outbox.get()
+        if kind == "ask":
+            await channel.inbox.put("")
+        elif kind == "say":
+            said.append(text)
+        else:
+            return said
+
+
+def test_engine_shows_assets_from_the_pipeline(tmp_path):
+    pipeline = AssetPipeline(AssetStore(str(tmp_path)))
+    engine = AsyncSessionEngine(make_agent(), asset_pipeline=pipeline)
+    profile = UserProfile("s1", "Sam", {"visual": 0.8, "audio": 0.1, "text": 0.1}, [])
+
+    async def scenario():
+        channel = QueueChannel()
+        listener = asyncio.create_task(answer_everything(channel))
+        summary = await engine.run_session(profile, "Fractions", channel)
+        await channel.close()
+        return summary, await listener
+
+    summary, said = asyncio.run(scenario())
+    pipeline.close()
+
+    assert summary
+    assert pipeline.rendered >= len(summary) and pipeline.hits > 0
+    assert any(text.startswith("Visual support: ") for text in said)
@@ -0,0 +1,57 @@
+from memory.session_memory import SessionMemory
+
+
+def run(path, topic, steps):
+    memory = SessionMemory(log_path=path, topic=topic)
+    for n, text in enumerate(steps, 1):
+        memory.log_interaction(n, text, "correct", "<enter>", False)
+    memory.close()
+
+
+def test_log_is_appended_across_sessions(tmp_path):
+    path = str(tmp_path / "log.jsonl")
+    run(path, "Fractions", ["Halves.", "Quarters."])
+    run(path, "Seasons", ["Tilt."])
+
+    steps = list(SessionMemory.iter_log(path))
+    assert [(s["topic"], s["content"]) for s in steps] == [
+        ("Fractions", "Halves."),
+        ("Fractions", "Quarters."),
+        ("Seasons", "Tilt."),
+    ]
+
+
+def test_append_after_torn_line_keeps_later_sessions(tmp_path):
+    path = str(tmp_path / "log.jsonl")
+    run(path, "Fractions", ["Halves."])
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"type":"step","step_id":2,"ha')  # crash mid-write
+    run(path, "Seasons", ["Tilt."])
+
+    assert [s["content"] for s in SessionMemory.iter_log(path)] == ["Halves.", "Tilt."]
+
+
+def test_load_keeps_each_sessions_topic_and_never_rewrites(tmp_path):
+    path = str(tmp_path / "log.jsonl")
+    run(path, "Fractions", ["Halves."])
+    run(path, "Seasons", ["Tilt.", "Orbit."])
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"type":"ste')  # crash mid-write
+    with open(path, encoding="utf-8") as f:
+        before = f.read()
+
+    memory = SessionMemory.load(path)
+    assert [(s["topic"], s["step_id"]) for s in memory.get_summary()] == [
+        ("Fractions", 1),
+        ("Seasons", 1),
+        ("Seasons", 2),
+    ]
+    memory.log_interaction(3, "Equinox.", "correct", "<enter>", False)
+    memory.close()
+
+    with open(path, encoding="utf-8") as f:
+        assert f.read().startswith(before)
+    assert [(s["topic"], s["content"]) for s in SessionMemory.iter_log(path)][-2:] == [
+        ("Seasons", "Orbit."),
+        ("Seasons", "Equinox."),
+    ]
@@ -0,0 +1,58 @@
+import time
+
+import pytest
+
+from agents.tutor_agent import TutorAgent
+from memory.session_checkpoint import SessionCheckpoint
+from memory.session_memory import SessionMemory
+from memory.user_profile import UserProfile
+from tests.test_content_agent import make_agent
+
+
+class Interrupted(Exception):
+    pass
+
+
+def learner(stop_after=None):
+    """
+    Answers Enter to every prompt; raises after `stop_after` steps.
+    """
+    asked = {"steps": 0}
+
+    def answer(prompt):
+        time.sleep(0.02)  # let the lesson finish streaming, as a human would
+        if prompt.startswith("Did you understand"):
+            asked["steps"] += 1
+            if stop_after is not None and asked["steps"] > stop_after:
+                raise Interrupted
+        return ""
+
+    return answer
+
+
+def run(tmp_path, input_fn, resume_state=None):
+    memory = SessionMemory(log_path=str(tmp_path / "log.jsonl"))
+    tutor = TutorAgent(
+        content_agent=make_agent(),
+        session_memory=memory,
+        profile=UserProfile("s1", "Sam", {"visual": 0.1, "audio": 0.1, "text": 0.8}, []),
+        input_fn=input_fn,
+        output_fn=lambda *a, **k: None,
+        checkpoint=SessionCheckpoint(str(tmp_path / "checkpoint.json")),
+    )
+    try:
+        return tutor.run_session("Fractions", resume_state=resume_state)
+    finally:
+        memory.close()
+
+
+def test_resume_does_not_log_restored_steps_again(tmp_path):
+    with pytest.raises(Interrupted):
+        run(tmp_path, learner(stop_after=2))
+    state = SessionCheckpoint(str(tmp_path / "checkpoint.json")).load()
+    assert state["next_step"] == 2
+
+    summary = run(tmp_path, learner(), resume_state=state)
+
+    logged = [s["step_id"] for s in SessionMemory.iter_log(str(tmp_path / "log.jsonl"))]
+    assert logged == [s["step_id"] for s in summary] == list(range(1, len(summary) + 1))
@@ -5,6 +5,10 @@ Provides reusable functions to analyze session logs and compute
 scores for updating the student profile.
 """
 
+from tools.tracing import traced
+
+
+@traced("tool.analytics")
 def compute_effective_score(session_summary: list[dict]) -> float:
     """
     Compute an 'effective score' based on correctness and hint usage.
@@ -28,4 +32,3 @@ def compute_effective_score(session_summary: list[dict]) -> float:
     # Penalize heavy hint usage a bit
     effective = max(0.0, accuracy - 0.3 * hint_rate)
     return effective
-
@@ -0,0 +1,211 @@
+"""
+Tool: Asset Store
+
+Content-hashed on-disk store for rendered step assets (read-aloud audio,
+visual aids) plus a background pipeline that renders them.
+
+Assets live under assets/cache/<kind>/<hash[:2]>/<hash>.<ext>, where the
+hash covers the kind, the renderer version and the source text, so a
+step's asset is rendered once and shared by every session. Reads are
+memory-mapped and returned as read-only memoryviews (no copy into
+Python); at most max_open_maps mappings are kept open for reuse, least
+recently used dropped first. path() gives the file for sendfile-style
+serving. The store keeps its total size under max_bytes by deleting
+least recently used assets.
+
+The tutor loop only calls AssetPipeline.ready(): rendering always
+happens on the pipeline's worker threads.
+"""
+
+import hashlib
+import mmap
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from tools.tts_stub import tts_stub
+from tools.visual_aid_tool import generate_visual_aid_description
+
+
+class AssetStore:
+    def __init__(self, root: str = "assets/cache", max_bytes: int = 256 * 1024 * 1024, max_open_maps: int = 64):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_open_maps = max_open_maps
+        self._lock = threading.Lock()
+        self._sizes = OrderedDict()  # path -> size, least recently used first
+        self._maps = OrderedDict()   # path -> open mmap, least recently used first
+        self.total_bytes = 0
+        self._scan()
+
+    def _scan(self) -> None:
+        found = []
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(directory, name)
+                st = os.stat(path)
+                found.append((st.st_mtime, path, st.st_size))
+        for _, path, size in sorted(found):
+            self._sizes[path] = size
+            self.total_bytes += size
+
+    @staticmethod
+    def key(kind: str, source: str, version: str = "1") -> str:
+        return hashlib.sha256(f"{kind}\0{version}\0{source}".encode("utf-8")).hexdigest()[:32]
+
+    def _path(self, kind: str, key: str, ext: str) -> str:
+        return os.path.join(self.root, kind, key[:2], f"{key}.{ext}")
+
+    def path(self, kind: str, key: str, ext: str) -> str | None:
+        """
+        File path of a stored asset (for os.sendfile / static serving), or None.
+        """
+        path = self._path(kind, key, ext)
+        with self._lock:
+            if path not in self._sizes:
+                return None
+            self._sizes.move_to_end(path)
+        return path
+
+    def get(self, kind: str, key: str, ext: str) -> memoryview | None:
+        """
+        Zero-copy read-only view of a stored asset, or None.
+        """
+        path = self._path(kind, key, ext)
+        with self._lock:
+            if path not in self._sizes:
+                return None
+            self._sizes.move_to_end(path)
+            mapped = self._maps.get(path)
+            if mapped is not None:
+                self._maps.move_to_end(path)
+            else:
+                if self._sizes[path] == 0:
+                    return memoryview(b"")
+                try:
+                    with open(path, "rb") as f:
+                        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                except FileNotFoundError:
+                    # Evicted by another process sharing the directory
+                    self.total_bytes -= self._sizes.pop(path)
+                    return None
+                self._maps[path] = mapped
+                # Dropped maps close once the views handed out from them are gone
+                while len(self._maps) > self.max_open_maps:
+                    self._maps.popitem(last=False)
+        return memoryview(mapped)
+
+    def put(self, kind: str, key: str, ext: str, data: bytes) -> str:
+        path = self._path(kind, key, ext)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+        with self._lock:
+            self.total_bytes += len(data) - self._sizes.pop(path, 0)
+            self._sizes[path] = len(data)
+            self._maps.pop(path, None)
+            self._evict()
+        return path
+
+    def _evict(self) -> None:
+        while self.total_bytes > self.max_bytes and len(self._sizes) > 1:
+            path, size = self._sizes.popitem(last=False)
+            self.total_bytes -= size
+            # Views handed out earlier stay valid: the mapping outlives the file
+            self._maps.pop(path, None)
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"assets": len(self._sizes), "bytes": self.total_bytes, "max_bytes": self.max_bytes}
+
+
+# ---------- renderers ----------
+
+def _render_audio(topic: str, step_text: str) -> bytes:
+    # Placeholder until a real TTS engine is wired in
+    return tts_stub(step_text).encode("utf-8")
+
+
+def _render_visual(topic: str, step_text: str) -> bytes:
+    return generate_visual_aid_description(topic, step_text).encode("utf-8")
+
+
+# kind -> (renderer, file extension, renderer version, whether topic affects output)
+RENDERERS = {
+    "audio": (_render_audio, "txt", "stub-1", False),
+    "visual": (_render_visual, "txt", "stub-1", True),
+}
+
+
+class AssetPipeline:
+    """
+    Renders assets for step texts on background threads. request()
+    schedules work; ready() only ever looks up finished assets.
+    """
+
+    def __init__(self, store: AssetStore, max_workers: int = 2):
+        self.store = store
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="asset-render")
+        self._lock = threading.Lock()
+        self._pending = {}  # (kind, key) -> Future
+        self.rendered = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _locate(self, kind: str, topic: str, step_text: str):
+        _, ext, version, uses_topic = RENDERERS[kind]
+        source = f"{topic}\0{step_text}" if uses_topic else step_text
+        return self.store.key(kind, source, version), ext
+
+    def _render(self, kind, key, ext, topic, step_text) -> None:
+        renderer = RENDERERS[kind][0]
+        try:
+            self.store.put(kind, key, ext, renderer(topic, step_text))
+            self.rendered += 1
+        finally:
+            with self._lock:
+                self._pending.pop((kind, key), None)
+
+    def request(self, kind: str, topic: str, step_text: str) -> None:
+        key, ext = self._locate(kind, topic, step_text)
+        if self.store.path(kind, key, ext) is not None:
+            return
+        with self._lock:
+            if (kind, key) in self._pending:
+                return
+            self._pending[(kind, key)] = self._pool.submit(self._render, kind, key, ext, topic, step_text)
+
+    def ready(self, kind: str, topic: str, step_text: str, wait: float = 0.0) -> memoryview | None:
+        """
+        The rendered asset, or None if it is not ready. With wait > 0, an
+        in-flight render may be waited on for up to that many seconds.
+        """
+        key, ext = self._locate(kind, topic, step_text)
+        view = self.store.get(kind, key, ext)
+        if view is None and wait > 0:
+            with self._lock:
+                future = self._pending.get((kind, key))
+            if future is not None:
+                try:
+                    future.result(timeout=wait)
+                except Exception:
+                    pass
+                view = self.store.get(kind, key, ext)
+        if view is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return view
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=True)
@@ -0,0 +1,236 @@
+"""
+Tool: Break Simulator
+
+Replays many session traces through the break policy of
+tools/break_scheduler.should_take_break at once, for tuning its
+streak_threshold and interval.
+
+A cohort is a set of NumPy arrays: per-step outcomes (sessions x steps,
+padded), session lengths and an ADHD flag per session. Every policy in a
+parameter grid is simulated together: the only loop is over step
+positions, each iteration updating a (policies x sessions) state array.
+Traces come from saved reports (via tools.cohort_analytics) or are
+generated synthetically.
+
+For each policy the simulator reports break frequency, the incorrect
+streak at which breaks fire, and projected session length
+(steps * step_seconds + breaks * break_seconds).
+
+Usage:
+    python -m tools.break_simulator --synthetic 100000 --streak-thresholds 1 2 3 --intervals 2 3 4 5
+    python -m tools.break_simulator --reports reports
+"""
+
+import argparse
+import itertools
+import json
+
+import numpy as np
+
+
+class Traces:
+    """
+    correct: bool (sessions, max_steps); False past a session's end.
+    lengths: int (sessions,) number of steps in each session.
+    has_adhd: bool (sessions,).
+    """
+
+    def __init__(self, correct, lengths, has_adhd):
+        self.correct = np.asarray(correct, dtype=np.bool_)
+        self.lengths = np.asarray(lengths, dtype=np.int32)
+        self.has_adhd = np.asarray(has_adhd, dtype=np.bool_)
+
+    def __len__(self):
+        return len(self.lengths)
+
+    @classmethod
+    def synthetic(
+        cls,
+        sessions: int,
+        min_steps: int = 3,
+        max_steps: int = 7,
+        adhd_share: float = 0.5,
+        accuracy: tuple[float, float] = (4.0, 2.0),
+        seed: int = 0,
+    ) -> "Traces":
+        """
+        Random cohort: session lengths uniform in [min_steps, max_steps]
+        (the lesson prompt asks for 3-7 steps) and a per-session accuracy
+        drawn from Beta(*accuracy).
+        """
+        rng = np.random.default_rng(seed)
+        lengths = rng.integers(min_steps, max_steps + 1, size=sessions)
+        p = rng.beta(*accuracy, size=sessions)
+        correct = rng.random((sessions, max_steps)) < p[:, None]
+        correct &= np.arange(max_steps) < lengths[:, None]
+        has_adhd = rng.random(sessions) < adhd_share
+        return cls(correct, lengths, has_adhd)
+
+    @classmethod
+    def from_cohort(cls, store) -> "Traces":
+        """
+        One trace per saved report in a CohortStore.
+        """
+        rows = store._active_rows()
+        files = store.columns["session"][rows]
+        steps = store.columns["step_id"][rows].astype(np.int64) - 1
+        correct = store.columns["correct"][rows]
+        challenges = store.columns["challenges"][rows]
+
+        sessions, index = np.unique(files, return_inverse=True)
+        max_steps = int(steps.max()) + 1 if steps.size else 0
+        lengths = np.zeros(len(sessions), dtype=np.int32)
+        np.maximum.at(lengths, index, steps + 1)
+
+        grid = np.zeros((len(sessions), max_steps), dtype=np.bool_)
+        grid[index, steps] = correct
+
+        adhd_codes = np.array(
+            ["adhd" in key.split(",") for key in store.challenge_sets.values], dtype=np.bool_
+        )
+        has_adhd = np.zeros(len(sessions), dtype=np.bool_)
+        if adhd_codes.size:
+            has_adhd[index] = adhd_codes[challenges]
+        return cls(grid, lengths, has_adhd)
+
+
+def incorrect_streaks(traces: Traces) -> np.ndarray:
+    """
+    Incorrect streak after each step (sessions, max_steps); it does not
+    depend on the break policy, so it is computed once per cohort.
+    """
+    positions = np.arange(traces.correct.shape[1])
+    wrong = ~traces.correct & (positions < traces.lengths[:, None])
+    # Position of the last correct step so far (-1 if none yet)
+    last_correct = np.maximum.accumulate(np.where(wrong, -1, positions), axis=1)
+    return (positions - last_correct).astype(np.int32)
+
+
+def simulate(traces: Traces, streak_thresholds, intervals) -> np.ndarray:
+    """
+    Break decisions for every policy: bool (policies, sessions, max_steps).
+    streak_thresholds / intervals: one value per policy.
+    """
+    thresholds = np.asarray(streak_thresholds, dtype=np.int32)[:, None]
+    intervals = np.asarray(intervals, dtype=np.int32)[:, None]
+    streaks = incorrect_streaks(traces)
+    sessions, max_steps = traces.correct.shape
+
+    eligible = traces.has_adhd[:, None] & (np.arange(max_steps) < traces.lengths[:, None])
+    last_break = np.full((len(thresholds), sessions), -1, dtype=np.int32)
+    breaks = np.zeros((len(thresholds), sessions, max_steps), dtype=np.bool_)
+
+    for t in range(max_steps):
+        if t == 0:
+            periodic = np.zeros_like(last_break, dtype=np.bool_)
+        else:
+            periodic = np.where(
+                last_break < 0,
+                (t + 1) % intervals == 0,
+                t - last_break >= intervals,
+            )
+        take = eligible[:, t] & ((streaks[:, t] >= thresholds) | periodic)
+        last_break[take] = t
+        breaks[:, :, t] = take
+
+    return breaks
+
+
+def evaluate(
+    traces: Traces,
+    streak_thresholds=(1, 2, 3),
+    intervals=(2, 3, 4, 5),
+    step_seconds: float = 45.0,
+    break_seconds: float = 60.0,
+) -> list[dict]:
+    """
+    Summary per (streak_threshold, interval) pair of the grid.
+    """
+    grid = list(itertools.product(streak_thresholds, intervals))
+    breaks = simulate(traces, [g[0] for g in grid], [g[1] for g in grid])
+    streaks = incorrect_streaks(traces)
+
+    per_session = breaks.sum(axis=2)                     # (policies, sessions)
+    adhd = traces.has_adhd
+    adhd_steps = max(int(traces.lengths[adhd].sum()), 1)
+    minutes = (traces.lengths * step_seconds + per_session * break_seconds) / 60.0
+
+    results = []
+    for p, (threshold, interval) in enumerate(grid):
+        at_break = streaks[breaks[p]]
+        results.append(
+            {
+                "streak_threshold": int(threshold),
+                "interval": int(interval),
+                "breaks_per_session": float(per_session[p, adhd].mean()) if adhd.any() else 0.0,
+                "breaks_per_step": float(per_session[p, adhd].sum() / adhd_steps),
+                "sessions_with_break": float((per_session[p, adhd] > 0).mean()) if adhd.any() else 0.0,
+                "streak_breaks": float((at_break >= threshold).mean()) if at_break.size else 0.0,
+                "streak_at_break": np.bincount(at_break, minlength=1).tolist(),
+                "minutes_mean": float(minutes[p].mean()),
+                "minutes_p95": float(np.percentile(minutes[p], 95)),
+            }
+        )
+    return results
+
+
+def streak_distribution(traces: Traces) -> list[int]:
+    """
+    Number of sessions by longest incorrect streak (index = streak length).
+    """
+    return np.bincount(incorrect_streaks(traces).max(axis=1, initial=0)).tolist()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate break policies over many session traces")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--reports", type=str, help="Directory with *_report.json to replay")
+    source.add_argument("--synthetic", type=int, default=10000, help="Number of synthetic sessions")
+    parser.add_argument("--store", type=str, default="reports/cohort.npz", help="Cohort column store (with --reports)")
+    parser.add_argument("--streak-thresholds", type=int, nargs="+", default=[1, 2, 3])
+    parser.add_argument("--intervals", type=int, nargs="+", default=[2, 3, 4, 5])
+    parser.add_argument("--step-seconds", type=float, default=45.0)
+    parser.add_argument("--break-seconds", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    if args.reports:
+        from tools.cohort_analytics import CohortStore
+
+        store = CohortStore.load(args.store)
+        store.ingest(args.reports)
+        store.save(args.store)
+        traces = Traces.from_cohort(store)
+    else:
+        traces = Traces.synthetic(args.synthetic, seed=args.seed)
+
+    if not len(traces):
+        print("No sessions to simulate")
+        return
+
+    results = evaluate(
+        traces,
+        args.streak_thresholds,
+        args.intervals,
+        step_seconds=args.step_seconds,
+        break_seconds=args.break_seconds,
+    )
+
+    if args.json:
+        print(json.dumps({"sessions": len(traces), "max_streaks": streak_distribution(traces), "policies": results}))
+        return
+
+    print(f"{len(traces)} sessions ({int(traces.has_adhd.sum())} with ADHD)")
+    print(f"Sessions by longest incorrect streak: {streak_distribution(traces)}\n")
+    print("threshold interval  breaks/session  breaks/step  with break  streak-triggered  minutes (mean / p95)")
+    for r in results:
+        print(
+            f"{r['streak_threshold']:>9} {r['interval']:>8}  {r['breaks_per_session']:>14.2f}  "
+            f"{r['breaks_per_step']:>11.2f}  {r['sessions_with_break'] * 100:>9.0f}%  "
+            f"{r['streak_breaks'] * 100:>15.0f}%  {r['minutes_mean']:>8.1f} / {r['minutes_p95']:.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
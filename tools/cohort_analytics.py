@@ -0,0 +1,317 @@
+"""
+Tool: Cohort Analytics
+
+Aggregates many saved session reports (reports/*_report.json) at once.
+Every logged step becomes one row in a set of NumPy column arrays, and
+cohort questions (accuracy, hint rate, hardest steps) are answered with
+vectorized group-bys on student, topic or learning challenge.
+
+The store is saved as an .npz file plus a small JSON sidecar, and
+ingest only reads reports that are new or changed since the last run.
+Rows of a report that changed are retired at ingest and dropped at save.
+
+Usage:
+    python -m tools.cohort_analytics --reports reports --store reports/cohort.npz
+"""
+
+import argparse
+import glob
+import json
+import os
+
+import numpy as np
+
+REPORT_SUFFIX = "_report.json"
+PROFILE_SUFFIX = "_profile.json"
+UNKNOWN_TOPIC = "unknown"
+
+_COLUMNS = {
+    "session": np.int32,    # index of the report file the row came from
+    "student": np.int32,    # code into students
+    "topic": np.int32,      # code into topics
+    "challenges": np.int32, # code into challenge_sets
+    "step": np.int32,       # code into step_texts
+    "step_id": np.int16,
+    "correct": np.bool_,
+    "hint": np.bool_,
+}
+
+
+class _Codes:
+    """
+    Dictionary encoding: value <-> small integer code.
+    """
+
+    def __init__(self, values=None):
+        self.values = list(values or [])
+        self._index = {v: i for i, v in enumerate(self.values)}
+
+    def code(self, value) -> int:
+        idx = self._index.get(value)
+        if idx is None:
+            idx = len(self.values)
+            self.values.append(value)
+            self._index[value] = idx
+        return idx
+
+    def __len__(self):
+        return len(self.values)
+
+
+class CohortStore:
+    def __init__(self):
+        self.columns = {name: np.empty(0, dtype=dtype) for name, dtype in _COLUMNS.items()}
+        self.students = _Codes()
+        self.topics = _Codes()
+        self.challenge_sets = _Codes()  # "adhd,dyslexia" style keys; "" = none
+        self.step_texts = _Codes()
+        self.files = {}                 # path -> {"id", "mtime_ns", "size"}
+        self.active_files = np.empty(0, dtype=np.bool_)
+
+    # ---------- ingest ----------
+
+    def ingest(self, reports_dir: str = "reports") -> int:
+        """
+        Read reports that are new or changed since the last ingest.
+        Rows from a report that was overwritten are retired, not rewritten.
+        Returns the number of files read.
+        """
+        chunks = {name: [] for name in _COLUMNS}
+        active = self.active_files.tolist()
+        read = 0
+
+        for path in sorted(glob.glob(os.path.join(reports_dir, "*" + REPORT_SUFFIX))):
+            stat = os.stat(path)
+            known = self.files.get(path)
+            if known and known["mtime_ns"] == stat.st_mtime_ns and known["size"] == stat.st_size:
+                continue
+
+            with open(path, "r") as f:
+                session = json.load(f)
+
+            if known:
+                active[known["id"]] = False
+
+            file_id = len(active)
+            active.append(True)
+            self.files[path] = {"id": file_id, "mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+            read += 1
+
+            student_id = os.path.basename(path)[: -len(REPORT_SUFFIX)]
+            student = self.students.code(student_id)
+            challenges = self.challenge_sets.code(_challenge_key(reports_dir, student_id))
+
+            for log in session:
+                chunks["session"].append(file_id)
+                chunks["student"].append(student)
+                chunks["topic"].append(self.topics.code(log.get("topic", UNKNOWN_TOPIC)))
+                chunks["challenges"].append(challenges)
+                chunks["step"].append(self.step_texts.code(log["content"]))
+                chunks["step_id"].append(log["step_id"])
+                chunks["correct"].append(log["feedback"] == "correct")
+                chunks["hint"].append(bool(log.get("hint_used")))
+
+        for name, dtype in _COLUMNS.items():
+            if chunks[name]:
+                new = np.asarray(chunks[name], dtype=dtype)
+                self.columns[name] = np.concatenate([self.columns[name], new])
+        self.active_files = np.asarray(active, dtype=np.bool_)
+
+        return read
+
+    def compact(self) -> None:
+        """
+        Drop the rows of retired reports and renumber the remaining files.
+        """
+        if self.active_files.all():
+            return
+        keep = self._active_rows()
+        new_ids = np.cumsum(self.active_files, dtype=np.int32) - 1
+        self.columns = {name: column[keep] for name, column in self.columns.items()}
+        self.columns["session"] = new_ids[self.columns["session"]]
+        for entry in self.files.values():
+            entry["id"] = int(new_ids[entry["id"]])
+        self.active_files = np.ones(int(self.active_files.sum()), dtype=np.bool_)
+
+    # ---------- aggregates ----------
+
+    def _active_rows(self):
+        return self.active_files[self.columns["session"]]
+
+    def group_stats(self, by: str = "topic") -> dict:
+        """
+        Accuracy, hint rate, step and session counts grouped by
+        "student", "topic" or "challenge". A student with several
+        challenges counts towards each of them.
+        """
+        mask = self._active_rows()
+        correct = self.columns["correct"][mask]
+        hint = self.columns["hint"][mask]
+        files = self.columns["session"][mask]
+
+        if by in ("student", "topic"):
+            codes = self.columns[by][mask]
+            labels = (self.students if by == "student" else self.topics).values
+            return _grouped(codes, labels, correct, hint, files)
+
+        if by == "challenge":
+            # Membership matrix: challenge set x individual challenge
+            names = sorted({c for key in self.challenge_sets.values for c in key.split(",") if c})
+            names.append("none")
+            member = np.zeros((len(self.challenge_sets), len(names)), dtype=np.bool_)
+            for set_code, key in enumerate(self.challenge_sets.values):
+                for c in key.split(",") if key else ["none"]:
+                    member[set_code, names.index(c)] = True
+
+            set_codes = self.columns["challenges"][mask]
+            result = {}
+            for col, name in enumerate(names):
+                rows = member[set_codes, col]
+                if rows.any():
+                    stats = _grouped(
+                        np.zeros(int(rows.sum()), dtype=np.int32), [name],
+                        correct[rows], hint[rows], files[rows],
+                    )
+                    result.update(stats)
+            return result
+
+        raise ValueError(f"Unknown group-by '{by}'; use student, topic or challenge")
+
+    def hardest_steps(self, limit: int = 10, min_attempts: int = 3) -> list[dict]:
+        """
+        Steps with the highest share of 'incorrect' feedback across the cohort.
+        """
+        mask = self._active_rows()
+        steps = self.columns["step"][mask]
+        n = len(self.step_texts)
+        attempts = np.bincount(steps, minlength=n)
+        misses = np.bincount(steps, weights=~self.columns["correct"][mask], minlength=n)
+        hints = np.bincount(steps, weights=self.columns["hint"][mask], minlength=n)
+
+        eligible = np.flatnonzero(attempts >= min_attempts)
+        if eligible.size == 0:
+            return []
+        miss_rate = misses[eligible] / attempts[eligible]
+        order = eligible[np.argsort(-miss_rate, kind="stable")][:limit]
+
+        return [
+            {
+                "step": self.step_texts.values[code],
+                "attempts": int(attempts[code]),
+                "incorrect_rate": float(misses[code] / attempts[code]),
+                "hint_rate": float(hints[code] / attempts[code]),
+            }
+            for code in order
+        ]
+
+    # ---------- persistence ----------
+
+    def save(self, path: str) -> None:
+        """
+        Compact, then write the .npz and its sidecar, each via a temp file
+        and os.replace so a crash mid-save never leaves a truncated store.
+        The .npz is written through a file handle so it lands at exactly
+        `path`, with or without an .npz extension.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.compact()
+        with open(f"{path}.tmp", "wb") as f:
+            np.savez_compressed(f, active_files=self.active_files, **self.columns)
+        meta = _sidecar(path)
+        with open(f"{meta}.tmp", "w") as f:
+            json.dump(
+                {
+                    "students": self.students.values,
+                    "topics": self.topics.values,
+                    "challenge_sets": self.challenge_sets.values,
+                    "step_texts": self.step_texts.values,
+                    "files": self.files,
+                },
+                f,
+            )
+        os.replace(f"{path}.tmp", path)
+        os.replace(f"{meta}.tmp", meta)
+
+    @classmethod
+    def load(cls, path: str) -> "CohortStore":
+        store = cls()
+        if not os.path.exists(path):
+            return store
+        with np.load(path) as arrays:
+            store.columns = {name: arrays[name] for name in _COLUMNS}
+            store.active_files = arrays["active_files"]
+        with open(_sidecar(path), "r") as f:
+            meta = json.load(f)
+        store.students = _Codes(meta["students"])
+        store.topics = _Codes(meta["topics"])
+        store.challenge_sets = _Codes(meta["challenge_sets"])
+        store.step_texts = _Codes(meta["step_texts"])
+        store.files = meta["files"]
+        return store
+
+
+# ---------- helpers ----------
+
+def _sidecar(path: str) -> str:
+    return os.path.splitext(path)[0] + ".meta.json"
+
+
+def _challenge_key(reports_dir: str, student_id: str) -> str:
+    path = os.path.join(reports_dir, student_id + PROFILE_SUFFIX)
+    if not os.path.exists(path):
+        return ""
+    with open(path, "r") as f:
+        challenges = json.load(f).get("learning_challenges") or []
+    return ",".join(sorted({c.strip().lower() for c in challenges if c.strip()}))
+
+
+def _grouped(codes, labels, correct, hint, files) -> dict:
+    n = len(labels)
+    steps = np.bincount(codes, minlength=n)
+    correct_counts = np.bincount(codes, weights=correct, minlength=n)
+    hint_counts = np.bincount(codes, weights=hint, minlength=n)
+
+    # Sessions = distinct (group, file) pairs
+    stride = int(files.max()) + 1 if files.size else 1
+    pairs = np.unique(codes.astype(np.int64) * stride + files)
+    sessions = np.bincount(pairs // stride, minlength=n)
+
+    return {
+        labels[i]: {
+            "sessions": int(sessions[i]),
+            "steps": int(steps[i]),
+            "accuracy": float(correct_counts[i] / steps[i]),
+            "hint_rate": float(hint_counts[i] / steps[i]),
+        }
+        for i in np.flatnonzero(steps)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cohort analytics over saved session reports")
+    parser.add_argument("--reports", type=str, default="reports", help="Directory with *_report.json")
+    parser.add_argument("--store", type=str, default="reports/cohort.npz", help="Column store file")
+    parser.add_argument("--by", choices=("topic", "student", "challenge"), default="topic")
+    args = parser.parse_args()
+
+    store = CohortStore.load(args.store)
+    read = store.ingest(args.reports)
+    store.save(args.store)
+    print(f"Ingested {read} new or changed report(s)\n")
+
+    print(f"By {args.by}:")
+    for label, stats in sorted(store.group_stats(args.by).items()):
+        print(
+            f"- {label}: {stats['sessions']} sessions, {stats['steps']} steps, "
+            f"accuracy {stats['accuracy'] * 100:.1f}%, hints {stats['hint_rate'] * 100:.1f}%"
+        )
+
+    print("\nHardest steps:")
+    for row in store.hardest_steps():
+        print(f"- {row['incorrect_rate'] * 100:.0f}% incorrect ({row['attempts']} attempts): {row['step'][:80]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,344 @@
+"""
+Tool: Metrics
+
+In-process counters, gauges and latency histograms, exported in the
+Prometheus text format: over HTTP (serve(), or GET /metrics on
+server.py) or as a file rewritten every few seconds (start_dumping()).
+
+Updates are lock-free: every thread writes to its own shard (a plain dict
+reached through threading.local), and shards are only summed when the
+metrics are collected. Copying a dict is a single C call in CPython, so a
+collector never sees a half-applied update. Shards of finished threads
+are folded into a base value so short-lived threads (e.g. one per HTTP
+request) do not pile up.
+
+Metrics are created once at import time of the module that uses them:
+
+    MODEL_CALLS = metrics.counter("kindred_model_calls_total", "Model requests", ("mode", "outcome"))
+    MODEL_CALLS.inc(mode="sync", outcome="ok")
+"""
+
+import bisect
+import os
+import threading
+import time
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labels)
+        self._local = threading.local()
+        self._shards = []  # (thread, shard)
+        self._base = {}    # merged shards of finished threads
+        self._lock = threading.Lock()
+
+    def _shard(self) -> dict:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._shards.append((threading.current_thread(), shard))
+            return shard
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _merge(self, into: dict, shard: dict) -> None:
+        for key, value in shard.items():
+            into[key] = into.get(key, 0) + value
+
+    def values(self) -> dict:
+        """
+        Label values tuple -> current value, summed over all threads.
+        """
+        with self._lock:
+            live = []
+            for thread, shard in self._shards:
+                if thread.is_alive():
+                    live.append((thread, shard))
+                else:
+                    # The thread can no longer write, so its shard is final
+                    self._merge(self._base, shard)
+            self._shards = live
+            total = {}
+            self._merge(total, self._base)
+            for _, shard in live:
+                self._merge(total, shard.copy())
+        return total
+
+    def collect(self) -> dict:
+        return {
+            "name": self.name,
+            "help": self.help,
+            "type": self.kind,
+            "labels": list(self.labelnames),
+            "samples": [[list(key), value] for key, value in self.values().items()],
+        }
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        shard = self._shard()
+        key = self._key(labels)
+        shard[key] = shard.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """
+    Either moved with inc()/dec() (summed over threads) or computed at
+    collection time by a function given to set_function().
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labels=()):
+        super().__init__(name, help, labels)
+        self._function = None
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        shard = self._shard()
+        key = self._key(labels)
+        shard[key] = shard.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set_function(self, fn) -> None:
+        self._function = fn
+
+    def values(self) -> dict:
+        if self._function is not None:
+            return {(): self._function()}
+        return super().values()
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        shard = self._shard()
+        key = self._key(labels)
+        # [count per bucket..., +Inf bucket, sum]
+        state = shard.get(key)
+        if state is None:
+            state = shard[key] = [0] * (len(self.buckets) + 2)
+        state[bisect.bisect_left(self.buckets, value)] += 1
+        state[-1] += value
+
+    def time(self, **labels):
+        return _Timer(self, labels)
+
+    def _merge(self, into: dict, shard: dict) -> None:
+        for key, state in shard.items():
+            state = list(state)
+            current = into.get(key)
+            into[key] = state if current is None else [a + b for a, b in zip(current, state)]
+
+    def collect(self) -> dict:
+        family = super().collect()
+        family["buckets"] = list(self.buckets)
+        return family
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+# ---------- registry ----------
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, help, labels, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help, labels, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric '{name}' is already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name: str, help: str, labels=()) -> Counter:
+        return self._get(Counter, name, help, labels)
+
+    def gauge(self, name: str, help: str, labels=()) -> Gauge:
+        return self._get(Gauge, name, help, labels)
+
+    def histogram(self, name: str, help: str, labels=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, help, labels, buckets=buckets)
+
+    def collect(self) -> list[dict]:
+        """
+        Plain-data snapshot of every metric (picklable / JSON-able, so
+        worker processes can send theirs to the parent to be merged).
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return [metric.collect() for metric in metrics]
+
+    def render(self) -> str:
+        return render(self.collect())
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, help: str, labels=()) -> Counter:
+    return REGISTRY.counter(name, help, labels)
+
+
+def gauge(name: str, help: str, labels=()) -> Gauge:
+    return REGISTRY.gauge(name, help, labels)
+
+
+def histogram(name: str, help: str, labels=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+    return REGISTRY.histogram(name, help, labels, buckets)
+
+
+def merge(snapshots) -> list[dict]:
+    """
+    Sum several collect() snapshots (e.g. one per worker process) into one.
+    """
+    families = {}
+    for snapshot in snapshots:
+        for family in snapshot:
+            merged = families.get(family["name"])
+            if merged is None:
+                merged = families[family["name"]] = dict(family, samples={})
+            samples = merged["samples"]
+            for key, value in family["samples"]:
+                key = tuple(key)
+                current = samples.get(key)
+                if current is None:
+                    samples[key] = value
+                elif isinstance(value, list):
+                    samples[key] = [a + b for a, b in zip(current, value)]
+                else:
+                    samples[key] = current + value
+    for family in families.values():
+        family["samples"] = [[list(key), value] for key, value in family["samples"].items()]
+    return list(families.values())
+
+
+# ---------- exposition ----------
+
+def _labels(names, values, extra=()) -> str:
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render(families) -> str:
+    """
+    Prometheus text exposition format (version 0.0.4).
+    """
+    lines = []
+    for family in sorted(families, key=lambda f: f["name"]):
+        name, names = family["name"], family["labels"]
+        lines.append(f"# HELP {name} {_escape(family['help'])}")
+        lines.append(f"# TYPE {name} {family['type']}")
+        for values, value in sorted(family["samples"], key=lambda s: s[0]):
+            if family["type"] != "histogram":
+                lines.append(f"{name}{_labels(names, values)} {_number(value)}")
+                continue
+            cumulative = 0
+            for bound, count in zip(list(family["buckets"]) + [float("inf")], value[:-1]):
+                cumulative += count
+                le = (("le", _number(float(bound))),)
+                lines.append(f"{name}_bucket{_labels(names, values, le)} {cumulative}")
+            lines.append(f"{name}_sum{_labels(names, values)} {_number(float(value[-1]))}")
+            lines.append(f"{name}_count{_labels(names, values)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def serve(host: str = "127.0.0.1", port: int = 9100, registry: Registry = REGISTRY):
+    """
+    Serve GET /metrics from a daemon thread; returns the HTTP server.
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") != "/metrics":
+                self.send_error(404)
+                return
+            data = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    httpd = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=httpd.serve_forever, name="metrics-http", daemon=True).start()
+    return httpd
+
+
+def dump(path: str, registry: Registry = REGISTRY) -> None:
+    """
+    Write the metrics to path atomically (e.g. for node_exporter's textfile collector).
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(registry.render())
+    os.replace(tmp, path)
+
+
+def start_dumping(path: str, interval: float = 10.0, registry: Registry = REGISTRY) -> threading.Event:
+    """
+    Rewrite path every `interval` seconds from a daemon thread until the
+    returned event is set.
+    """
+    stop = threading.Event()
+
+    def loop():
+        while not stop.wait(interval):
+            dump(path, registry)
+
+    threading.Thread(target=loop, name="metrics-dump", daemon=True).start()
+    return stop
@@ -0,0 +1,123 @@
+"""
+Tool: Preference Learner
+
+Online update of a student's modality preferences, one step at a time.
+
+Each step shows the student some modalities (the step text, plus a
+visual aid and/or read-aloud when those preferences are strong) and ends
+with a reward: 1.0 understood, 0.5 understood after a hint, 0.0 not
+understood. Every shown modality keeps exponentially weighted
+[weight, reward] sums, so its success rate tracks recent steps. After
+each step the shown modalities' preferences are scaled by
+exp(learning_rate * (success_rate - 0.5)) and renormalized: modalities
+that keep working gain share, ones that keep failing lose it to the
+others. Each update touches a fixed number of floats.
+
+The statistics live on UserProfile.preference_stats, so a session
+carries them forward and they are saved with the profile.
+"""
+
+import math
+
+from tools.tracing import traced
+
+MODALITIES = ("visual", "audio", "text")
+
+
+def exposed_modalities(profile) -> tuple:
+    """
+    Modalities a step is presented in, given the current preferences
+    (same thresholds as the tutor loop).
+    """
+    shown = ["text"]
+    if profile.preferences.get("visual", 0) >= 0.5:
+        shown.append("visual")
+    if profile.preferences.get("audio", 0) >= 0.5:
+        shown.append("audio")
+    return tuple(shown)
+
+
+def step_reward(feedback: str, hint_used: bool) -> float:
+    if feedback != "correct":
+        return 0.0
+    return 0.5 if hint_used else 1.0
+
+
+class PreferenceLearner:
+    def __init__(
+        self,
+        decay: float = 0.9,
+        learning_rate: float = 0.1,
+        prior_weight: float = 2.0,
+        min_share: float = 0.05,
+    ):
+        """
+        decay: weight kept by older observations at each new one.
+        prior_weight: pseudo-observations at a 0.5 success rate, so a
+        single step cannot swing the estimate.
+        min_share: floor on any modality's preference, so none is ruled
+        out for good.
+        """
+        self.decay = decay
+        self.learning_rate = learning_rate
+        self.prior_weight = prior_weight
+        self.min_share = min_share
+
+    def success_rate(self, profile, modality: str) -> float:
+        weight, reward = profile.preference_stats.get(modality, (0.0, 0.0))
+        return (reward + 0.5 * self.prior_weight) / (weight + self.prior_weight)
+
+    @traced("tool.preference_learner")
+    def observe(self, profile, exposed, reward: float) -> None:
+        """
+        Record one step's outcome for the modalities it was shown in and
+        adjust profile.preferences in place.
+        """
+        stats = profile.preference_stats
+        prefs = profile.preferences
+        for modality in exposed:
+            weight, total = stats.get(modality, (0.0, 0.0))
+            stats[modality] = [
+                round(self.decay * weight + 1.0, 4),
+                round(self.decay * total + reward, 4),
+            ]
+            advantage = self.success_rate(profile, modality) - 0.5
+            prefs[modality] = prefs.get(modality, 0.0) * math.exp(self.learning_rate * advantage)
+
+        floor = self.min_share
+        for modality in MODALITIES:
+            prefs[modality] = max(prefs.get(modality, 0.0), floor)
+        total = sum(prefs.values())
+        for modality in prefs:
+            prefs[modality] /= total
+
+    def observe_step(self, profile, exposed, feedback: str, hint_used: bool) -> None:
+        self.observe(profile, exposed, step_reward(feedback, hint_used))
+
+    def replay(self, profile, events) -> None:
+        """
+        Apply recorded (exposed, reward) events, e.g. to merge a finished
+        session into the stored copy of the profile.
+        """
+        for exposed, reward in events:
+            self.observe(profile, exposed, reward)
+
+    def warm_start(self, profile, session_summaries, events=None) -> int:
+        """
+        Replay historical session logs (lists of step dicts with
+        "feedback" and "hint_used") to initialise a profile. Which
+        modalities were shown is inferred from the preferences as they
+        evolve. If `events` is a list, the (exposed, reward) pairs applied
+        are appended to it, so replay() can repeat the warm start on
+        another copy of the profile. Returns the number of steps replayed.
+        """
+        steps = 0
+        for summary in session_summaries:
+            for log in summary:
+                exposed = exposed_modalities(profile)
+                reward = step_reward(log["feedback"], bool(log.get("hint_used")))
+                self.observe(profile, exposed, reward)
+                if events is not None:
+                    events.append((exposed, reward))
+                steps += 1
+        return steps
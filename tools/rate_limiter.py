@@ -0,0 +1,177 @@
+"""
+Tool: Rate Limiter
+
+Client-side helpers for calling the model politely:
+- a thread-safe token bucket to cap request rate
+- jittered exponential backoff delays and a retryable-error check
+- a circuit breaker that stops calling an unhealthy backend for a while
+
+shared_bucket() / shared_breaker() return one instance per name, so all
+sessions in a process draw from the same quota.
+"""
+
+import random
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Allows `rate` acquisitions per second on average, with bursts of up to
+    `capacity`. acquire() blocks until a token is available.
+    """
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens: float = 1.0) -> float:
+        """
+        Take tokens if available. Returns 0.0 on success, otherwise the
+        number of seconds to wait before trying again.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def acquire(self, tokens: float = 1.0, timeout: float | None = None) -> bool:
+        """
+        Block until tokens are available. Returns False if `timeout`
+        seconds pass first.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self.try_acquire(tokens)
+            if wait == 0.0:
+                return True
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+
+def backoff_delay(attempt: int, base_delay: float = 1.0, max_delay: float = 30.0) -> float:
+    """
+    Full-jitter exponential backoff: a random delay in
+    [0, min(max_delay, base_delay * 2**attempt)].
+    """
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+
+_RETRYABLE_NAMES = {
+    "ResourceExhausted",
+    "TooManyRequests",
+    "ServiceUnavailable",
+    "InternalServerError",
+    "DeadlineExceeded",
+    "GatewayTimeout",
+}
+_RETRYABLE_CODES = ("429", "500", "502", "503", "504")
+
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    Quota, overload, timeout and connection errors are worth retrying;
+    bad requests and auth failures are not.
+    """
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    if type(error).__name__ in _RETRYABLE_NAMES:
+        return True
+    code = getattr(error, "code", None)
+    if code is not None and str(code) in _RETRYABLE_CODES:
+        return True
+    message = str(error)
+    return any(message.startswith(c) or f" {c} " in message for c in _RETRYABLE_CODES)
+
+
+class CircuitBreaker:
+    """
+    Closed: calls flow normally. After `failure_threshold` consecutive
+    failures the breaker opens and allow() returns False for `cooldown`
+    seconds. Then one trial call is let through (half-open); success
+    closes the breaker, failure re-opens it.
+    """
+
+    def __init__(self, failure_threshold: int = 5, cooldown: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.cooldown:
+                return "half-open"
+            return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.cooldown:
+                return False
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def release(self) -> None:
+        """
+        Give back an allow() whose call never reached the backend (e.g. it
+        was cancelled), so a half-open trial slot is not held forever.
+        """
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+
+_shared_lock = threading.Lock()
+_shared_buckets = {}
+_shared_breakers = {}
+
+
+def shared_bucket(name: str, rate: float, capacity: float | None = None) -> TokenBucket:
+    with _shared_lock:
+        bucket = _shared_buckets.get(name)
+        if bucket is None:
+            bucket = _shared_buckets[name] = TokenBucket(rate, capacity)
+        return bucket
+
+
+def shared_breaker(name: str, failure_threshold: int = 5, cooldown: float = 30.0) -> CircuitBreaker:
+    with _shared_lock:
+        breaker = _shared_breakers.get(name)
+        if breaker is None:
+            breaker = _shared_breakers[name] = CircuitBreaker(failure_threshold, cooldown)
+        return breaker
@@ -0,0 +1,104 @@
+"""
+Tool: Single Flight
+
+Collapses concurrent identical requests into one. The first caller for
+a key (the leader) does the work; callers that arrive while it is still
+in flight wait for and share its result, including its exception.
+
+Works for threads (do), asyncio tasks (do_async) and a mix of both,
+because every in-flight call is tracked as a concurrent.futures.Future.
+Avoid calling do() from inside a running event loop while the same key
+is in flight via do_async() on that loop: the blocking wait would stall
+the loop that has to finish the call.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}   # key -> Future of the in-flight call
+        self._shared = {}  # key -> live object handed out by share()
+        self.executed = 0  # calls that actually ran
+        self.collapsed = 0 # calls that reused someone else's in-flight work
+
+    def _join(self, key):
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.collapsed += 1
+                return future, False
+            future = Future()
+            self._calls[key] = future
+            self.executed += 1
+            return future, True
+
+    def _finish(self, key, future, result=None, error=None):
+        with self._lock:
+            self._calls.pop(key, None)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def do(self, key, fn):
+        """
+        Run fn() once per key among concurrent callers and return its result.
+        """
+        future, leader = self._join(key)
+        if not leader:
+            return future.result()
+        try:
+            result = fn()
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result=result)
+        return result
+
+    async def do_async(self, key, coro_fn):
+        """
+        Async variant: await coro_fn() once per key among concurrent callers.
+        """
+        future, leader = self._join(key)
+        if not leader:
+            return await asyncio.wrap_future(future)
+        try:
+            result = await coro_fn()
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result=result)
+        return result
+
+    def share(self, key, factory):
+        """
+        Return the live object registered for key, or create one with
+        factory() and register it. Use for long-running work (like a
+        streamed response) that followers should attach to mid-flight;
+        call release(key) once it is finished.
+        """
+        with self._lock:
+            obj = self._shared.get(key)
+            if obj is not None:
+                self.collapsed += 1
+                return obj
+            obj = factory()
+            self._shared[key] = obj
+            self.executed += 1
+            return obj
+
+    def release(self, key) -> None:
+        with self._lock:
+            self._shared.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "executed": self.executed,
+                "collapsed": self.collapsed,
+                "in_flight": len(self._calls) + len(self._shared),
+            }
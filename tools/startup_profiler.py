@@ -0,0 +1,94 @@
+"""
+Tool: Startup Profiler
+
+Measures where start-up time goes by timing every import made after
+install() is called. Each newly loaded module is charged its own
+("self") time and the time including the modules it imported
+("cumulative"), like `python -X importtime`, but collected in-process
+so main.py can print it with --profile-startup.
+
+Install it before the imports you want to measure.
+"""
+
+import builtins
+import sys
+import threading
+import time
+
+_original_import = builtins.__import__
+_local = threading.local()
+_records = {}  # module name -> [self_seconds, cumulative_seconds]
+_installed_at = None
+
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    if level == 0 and not fromlist and name in sys.modules:
+        return _original_import(name, globals, locals, fromlist, level)
+
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    stack.append(0.0)  # time spent in nested imports
+    loaded_before = len(sys.modules)
+    started = time.perf_counter()
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        elapsed = time.perf_counter() - started
+        nested = stack.pop()
+        if stack:
+            stack[-1] += elapsed
+        if len(sys.modules) > loaded_before:
+            _record(name, globals, level, elapsed - nested, elapsed)
+
+
+def _record(name, globals, level, self_time, cumulative) -> None:
+    if level:
+        package = (globals or {}).get("__package__") or ""
+        name = f"{package}.{name}" if name else package
+    record = _records.setdefault(name, [0.0, 0.0])
+    record[0] += self_time
+    record[1] += cumulative
+
+
+def install() -> None:
+    global _installed_at
+    if builtins.__import__ is not _timed_import:
+        _installed_at = time.perf_counter()
+        builtins.__import__ = _timed_import
+
+
+def uninstall() -> None:
+    builtins.__import__ = _original_import
+
+
+def summary(top: int = 15) -> dict:
+    """
+    Total time since install(), time spent importing, and the slowest
+    modules by cumulative and by self time.
+    """
+    total = time.perf_counter() - _installed_at if _installed_at else 0.0
+    imports = sum(self_time for self_time, _ in _records.values())
+    by_cumulative = sorted(_records.items(), key=lambda kv: kv[1][1], reverse=True)[:top]
+    by_self = sorted(_records.items(), key=lambda kv: kv[1][0], reverse=True)[:top]
+    return {
+        "total_seconds": total,
+        "import_seconds": imports,
+        "modules": len(_records),
+        "cumulative": [(name, rec[1]) for name, rec in by_cumulative],
+        "self": [(name, rec[0]) for name, rec in by_self],
+    }
+
+
+def format_summary(top: int = 15) -> str:
+    s = summary(top)
+    lines = [
+        f"Start-up: {s['total_seconds'] * 1000:.1f} ms since profiling began, "
+        f"{s['import_seconds'] * 1000:.1f} ms importing {s['modules']} modules",
+        "",
+        f"{'cumulative ms':>14}  module",
+    ]
+    lines += [f"{seconds * 1000:>14.1f}  {name}" for name, seconds in s["cumulative"]]
+    lines += ["", f"{'self ms':>14}  module"]
+    lines += [f"{seconds * 1000:>14.1f}  {name}" for name, seconds in s["self"]]
+    return "\n".join(lines)
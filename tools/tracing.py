@@ -0,0 +1,172 @@
+"""
+Tool: Tracing
+
+Lightweight spans for finding where session time goes: model calls,
+tool calls and each tutoring step. Spans are exported as Chrome trace
+JSON (open in chrome://tracing or https://ui.perfetto.dev), and a
+percentile summary can be printed at the end of a session.
+
+Tracing is off by default. While disabled, span() returns a shared no-op
+object and @traced functions call straight through, so the overhead is a
+single global lookup.
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+
+_tracer = None
+
+
+class Tracer:
+    def __init__(self):
+        self.events = []
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self._pid = os.getpid()
+
+    def record(self, name: str, cat: str, start: float, duration: float, args: dict) -> None:
+        event = {
+            "name": name,
+            "cat": cat,
+            "ph": "X",
+            "ts": (start - self._origin) * 1e6,
+            "dur": duration * 1e6,
+            "pid": self._pid,
+            "tid": threading.get_ident(),
+            "args": args,
+        }
+        with self._lock:
+            self.events.append(event)
+
+    def export_chrome(self, path: str) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            events = list(self.events)
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+    def summary(self) -> dict:
+        """
+        Per span name: count, total, p50/p90/p99 and max duration in ms.
+        """
+        durations = {}
+        with self._lock:
+            for event in self.events:
+                durations.setdefault(event["name"], []).append(event["dur"] / 1000.0)
+
+        result = {}
+        for name, values in durations.items():
+            values.sort()
+            result[name] = {
+                "count": len(values),
+                "total_ms": sum(values),
+                "p50_ms": _percentile(values, 50),
+                "p90_ms": _percentile(values, 90),
+                "p99_ms": _percentile(values, 99),
+                "max_ms": values[-1],
+            }
+        return result
+
+    def format_summary(self) -> str:
+        lines = [f"{'span':<24}{'count':>7}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}"]
+        for name, s in sorted(self.summary().items(), key=lambda kv: -kv[1]["total_ms"]):
+            lines.append(
+                f"{name:<24}{s['count']:>7}{s['p50_ms']:>10.1f}{s['p90_ms']:>10.1f}"
+                f"{s['p99_ms']:>10.1f}{s['max_ms']:>10.1f}"
+            )
+        return "\n".join(lines)
+
+
+class Span:
+    __slots__ = ("tracer", "name", "cat", "args", "start")
+
+    def __init__(self, tracer, name, cat, args):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+        self.start = 0.0
+
+    def set(self, **args) -> None:
+        self.args.update(args)
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer.record(self.name, self.cat, self.start, time.perf_counter() - self.start, self.args)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def set(self, **args) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def enable() -> Tracer:
+    global _tracer
+    _tracer = Tracer()
+    return _tracer
+
+
+def disable() -> None:
+    global _tracer
+    _tracer = None
+
+
+def get_tracer() -> Tracer | None:
+    return _tracer
+
+
+def span(name: str, cat: str = "kindred", **args):
+    """
+    Context manager timing a block: `with span("model.call", prompt_chars=n) as s:`.
+    Use s.set(...) to attach results discovered inside the block.
+    """
+    tracer = _tracer
+    if tracer is None:
+        return _NULL_SPAN
+    return Span(tracer, name, cat, args)
+
+
+def traced(name: str, cat: str = "tool"):
+    """
+    Decorator that wraps every call of a function in a span.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            tracer = _tracer
+            if tracer is None:
+                return fn(*args, **kwargs)
+            with Span(tracer, name, cat, {}):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _percentile(sorted_values: list, pct: float) -> float:
+    # Nearest-rank percentile
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
@@ -6,6 +6,10 @@ an actual TTS API and return an audio file or URL. Here we just return
 a string marker so the tutor can show where audio would be played.
 """
 
+from tools.tracing import traced
+
+
+@traced("tool.tts")
 def tts_stub(text: str) -> str:
     """
     Return a placeholder "audio" description for the given text.
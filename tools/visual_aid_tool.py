@@ -5,6 +5,10 @@ Provides simple text-based visual descriptions to help
 visual / dyslexic learners imagine the concept.
 """
 
+from tools.tracing import traced
+
+
+@traced("tool.visual_aid")
 def generate_visual_aid_description(topic: str, step_text: str) -> str:
     """
     Given the current topic and step text, return a short